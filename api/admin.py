@@ -0,0 +1,57 @@
+from flask import Response, current_app, send_file
+from flask_restx import Namespace, Resource
+from flask_jwt_extended import jwt_required
+from core.rbac import admin_required
+
+admin_ns = Namespace('admin', description='Administrative operations')
+
+@admin_ns.route('/pool')
+class PoolStatus(Resource):
+    @jwt_required()
+    @admin_required
+    @admin_ns.doc(security='Bearer')
+    def get(self):
+        """Connection pool state and counters for the worker serving this request (Admin only)"""
+        return current_app.extensions['pool_monitor'].snapshot(), 200
+
+@admin_ns.route('/github-tokens')
+class GitHubTokenStatus(Resource):
+    @jwt_required()
+    @admin_required
+    @admin_ns.doc(security='Bearer')
+    def get(self):
+        """GitHub rate limit state of each pooled token, for the worker serving this request (Admin only)"""
+        from services.github_tokens import token_pool
+        return token_pool().status(), 200
+
+@admin_ns.route('/metrics')
+class Metrics(Resource):
+    @jwt_required()
+    @admin_required
+    @admin_ns.doc(security='Bearer')
+    @admin_ns.produces(['text/plain'])
+    def get(self):
+        """Request, external call and cache metrics in the Prometheus text format (Admin only)"""
+        body, content_type = current_app.extensions['metrics'].exposition()
+        return Response(body, content_type=content_type)
+
+@admin_ns.route('/profiles')
+class ProfileList(Resource):
+    @jwt_required()
+    @admin_required
+    @admin_ns.doc(security='Bearer')
+    def get(self):
+        """Stored request profiles, newest first (Admin only)"""
+        return current_app.extensions['request_profiler'].artifacts(), 200
+
+@admin_ns.route('/profiles/<string:request_id>', endpoint='admin_profile')
+class Profile(Resource):
+    @jwt_required()
+    @admin_required
+    @admin_ns.doc(security='Bearer', responses={200: 'Profile artifact', 404: 'Not found'})
+    def get(self, request_id):
+        """Download the pstats or collapsed-stack profile of a request (Admin only)"""
+        path = current_app.extensions['request_profiler'].find(request_id)
+        if path is None:
+            return {'message': 'Profile not found'}, 404
+        return send_file(path, as_attachment=True, mimetype='application/octet-stream')
@@ -1,15 +1,17 @@
 from datetime import datetime, timezone
+from flask import current_app
 from flask_restx import Namespace, Resource, fields
 from flask_jwt_extended import (
     create_access_token, create_refresh_token, get_jwt_identity,
     jwt_required, get_jwt, current_user
 )
+from sqlalchemy.orm import selectinload
 from core.database import db
 from models.user import User
 from models.role import Role
 from models.token import TokenBlacklist
 from api.schemas import user_schema, auth_schema
-from core.security import limiter
+from core.security import limiter, key_ring
 
 auth_ns = Namespace('auth', description='Authentication operations')
 
@@ -59,14 +61,18 @@ class Login(Resource):
     @auth_ns.doc(responses={200: 'Success', 401: 'Unauthorized'})
     def post(self):
         data = auth_ns.payload
-        user = User.query.filter_by(username=data['username']).first()
+        user = User.query.options(selectinload(User.roles)).filter_by(
+            username=data['username']).first()
 
         if not user or not user.check_password(data['password']):
             return {'message': 'Invalid credentials'}, 401
 
         # Include user roles in JWT claims
+        role_mask, _, role_version = user.role_masks()
         additional_claims = {
-            'roles': [role.name for role in user.roles]
+            'roles': [role.name for role in user.roles],
+            'role_mask': role_mask,
+            'role_version': role_version
         }
         
         access_token = create_access_token(identity=user.id, additional_claims=additional_claims)
@@ -83,11 +89,14 @@ class TokenRefresh(Resource):
     @auth_ns.doc(responses={200: 'Success', 401: 'Unauthorized'})
     def post(self):
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = db.session.get(User, current_user_id, options=[selectinload(User.roles)])
         
         # Include user roles in new access token
+        role_mask, _, role_version = user.role_masks()
         additional_claims = {
-            'roles': [role.name for role in user.roles]
+            'roles': [role.name for role in user.roles],
+            'role_mask': role_mask,
+            'role_version': role_version
         }
         
         access_token = create_access_token(identity=current_user_id, additional_claims=additional_claims)
@@ -132,3 +141,11 @@ class LogoutRefresh(Resource):
         db.session.commit()
         
         return {'message': 'Refresh token revoked successfully'}, 200
+
+@auth_ns.route('/jwks')
+class JSONWebKeySet(Resource):
+    @auth_ns.doc(responses={200: 'Success'})
+    def get(self):
+        """Public keys for verifying access tokens (empty when tokens are HS256-signed)"""
+        max_age = current_app.config['JWKS_MAX_AGE']
+        return key_ring.jwks(), 200, {'Cache-Control': f'public, max-age={max_age}'}
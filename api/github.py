@@ -1,12 +1,62 @@
-from flask_restx import Namespace, Resource, fields
+from flask import Response, current_app, request
+from flask_restx import Namespace, Resource, fields, inputs
 from flask_jwt_extended import jwt_required, current_user
-from services.github import GitHubService
+from sqlalchemy.exc import IntegrityError
 from core.rbac import role_required
+from core.metrics import GITHUB_WEBHOOKS
+from core.database import db
+from core.pagination import decode_cursor, encode_cursor, pagination_headers
 from core.security import limiter
+from core.serialization import dumps, fast_marshal_with
+from services.github_tokens import GitHubRateLimited
+from services.issue_store import IssueStore
 from urllib.parse import urlparse
 
 github_ns = Namespace('github', description='GitHub API operations')
 
+@github_ns.errorhandler(GitHubRateLimited)
+def handle_rate_limited(error):
+    """Every GitHub token stays rate limited past the queue timeout"""
+    return {'message': str(error)}, 503, {'Retry-After': str(max(1, round(error.retry_after)))}
+
+def github_service():
+    """New GitHubService; PyGithub and the Ollama client are imported on first use"""
+    from services.github import GitHubService
+    return GitHubService()
+
+def async_github_service():
+    """New AsyncGitHubService for the async views; use it with ``async with``"""
+    from services.github_async import AsyncGitHubService
+    return AsyncGitHubService()
+
+async def prioritized_issues(owner, repo_name):
+    """
+    Prioritized open issues of a repository. While webhooks are configured,
+    they come from the stored results, which are written by the first call
+    """
+    if not current_app.config['GITHUB_WEBHOOK_SECRET']:
+        async with async_github_service() as github:
+            return await github.prioritize_issues(owner, repo_name)
+
+    store = IssueStore(current_app.config['GITHUB_RESYNC_INTERVAL'])
+    issues = store.prioritized(owner, repo_name)
+    if issues is not None:
+        return issues
+    async with async_github_service() as github:
+        collected = await github.collect_issues(owner, repo_name)
+    if collected is None:
+        return None
+    tracked = store.repository(owner, repo_name) is not None
+    issues = store.replace(owner, repo_name, *collected)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        # Only a concurrent request starting to track the repository first is expected
+        if tracked or store.repository(owner, repo_name) is None:
+            raise
+    return issues
+
 # Models
 repository_model = github_ns.model('Repository', {
     'name': fields.String(required=True, description='Repository name'),
@@ -100,37 +150,96 @@ repo_url_analysis_request = github_ns.model('RepoUrlAnalysisRequest', {
     'repository_url': fields.String(required=True, description='GitHub repository URL')
 })
 
+repository_list_parser = github_ns.parser()
+repository_list_parser.add_argument('page', type=inputs.positive, location='args',
+                                    help='Page number (default 1)')
+repository_list_parser.add_argument('per_page', type=inputs.int_range(1, 100), location='args',
+                                    help='Repositories per page, up to 100')
+repository_list_parser.add_argument('cursor', type=str, location='args',
+                                    help='Opaque cursor from the previous page (X-Next-Cursor); overrides page')
+repository_list_parser.add_argument('stream', type=inputs.boolean, location='args', default=False,
+                                    help='Stream every repository from this page on as NDJSON')
+
+def _ndjson(first, pages):
+    import httpx  # loaded with the GitHub services by the time a listing streams
+    yield b''.join(dumps(repo) for repo in first)
+    # The status line is long gone when a later page fails; end with an error record
+    try:
+        for repos in pages:
+            yield b''.join(dumps(repo) for repo in repos)
+    except GitHubRateLimited as e:
+        yield dumps({'error': str(e), 'retry_after': max(1, round(e.retry_after))})
+    except httpx.HTTPError as e:
+        yield dumps({'error': f'GitHub request failed: {e}'})
+
+async def repository_page(username=None):
+    """
+    One page of repositories, fetched with a single GitHub request, with
+    next-page headers; or, with ``stream``, an NDJSON response whose first
+    page is sent before the next one is requested
+    """
+    args = repository_list_parser.parse_args()
+    per_page = args['per_page'] or current_app.config['GITHUB_REPOS_PER_PAGE']
+    page = args['page'] or 1
+    if args['cursor']:
+        # A page number only means something for the listing and page size it came from
+        try:
+            position = decode_cursor(args['cursor'])
+        except ValueError as e:
+            github_ns.abort(400, str(e))
+        page, cursor_per_page = position['k'], position.get('n')
+        if not isinstance(page, int) or page < 1 or not isinstance(cursor_per_page, int):
+            github_ns.abort(400, 'Invalid cursor')
+        if position.get('u') != (username.lower() if username else None):
+            github_ns.abort(400, 'Cursor belongs to another listing')
+        if args['per_page'] and args['per_page'] != cursor_per_page:
+            github_ns.abort(400, 'Cursor belongs to another per_page')
+        per_page = cursor_per_page
+
+    async with async_github_service() as github:
+        result = await github.list_repositories_page(username, page, per_page)
+    if result is None:
+        github_ns.abort(404, f"GitHub user {username} not found")
+    repos, has_next = result
+
+    if args['stream']:
+        from services.github_async import repository_pages
+        pages = repository_pages(username, page + 1, per_page) if has_next else ()
+        return Response(_ndjson(repos, pages), mimetype='application/x-ndjson')
+    cursor = encode_cursor({'k': page + 1, 'n': per_page, 'u': username.lower() if username else None})
+    return repos, 200, pagination_headers(cursor if has_next else None)
+
 # Endpoints
 @github_ns.route('/user')
 class GitHubUserInfo(Resource):
     @jwt_required()
-    @github_ns.marshal_with(user_info_model)
+    @fast_marshal_with(user_info_model)
     @github_ns.doc(security='Bearer')
     @limiter.limit("100/hour")
-    def get(self):
+    async def get(self):
         """Get GitHub user information for authenticated user"""
-        github = GitHubService()
-        return github.get_user_info()
+        async with async_github_service() as github:
+            return await github.get_user_info()
 
 @github_ns.route('/repositories')
 class GitHubRepositories(Resource):
     @jwt_required()
     @github_ns.doc(security='Bearer')
+    @github_ns.expect(repository_list_parser)
     @limiter.limit("100/hour")
-    def get(self):
-        """List repositories for authenticated user"""
-        github = GitHubService()
-        return github.list_repositories()
+    async def get(self):
+        """List repositories for authenticated user, one page at a time"""
+        return await repository_page()
 
 @github_ns.route('/repositories/<string:username>')
 class UserRepositories(Resource):
     @jwt_required()
     @github_ns.doc(security='Bearer')
+    @github_ns.expect(repository_list_parser)
     @limiter.limit("100/hour")
-    def get(self, username):
-        """List repositories for a specific user"""
-        github = GitHubService()
-        return github.list_repositories(username)
+    async def get(self, username):
+        """List repositories for a specific user, one page at a time"""
+        return await repository_page(username)
 
 @github_ns.route('/repositories/create')
 class CreateRepository(Resource):
@@ -142,7 +251,7 @@ class CreateRepository(Resource):
     def post(self):
         """Create a new repository (Admin/Moderator only)"""
         data = github_ns.payload
-        github = GitHubService()
+        github = github_service()
         return github.create_repository(
             name=data['name'],
             description=data.get('description'),
@@ -152,13 +261,13 @@ class CreateRepository(Resource):
 @github_ns.route('/repository/<string:owner>/<string:repo_name>')
 class RepositoryDetails(Resource):
     @jwt_required()
-    @github_ns.marshal_with(repo_details_model)
+    @fast_marshal_with(repo_details_model)
     @github_ns.doc(security='Bearer')
     @limiter.limit("100/hour")
-    def get(self, owner, repo_name):
+    async def get(self, owner, repo_name):
         """Get detailed information about a specific repository"""
-        github = GitHubService()
-        repo = github.get_repository(owner, repo_name)
+        async with async_github_service() as github:
+            repo = await github.get_repository(owner, repo_name)
         if not repo:
             github_ns.abort(404, f"Repository {owner}/{repo_name} not found")
         return repo
@@ -166,13 +275,13 @@ class RepositoryDetails(Resource):
 @github_ns.route('/repository/<string:owner>/<string:repo_name>/issue/<int:issue_number>/analysis')
 class IssueAnalysis(Resource):
     @jwt_required()
-    @github_ns.marshal_with(issue_analysis_model)
+    @fast_marshal_with(issue_analysis_model)
     @github_ns.doc(security='Bearer')
     @limiter.limit("50/hour")
-    def get(self, owner, repo_name, issue_number):
+    async def get(self, owner, repo_name, issue_number):
         """Analyze a specific issue with AI-powered insights"""
-        github = GitHubService()
-        analysis = github.analyze_issue(owner, repo_name, issue_number)
+        async with async_github_service() as github:
+            analysis = await github.analyze_issue(owner, repo_name, issue_number)
         if not analysis:
             github_ns.abort(404, f"Issue {issue_number} not found or analysis failed")
         return analysis
@@ -180,13 +289,13 @@ class IssueAnalysis(Resource):
 @github_ns.route('/repository/<string:owner>/<string:repo_name>/issue/<int:issue_number>/dependencies')
 class IssueDependencies(Resource):
     @jwt_required()
-    @github_ns.marshal_with(issue_dependencies_model)
+    @fast_marshal_with(issue_dependencies_model)
     @github_ns.doc(security='Bearer')
     @limiter.limit("50/hour")
-    def get(self, owner, repo_name, issue_number):
+    async def get(self, owner, repo_name, issue_number):
         """Get dependencies for a specific issue"""
-        github = GitHubService()
-        dependencies = github.analyze_issue_dependencies(owner, repo_name, issue_number)
+        async with async_github_service() as github:
+            dependencies = await github.analyze_issue_dependencies(owner, repo_name, issue_number)
         if not dependencies:
             github_ns.abort(404, f"Issue {issue_number} not found or analysis failed")
         return dependencies
@@ -194,13 +303,12 @@ class IssueDependencies(Resource):
 @github_ns.route('/repository/<string:owner>/<string:repo_name>/issues/prioritized')
 class PrioritizedIssues(Resource):
     @jwt_required()
-    @github_ns.marshal_list_with(prioritized_issue_model)
+    @fast_marshal_with(prioritized_issue_model, as_list=True)
     @github_ns.doc(security='Bearer')
     @limiter.limit("20/hour")
-    def get(self, owner, repo_name):
+    async def get(self, owner, repo_name):
         """Get prioritized list of issues with AI-powered insights"""
-        github = GitHubService()
-        issues = github.prioritize_issues(owner, repo_name)
+        issues = await prioritized_issues(owner, repo_name)
         if issues is None:
             github_ns.abort(404, f"Repository {owner}/{repo_name} not found or analysis failed")
         return issues
@@ -209,10 +317,10 @@ class PrioritizedIssues(Resource):
 class RepositoryURLAnalysis(Resource):
     @jwt_required()
     @github_ns.expect(repo_url_analysis_request)
-    @github_ns.marshal_list_with(prioritized_issue_model)
+    @fast_marshal_with(prioritized_issue_model, as_list=True)
     @github_ns.doc(security='Bearer')
     @limiter.limit("10/hour")
-    def post(self):
+    async def post(self):
         """Analyze issues from a GitHub repository URL with AI-powered insights"""
         data = github_ns.payload
         repo_url = data.get('repository_url')
@@ -226,13 +334,48 @@ class RepositoryURLAnalysis(Resource):
             
             owner, repo_name = path_parts[0], path_parts[1]
             
-            github = GitHubService()
-            issues = github.prioritize_issues(owner, repo_name)
+            issues = await prioritized_issues(owner, repo_name)
             
             if issues is None:
                 github_ns.abort(404, f"Repository {owner}/{repo_name} not found or analysis failed")
             
             return issues
             
+        except GitHubRateLimited:
+            raise
         except Exception as e:
             github_ns.abort(400, f"Error analyzing repository: {str(e)}")
+
+# Event types a webhook delivery is counted under; anything else is "other"
+WEBHOOK_EVENTS = {'issues', 'issue_comment', 'ping'}
+
+@github_ns.route('/webhook')
+class GitHubWebhook(Resource):
+    # Deliveries are signed and can come in bursts; exempt from the per-IP limits
+    decorators = [limiter.exempt]
+
+    @github_ns.doc(security=None, responses={200: 'Event ignored', 202: 'Update queued',
+                                             401: 'Invalid signature', 404: 'Webhooks not configured'})
+    def post(self):
+        """Receive GitHub issues and issue_comment events, signed with GITHUB_WEBHOOK_SECRET"""
+        from services.github_webhooks import IssueUpdate, issue_updates, valid_signature
+        secret = current_app.config['GITHUB_WEBHOOK_SECRET']
+        if not secret:
+            github_ns.abort(404, "GitHub webhooks are not configured")
+        event = request.headers.get('X-GitHub-Event', '')
+        label = event if event in WEBHOOK_EVENTS else 'other'
+        if not valid_signature(secret, request.get_data(), request.headers.get('X-Hub-Signature-256')):
+            GITHUB_WEBHOOKS.labels(label, 'rejected').inc()
+            github_ns.abort(401, "Invalid webhook signature")
+
+        try:
+            update = IssueUpdate.from_event(event, request.get_json(silent=True) or {})
+        except (KeyError, TypeError):
+            github_ns.abort(400, "Malformed webhook payload")
+        if update is None:
+            GITHUB_WEBHOOKS.labels(label, 'ignored').inc()
+            return {'message': f"Ignored {event} event"}, 200
+
+        issue_updates.put(current_app._get_current_object(), update)
+        GITHUB_WEBHOOKS.labels(label, 'queued').inc()
+        return {'message': "Update queued"}, 202
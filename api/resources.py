@@ -1,11 +1,21 @@
-from flask_restx import Namespace, Resource, fields
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import request, current_app, Response, stream_with_context
+from flask_restx import Namespace, Resource, fields, inputs
+from flask_jwt_extended import jwt_required, get_jwt_identity, current_user
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
 from core.database import db
 from models.user import User
-from models.role import Role
+from models.role import Role, user_roles
 from api.schemas import user_schema, users_schema
 from core.rbac import role_required, admin_required
 from core.version import version_required, APIVersion
+from core.security import limiter
+from core.pagination import keyset_page, pagination_headers
+from core.serialization import fast_marshal_with
+from core.replicas import replica_reads
+from core.http_cache import make_etag, is_not_modified, not_modified, cache_headers
+from services.user_import import UserImportService
+from services.user_export import UserExportService
 
 api_ns = Namespace('api', description='API operations')
 
@@ -30,30 +40,72 @@ user_model_v2 = api_ns.model('UserV2', {
     'roles': fields.List(fields.String, readonly=True, description='User roles')
 })
 
+user_list_parser = api_ns.parser()
+user_list_parser.add_argument('limit', type=inputs.positive, location='args',
+                              help='Page size')
+user_list_parser.add_argument('cursor', type=str, location='args',
+                              help='Opaque cursor from the previous page (X-Next-Cursor)')
+user_list_parser.add_argument('is_active', type=inputs.boolean, location='args')
+user_list_parser.add_argument('role', type=str, location='args', help='Role name')
+user_list_parser.add_argument('created_after', type=inputs.datetime_from_iso8601, location='args')
+user_list_parser.add_argument('created_before', type=inputs.datetime_from_iso8601, location='args')
+
+def _user_page(with_roles=False):
+    """Return one keyset page of users matching the list filters, plus next-page headers"""
+    args = user_list_parser.parse_args()
+    limit = min(args['limit'] or current_app.config['USER_LIST_DEFAULT_LIMIT'],
+                current_app.config['USER_LIST_MAX_LIMIT'])
+
+    query = db.select(User)
+    if with_roles:
+        query = query.options(selectinload(User.roles))
+    if args['is_active'] is not None:
+        query = query.where(User.is_active == args['is_active'])
+    if args['role']:
+        query = query.where(User.id.in_(
+            db.select(user_roles.c.user_id)
+            .join(Role, Role.id == user_roles.c.role_id)
+            .where(Role.name == args['role'])
+        ))
+    if args['created_after']:
+        query = query.where(User.created_at >= args['created_after'])
+    if args['created_before']:
+        query = query.where(User.created_at < args['created_before'])
+
+    try:
+        users, next_cursor = keyset_page(db.session, query, User.id, limit, args['cursor'])
+    except ValueError as e:
+        api_ns.abort(400, str(e))
+    return users, pagination_headers(next_cursor)
+
 @api_ns.route('/users')
 class UserList(Resource):
+    @replica_reads
     @jwt_required()
     @admin_required
     @api_ns.doc(security='Bearer')
+    @api_ns.expect(user_list_parser)
     @version_required(APIVersion.V1)
-    @api_ns.marshal_list_with(user_model_v1)
+    @fast_marshal_with(user_model_v1, as_list=True)
     def get(self):
-        """Get list of users (V1) - Basic information"""
-        users = User.query.all()
+        """Get list of users (V1) - Basic information, paginated by cursor"""
+        users, headers = _user_page()
         return [{'id': user.id, 'username': user.username, 
                 'email': user.email, 'is_active': user.is_active} 
-                for user in users]
+                for user in users], 200, headers
 
 @api_ns.route('/v2/users')
 class UserListV2(Resource):
+    @replica_reads
     @jwt_required()
     @admin_required
     @api_ns.doc(security='Bearer')
+    @api_ns.expect(user_list_parser)
     @version_required(APIVersion.V2)
-    @api_ns.marshal_list_with(user_model_v2)
+    @fast_marshal_with(user_model_v2, as_list=True)
     def get(self):
-        """Get list of users (V2) - Enhanced information"""
-        users = User.query.all()
+        """Get list of users (V2) - Enhanced information, paginated by cursor"""
+        users, headers = _user_page(with_roles=True)
         return [{
             'id': user.id,
             'username': user.username,
@@ -61,25 +113,110 @@ class UserListV2(Resource):
             'is_active': user.is_active,
             'created_at': user.created_at,
             'roles': [role.name for role in user.roles]
-        } for user in users]
+        } for user in users], 200, headers
+
+user_import_model = api_ns.model('UserImport', {
+    'username': fields.String(required=True),
+    'email': fields.String(required=True),
+    'password': fields.String(required=True)
+})
+
+@api_ns.route('/users/import')
+class UserImport(Resource):
+    @jwt_required()
+    @admin_required
+    @limiter.limit("10/minute")
+    @api_ns.doc(security='Bearer', responses={200: 'Per-row results', 400: 'Invalid upload',
+                                              409: 'Conflicting concurrent import'})
+    @api_ns.expect([user_import_model])
+    def post(self):
+        """Bulk import users from a JSON array or CSV upload (Admin only)
+
+        CSV can be sent as a ``file`` form field or a ``text/csv`` body with a
+        username,email,password header. Every imported user gets the ``user`` role.
+        """
+        if 'file' in request.files or request.mimetype == 'text/csv':
+            upload = request.files['file'].read() if 'file' in request.files else request.get_data()
+            try:
+                text = upload.decode('utf-8-sig')
+            except UnicodeDecodeError:
+                return {'message': 'CSV upload must be UTF-8 encoded'}, 400
+            rows = UserImportService.parse_csv(text)
+        else:
+            rows = request.get_json(silent=True)
+            if not isinstance(rows, list):
+                return {'message': 'Expected a JSON array or CSV upload'}, 400
+
+        max_rows = current_app.config['BULK_IMPORT_MAX_ROWS']
+        if len(rows) > max_rows:
+            return {'message': f'Too many rows (maximum {max_rows})'}, 400
+
+        try:
+            return UserImportService().import_users(rows), 200
+        except IntegrityError:
+            db.session.rollback()
+            return {'message': 'Users were created concurrently; retry the import'}, 409
+
+user_export_parser = api_ns.parser()
+user_export_parser.add_argument('format', type=str, choices=('ndjson', 'csv'), default='ndjson',
+                                location='args')
+
+@api_ns.route('/users/export')
+class UserExport(Resource):
+    @replica_reads
+    @jwt_required()
+    @admin_required
+    @limiter.limit("10/hour")
+    @api_ns.doc(security='Bearer', responses={200: 'Streamed NDJSON or CSV'})
+    @api_ns.expect(user_export_parser)
+    def get(self):
+        """Stream all users with their roles as NDJSON or CSV (Admin only)"""
+        export_format = user_export_parser.parse_args()['format']
+        service = UserExportService(batch_size=current_app.config['USER_EXPORT_BATCH_SIZE'])
+
+        if export_format == 'csv':
+            chunks, mimetype = service.iter_csv(), 'text/csv'
+        else:
+            chunks, mimetype = service.iter_ndjson(), 'application/x-ndjson'
+
+        return Response(
+            stream_with_context(chunks),
+            mimetype=mimetype,
+            headers={'Content-Disposition': f'attachment; filename=users.{export_format}'}
+        )
 
 @api_ns.route('/users/<int:id>')
 class UserResource(Resource):
+    @replica_reads
     @jwt_required()
     @role_required('admin', 'moderator')
-    @api_ns.doc(security='Bearer')
+    @api_ns.doc(security='Bearer', responses={304: 'Not Modified'})
     def get(self, id):
+        if request.if_none_match:
+            # Revalidate from the version column alone
+            version = db.session.execute(
+                db.select(User.version).where(User.id == id)
+            ).scalar_one_or_none()
+            if version is None:
+                api_ns.abort(404)
+            etag = make_etag('user', id, version)
+            if is_not_modified(etag):
+                return not_modified(etag)
+
         user = User.query.get_or_404(id)
-        return user_schema.dump(user)
+        return user_schema.dump(user), 200, cache_headers(make_etag('user', user.id, user.version))
 
 @api_ns.route('/profile')
 class UserProfile(Resource):
+    @replica_reads
     @jwt_required()
-    @api_ns.doc(security='Bearer')
+    @api_ns.doc(security='Bearer', responses={304: 'Not Modified'})
     def get(self):
-        user_id = get_jwt_identity()
-        user = User.query.get_or_404(user_id)
-        return user_schema.dump(user)
+        # The JWT user lookup already loaded the row
+        etag = make_etag('user', current_user.id, current_user.version)
+        if is_not_modified(etag):
+            return not_modified(etag)
+        return user_schema.dump(current_user), 200, cache_headers(etag)
 
 @api_ns.route('/roles')
 class RoleList(Resource):
@@ -99,11 +236,25 @@ class RoleList(Resource):
 
         return {'message': 'Role created successfully'}, 201
 
+    @replica_reads
     @jwt_required()
     @admin_required
     @api_ns.doc(security='Bearer')
     def get(self):
         """Get all roles (Admin only)"""
+        # Inserts raise the max id (ids are never reused), deletes lower the
+        # count, updates raise the version sum
+        if request.if_none_match:
+            count, version_sum, max_id = db.session.execute(
+                db.select(db.func.count(Role.id), db.func.coalesce(db.func.sum(Role.version), 0),
+                          db.func.max(Role.id))
+            ).one()
+            etag = make_etag('roles', count, version_sum, max_id)
+            if is_not_modified(etag):
+                return not_modified(etag)
+
         roles = Role.query.all()
+        etag = make_etag('roles', len(roles), sum(role.version for role in roles),
+                         max((role.id for role in roles), default=None))
         return [{'id': role.id, 'name': role.name, 'description': role.description} 
-                for role in roles]
+                for role in roles], 200, cache_headers(etag)
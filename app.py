@@ -1,29 +1,48 @@
-from flask import Flask, url_for, send_from_directory
+import os
+import flask_restx
+from flask import Flask, url_for, jsonify
 from flask_restx import Api
 from flask_cors import CORS
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt.exceptions import PyJWTError
+from sqlalchemy.orm.exc import StaleDataError
 from core.config import Config
 from core.database import db
-from core.security import jwt, talisman, limiter
+from core.security import jwt, talisman, limiter, key_ring, jwt_error_response
+from core.ratelimit import configure_storage
+from core.serialization import output_json
+from core.instrumentation import query_instrumentation
+from core.replicas import replica_router
+from core.pool import pool_monitor
+from core.compression import compression
+from core.assets import assets
+from core.openapi import openapi_spec
+from core.metrics import metrics
+from core.profiling import request_profiler
+from core.cli import init_db, register_commands
 from api.auth import auth_ns
 from api.resources import api_ns
 from api.github import github_ns
+from api.admin import admin_ns
 from models.user import User
-from models.role import Role
-
-# At the top of app.py, after imports
-app = create_app()
-
 
 def create_app():
-    app = Flask(__name__, static_url_path='/static')
+    app = Flask(__name__, static_folder=None)
     app.config.from_object(Config)
 
     # Initialize CORS
     CORS(app)
 
     # Initialize extensions
+    compression.init_app(app)  # registered first so it runs after every other after_request
+    metrics.init_app(app)
     db.init_app(app)
+    replica_router.init_app(app)
+    with app.app_context():
+        pool_monitor.init_app(app, {'primary': db.engine, **replica_router.engines})
+    query_instrumentation.init_app(app)
     jwt.init_app(app)
+    key_ring.init_app(app)
 
     # Configure Talisman with relaxed CSP for Swagger UI
     csp = {
@@ -35,7 +54,9 @@ def create_app():
         'font-src': ["'self'", 'data:'],
     }
     talisman.init_app(app, content_security_policy=csp, force_https=False)
+    configure_storage(app)
     limiter.init_app(app)
+    request_profiler.init_app(app)
 
     # User loader for JWT
     @jwt.user_lookup_loader
@@ -43,14 +64,21 @@ def create_app():
         identity = jwt_data["sub"]
         return User.query.filter_by(id=identity).one_or_none()
 
-    # Serve static files
-    @app.route('/static/<path:path>')
-    def send_static(path):
-        return send_from_directory('static', path)
-
-    @app.route('/swaggerui/<path:filename>')
-    def serve_swagger_ui(filename):
-        return send_from_directory('static/swagger-ui', filename)
+    # Publish JWT verification keys for services that verify tokens locally
+    @app.route('/.well-known/jwks.json')
+    def jwks():
+        response = jsonify(key_ring.jwks())
+        response.cache_control.public = True
+        response.cache_control.max_age = app.config['JWKS_MAX_AGE']
+        return response
+
+    # Serve static files. The Swagger UI route shadows flask-restx's own, so its
+    # files not bundled here (fonts, favicons) come from the flask-restx package
+    assets.init_app(app)
+    assets.mount(app, 'static', '/static', ['static'])
+    assets.mount(app, 'serve_swagger_ui', '/swaggerui',
+                 ['static/swagger-ui', os.path.join(os.path.dirname(flask_restx.__file__), 'static')],
+                 aliases=['restx_doc.static'])
 
     # Initialize API with Swagger
     authorizations = {
@@ -71,34 +99,40 @@ def create_app():
         doc='/',
         prefix='/api/v1'  # Default version prefix
     )
+    api.representation('application/json')(output_json)
+
+    # flask-restx answers exceptions raised in its resources itself, so without
+    # these a missing or invalid token is a 500 whenever exceptions do not
+    # propagate (production)
+    @api.errorhandler(JWTExtendedException)
+    @api.errorhandler(PyJWTError)
+    def handle_jwt_error(e):
+        return jwt_error_response(e)
+
+    # Users and roles are versioned; a write over a row that another request
+    # changed since it was read is a conflict, not a server error
+    @api.errorhandler(StaleDataError)
+    def handle_stale_data(e):
+        db.session.rollback()
+        return {'message': 'The resource was changed by another request; reload it and retry'}, 409
+    openapi_spec.init_app(app, api)
 
     # Register namespaces
     api.add_namespace(auth_ns)
     api.add_namespace(api_ns)
     api.add_namespace(github_ns)
+    api.add_namespace(admin_ns)
 
-    # Create database tables and default roles
-    with app.app_context():
-        db.create_all()
+    register_commands(app)
 
-        if not app.config['TESTING']:  # Skip in test environment
+    # Schema creation and seeding normally run once through `flask init-db`,
+    # not in every worker that boots
+    if app.config['DATABASE_INIT_ON_STARTUP']:
+        with app.app_context():
             try:
-                # Create default roles if they don't exist
-                default_roles = [
-                    ('admin', 'Administrator with full access'),
-                    ('moderator',
-                     'Moderator with limited administrative access'),
-                    ('user', 'Regular user with basic access')
-                ]
-
-                for role_name, description in default_roles:
-                    if not Role.query.filter_by(name=role_name).first():
-                        role = Role(name=role_name, description=description)
-                        db.session.add(role)
-
-                db.session.commit()
+                init_db()
             except Exception as e:
-                print(f"Error creating default roles: {str(e)}")
+                app.logger.error("Error initializing database: %s", e)
                 db.session.rollback()
 
     return app
@@ -106,4 +140,6 @@ def create_app():
 
 if __name__ == '__main__':
     app = create_app()
+    with app.app_context():
+        init_db()
     app.run(host='0.0.0.0', port=5000)
@@ -0,0 +1,248 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+from collections import OrderedDict
+from flask import Response, current_app, request, send_file
+from werkzeug.exceptions import NotFound
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # optional; gzip variants are always available
+    brotli = None
+
+# Preferred first; the suffix is the precompressed variant's file extension
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+COMPRESSIBLE_MIMETYPES = {'text/css', 'text/html', 'text/javascript', 'text/plain', 'application/javascript',
+                          'application/json', 'image/svg+xml'}
+VERSIONED_CACHE_CONTROL = 'public, max-age={max_age}, immutable'
+UNVERSIONED_CACHE_CONTROL = 'public, no-cache'
+
+# name.<12 hex digits>.ext, as produced by versioned_name()
+_VERSIONED = re.compile(r'^(?P<stem>.+)\.(?P<digest>[0-9a-f]{12})(?P<suffix>\.[^./]+)$')
+
+def versioned_name(filename, digest):
+    """``swagger-ui.css`` -> ``swagger-ui.<digest>.css``"""
+    stem, suffix = os.path.splitext(filename)
+    return f'{stem}.{digest}{suffix}'
+
+def compress(encoding, data):
+    # Done once per file or document, so use the slowest, smallest settings
+    if encoding == 'br':
+        return brotli.compress(data, quality=11)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+def available_encodings():
+    return [encoding for encoding, _ in ENCODINGS if encoding != 'br' or brotli is not None]
+
+def _variant(path, suffix, mtime_ns):
+    """Path of a precompressed variant written after the file last changed, or None"""
+    try:
+        stat = os.stat(path + suffix)
+    except OSError:
+        return None
+    return path + suffix if stat.st_mtime_ns >= mtime_ns else None
+
+def _compressible(path):
+    return (mimetypes.guess_type(path)[0] in COMPRESSIBLE_MIMETYPES
+            and not path.endswith(tuple(suffix for _, suffix in ENCODINGS)))
+
+class _Asset:
+    __slots__ = ('path', 'version', 'size', 'digest', 'mimetype', 'compressible')
+
+    def __init__(self, path, stat):
+        with open(path, 'rb') as handle:
+            self.digest = hashlib.sha256(handle.read()).hexdigest()[:12]
+        self.path = path
+        self.version = (stat.st_mtime_ns, stat.st_size)
+        self.size = stat.st_size
+        self.mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        self.compressible = _compressible(path)
+
+    def variant(self, suffix):
+        return _variant(self.path, suffix, self.version[0])
+
+class StaticAssets:
+    """
+    Static files with strong ETags, content-hashed URLs and precompressed variants.
+
+    ``url_for`` on a mounted endpoint returns a name carrying the file's content
+    hash (``swagger-ui.3f9c0a1b2d4e.css``). Content behind such a URL never
+    changes, so it is served as ``immutable`` for ``ASSETS_MAX_AGE`` seconds.
+    Plain names still work and are revalidated against the ETag. A ``.br`` or
+    ``.gz`` file next to an asset (see ``flask build-assets``) is served to
+    clients that accept it. Files up to ``ASSETS_CACHE_MAX_FILE_SIZE`` bytes are
+    kept in memory, with compressed variants built on first use, within an LRU
+    budget of ``ASSETS_CACHE_SIZE`` bytes.
+    """
+
+    def __init__(self):
+        self._mounts = {}
+        self._assets = {}
+        self._cache = OrderedDict()
+        self._cache_bytes = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        app.url_defaults(self._versioned_url)
+
+    def mount(self, app, endpoint, url_path, directories, aliases=()):
+        """
+        Serve ``directories`` (searched in order) under ``url_path`` as ``endpoint``.
+        ``aliases`` are other endpoints whose URLs this route answers, such as a
+        blueprint's static route it shadows, so their URLs are versioned too.
+        """
+        directories = [os.path.join(app.root_path, directory) for directory in directories]
+        for name in (endpoint, *aliases):
+            self._mounts[name] = directories
+        app.add_url_rule(f'{url_path}/<path:filename>', endpoint,
+                         lambda filename: self._serve(directories, filename))
+
+    def clear(self):
+        with self._lock:
+            self._assets.clear()
+            self._cache.clear()
+            self._cache_bytes = 0
+
+    def _find(self, directories, filename):
+        for directory in directories:
+            path = safe_join(directory, filename)
+            if path is None:
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if not os.path.isfile(path):
+                continue
+            asset = self._assets.get(path)
+            if asset is None or asset.version != (stat.st_mtime_ns, stat.st_size):
+                asset = self._assets[path] = _Asset(path, stat)
+            return asset
+        return None
+
+    def _versioned_url(self, endpoint, values):
+        directories = self._mounts.get(endpoint)
+        if directories is None or 'filename' not in values:
+            return
+        asset = self._find(directories, values['filename'])
+        if asset is not None:
+            values['filename'] = versioned_name(values['filename'], asset.digest)
+
+    def _serve(self, directories, filename):
+        versioned = False
+        asset = self._find(directories, filename)
+        match = _VERSIONED.match(filename) if asset is None else None
+        if match:
+            asset = self._find(directories, match['stem'] + match['suffix'])
+            # A stale hash (a page rendered before a deploy) still gets the
+            # current file, just not as immutable
+            versioned = asset is not None and asset.digest == match['digest']
+        if asset is None:
+            raise NotFound()
+
+        config = current_app.config
+        if asset.size <= config['ASSETS_CACHE_MAX_FILE_SIZE']:
+            response = self._from_memory(asset)
+        else:
+            response = self._from_disk(asset)
+
+        if asset.compressible:
+            response.vary.add('Accept-Encoding')
+        response.headers['Cache-Control'] = (
+            VERSIONED_CACHE_CONTROL.format(max_age=config['ASSETS_MAX_AGE']) if versioned
+            else UNVERSIONED_CACHE_CONTROL)
+        return response
+
+    def _from_memory(self, asset):
+        encoding = None
+        if asset.compressible:
+            encoding = request.accept_encodings.best_match(available_encodings())
+        encoding, data = self._cached(asset, encoding)
+        response = Response(data, mimetype=asset.mimetype)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.set_etag(f'{asset.digest}-{encoding}' if encoding else asset.digest)
+        return response.make_conditional(request, accept_ranges=True, complete_length=len(data))
+
+    def _from_disk(self, asset):
+        path, encoding = asset.path, None
+        if asset.compressible:
+            variants = {name: asset.variant(suffix) for name, suffix in ENCODINGS}
+            encoding = request.accept_encodings.best_match([name for name, variant in variants.items() if variant])
+            if encoding:
+                path = variants[encoding]
+        response = send_file(path, mimetype=asset.mimetype, conditional=True,
+                             etag=f'{asset.digest}-{encoding}' if encoding else asset.digest)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        return response
+
+    def _cached(self, asset, encoding):
+        """``(encoding, bytes)`` of the asset; identity when compressing does not make it smaller"""
+        key = (asset.path, encoding)
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and entry[0] == asset.digest:
+                self._cache.move_to_end(key)
+                return entry[1], entry[2]
+
+        with open(asset.path, 'rb') as handle:
+            data = handle.read()
+        if encoding:
+            suffix = dict(ENCODINGS)[encoding]
+            variant = asset.variant(suffix)
+            if variant is not None:
+                with open(variant, 'rb') as handle:
+                    compressed = handle.read()
+            else:
+                compressed = compress(encoding, data)
+            if len(compressed) < len(data):
+                data = compressed
+            else:
+                encoding = None
+
+        with self._lock:
+            previous = self._cache.pop(key, None)
+            if previous is not None:
+                self._cache_bytes -= len(previous[2])
+            self._cache[key] = (asset.digest, encoding, data)
+            self._cache_bytes += len(data)
+            budget = current_app.config['ASSETS_CACHE_SIZE']
+            while self._cache_bytes > budget and self._cache:
+                _, (_, _, evicted) = self._cache.popitem(last=False)
+                self._cache_bytes -= len(evicted)
+        return encoding, data
+
+def precompress(directory):
+    """
+    Write ``.br`` (when brotli is installed) and ``.gz`` variants of every
+    compressible file under ``directory``, skipping variants that are up to
+    date or would not be smaller. Returns the paths written.
+    """
+    written = []
+    for root, _, files in os.walk(directory):
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            if not _compressible(path):
+                continue
+            mtime_ns = os.stat(path).st_mtime_ns
+            data = None
+            for encoding in available_encodings():
+                suffix = dict(ENCODINGS)[encoding]
+                if _variant(path, suffix, mtime_ns) is not None:
+                    continue
+                if data is None:
+                    with open(path, 'rb') as handle:
+                        data = handle.read()
+                compressed = compress(encoding, data)
+                if len(compressed) < len(data):
+                    with open(path + suffix, 'wb') as handle:
+                        handle.write(compressed)
+                    written.append(path + suffix)
+    return written
+
+assets = StaticAssets()
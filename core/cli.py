@@ -0,0 +1,46 @@
+import os
+import click
+from core.assets import precompress
+from core.openapi import openapi_spec
+from core.database import db
+from models.role import Role
+
+DEFAULT_ROLES = [
+    ('admin', 'Administrator with full access'),
+    ('moderator', 'Moderator with limited administrative access'),
+    ('user', 'Regular user with basic access'),
+]
+
+def init_db():
+    """Create missing tables and the default roles; safe to run repeatedly"""
+    db.create_all()
+    existing = set(db.session.scalars(db.select(Role.name)))
+    for role_name, description in DEFAULT_ROLES:
+        if role_name not in existing:
+            db.session.add(Role(name=role_name, description=description))
+    db.session.commit()
+
+def register_commands(app):
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Create database tables and default roles."""
+        init_db()
+        click.echo('Database tables and default roles are ready.')
+
+    @app.cli.command('build-assets')
+    def build_assets_command():
+        """Write precompressed .br/.gz variants of the static files."""
+        written = precompress(os.path.join(app.root_path, 'static'))
+        click.echo(f'Wrote {len(written)} precompressed file(s).')
+
+    @app.cli.command('export-openapi')
+    @click.option('--output', type=click.Path(dir_okay=False), help='File to write (default: stdout).')
+    def export_openapi_command(output):
+        """Write the OpenAPI (Swagger) spec served at /api/v1/swagger.json."""
+        spec = openapi_spec.generate(app)
+        if output is None:
+            click.echo(spec, nl=False)
+            return
+        with open(output, 'wb') as handle:
+            handle.write(spec)
+        click.echo(f'Wrote {output} ({len(spec)} bytes).', err=True)
@@ -0,0 +1,102 @@
+import zlib
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # optional; gzip is always available
+    brotli = None
+
+class Compression:
+    """
+    Negotiated gzip/brotli compression of response bodies.
+
+    Only responses with a compressible mimetype are considered. Buffered
+    bodies are compressed when they reach ``COMPRESS_MIN_SIZE`` bytes, and
+    streamed bodies are compressed chunk by chunk with a flush after each
+    chunk. Responses that already have a ``Content-Encoding`` are left alone,
+    and so are file responses (``direct_passthrough``), such as static assets.
+    """
+
+    def init_app(self, app):
+        app.after_request(self._compress)
+
+    def _encodings(self):
+        return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+    def _compress(self, response):
+        config = current_app.config
+        if not config['COMPRESS_ENABLED'] or response.mimetype not in config['COMPRESS_MIMETYPES']:
+            return response
+        response.vary.add('Accept-Encoding')
+
+        if (response.status_code < 200 or response.status_code in (204, 304)
+                or 'Content-Encoding' in response.headers or response.direct_passthrough):
+            return response
+
+        encoding = request.accept_encodings.best_match(self._encodings())
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            response.response = _compress_stream(response.response, _compressor(encoding, config))
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < config['COMPRESS_MIN_SIZE']:
+                return response
+            compressor = _compressor(encoding, config)
+            response.set_data(compressor.compress(data) + compressor.finish())
+
+        response.headers['Content-Encoding'] = encoding
+        # The encoded bytes differ, so a strong validator no longer applies
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+class _Gzip:
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+class _Brotli:
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+def _compressor(encoding, config):
+    if encoding == 'br':
+        return _Brotli(config['COMPRESS_BR_LEVEL'])
+    return _Gzip(config['COMPRESS_LEVEL'])
+
+def _compress_stream(chunks, compressor):
+    """Compress each chunk as it is produced, flushing so clients see it immediately"""
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            if chunk:
+                yield compressor.compress(chunk) + compressor.flush()
+        yield compressor.finish()
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+compression = Compression()
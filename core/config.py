@@ -1,5 +1,6 @@
 import os
 from datetime import timedelta
+from core.pool import engine_options
 
 class BaseConfig:
     # Flask settings
@@ -9,16 +10,42 @@ class BaseConfig:
     # Database settings
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    SQLALCHEMY_ENGINE_OPTIONS = {
-        "pool_recycle": 300,
-        "pool_pre_ping": True,
-    }
+    # Create tables and default roles in create_app() instead of `flask init-db`
+    DATABASE_INIT_ON_STARTUP = os.environ.get('DATABASE_INIT_ON_STARTUP', 'false').lower() == 'true'
+    # Pool profile: direct, pgbouncer or sqlite (chosen from DATABASE_URL when unset)
+    DATABASE_POOL_PROFILE = os.environ.get('DATABASE_POOL_PROFILE')
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI, DATABASE_POOL_PROFILE)
+
+    # Read replicas (comma-separated URLs) for read-only endpoints; round_robin or least_connections
+    DATABASE_REPLICA_URLS = [url.strip() for url in os.environ.get('DATABASE_REPLICA_URLS', '').split(',')
+                             if url.strip()]
+    REPLICA_SELECTION = os.environ.get('REPLICA_SELECTION', 'round_robin')
+    REPLICA_RETRY_SECONDS = int(os.environ.get('REPLICA_RETRY_SECONDS', 30))
+    REPLICA_READ_AFTER_WRITE_SECONDS = float(os.environ.get('REPLICA_READ_AFTER_WRITE_SECONDS', 5))
+
+    # Per-request SQL instrumentation: Server-Timing header and slow-query log threshold (0 disables)
+    SQL_SERVER_TIMING = os.environ.get('SQL_SERVER_TIMING', 'false').lower() == 'true'
+    SQL_SLOW_QUERY_MS = float(os.environ.get('SQL_SLOW_QUERY_MS', 500))
 
     # JWT settings
     JWT_SECRET_KEY = SECRET_KEY
+    # HS256 signs with JWT_SECRET_KEY; RS256/EdDSA sign with the key ring in JWT_KEYS_DIR
+    JWT_ALGORITHM = os.environ.get('JWT_ALGORITHM', 'HS256')
+    JWT_KEYS_DIR = os.environ.get('JWT_KEYS_DIR')
+    JWT_ACTIVE_KID = os.environ.get('JWT_ACTIVE_KID')
+    JWKS_MAX_AGE = int(os.environ.get('JWKS_MAX_AGE', 300))
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
 
+    # RBAC: roles implied by each role, and whether to trust the role_mask token claim.
+    # A trusted claim saves loading the user's roles, but a user whose roles are
+    # taken away (or who is deactivated) keeps them until the access token expires
+    ROLE_HIERARCHY = {
+        'admin': ['moderator'],
+        'moderator': ['user'],
+    }
+    RBAC_TOKEN_CLAIMS = os.environ.get('RBAC_TOKEN_CLAIMS', 'false').lower() == 'true'
+
     # API settings
     API_TITLE = 'Secure REST API'
     API_VERSIONS = ['v1', 'v2']
@@ -30,9 +57,75 @@ class BaseConfig:
     - v1: Basic API functionality
     - v2: Enhanced API with additional user information'''
 
-    # Rate limiting
+    # User list pagination
+    USER_LIST_DEFAULT_LIMIT = int(os.environ.get('USER_LIST_DEFAULT_LIMIT', 100))
+    USER_LIST_MAX_LIMIT = int(os.environ.get('USER_LIST_MAX_LIMIT', 1000))
+
+    # Rows per server-side cursor batch when streaming /api/users/export
+    USER_EXPORT_BATCH_SIZE = int(os.environ.get('USER_EXPORT_BATCH_SIZE', 1000))
+
+    # Bulk user import
+    BULK_IMPORT_MAX_ROWS = int(os.environ.get('BULK_IMPORT_MAX_ROWS', 10000))
+    BULK_IMPORT_BATCH_SIZE = int(os.environ.get('BULK_IMPORT_BATCH_SIZE', 1000))
+    BULK_IMPORT_HASH_WORKERS = int(os.environ.get('BULK_IMPORT_HASH_WORKERS', os.cpu_count() or 4))
+
+    # Response compression (gzip, or brotli when installed) for these mimetypes
+    COMPRESS_ENABLED = os.environ.get('COMPRESS_ENABLED', 'true').lower() == 'true'
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+    COMPRESS_LEVEL = int(os.environ.get('COMPRESS_LEVEL', 6))
+    COMPRESS_BR_LEVEL = int(os.environ.get('COMPRESS_BR_LEVEL', 4))
+    COMPRESS_MIMETYPES = ['application/json', 'application/x-ndjson', 'text/csv',
+                          'text/html', 'text/plain']
+
+    # Static assets: lifetime of content-hashed URLs, and files kept in memory
+    # (up to ASSETS_CACHE_MAX_FILE_SIZE bytes each, ASSETS_CACHE_SIZE bytes in all)
+    ASSETS_MAX_AGE = int(os.environ.get('ASSETS_MAX_AGE', 31536000))
+    ASSETS_CACHE_MAX_FILE_SIZE = int(os.environ.get('ASSETS_CACHE_MAX_FILE_SIZE', 256 * 1024))
+    ASSETS_CACHE_SIZE = int(os.environ.get('ASSETS_CACHE_SIZE', 16 * 1024 * 1024))
+
+    # Prometheus metrics at /api/v1/admin/metrics; set PROMETHEUS_MULTIPROC_DIR to
+    # aggregate samples across gunicorn workers
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+
+    # On-demand request profiling for admins (X-Profile header or ?profile=1)
+    PROFILE_ENABLED = os.environ.get('PROFILE_ENABLED', 'true').lower() == 'true'
+    PROFILE_MODE = os.environ.get('PROFILE_MODE', 'cprofile')  # or 'sampling'
+    PROFILE_DIR = os.environ.get('PROFILE_DIR')  # default: profiles in the instance folder
+    PROFILE_RATE_LIMIT = os.environ.get('PROFILE_RATE_LIMIT', '10/hour')
+    PROFILE_SAMPLE_INTERVAL = float(os.environ.get('PROFILE_SAMPLE_INTERVAL', 0.005))
+    PROFILE_MAX_FILES = int(os.environ.get('PROFILE_MAX_FILES', 200))
+
+    # Rate limiting. Counters are shared by all workers on the host through a SQLite
+    # file in the instance folder by default; use RATELIMIT_STORAGE_URI=redis://... to
+    # share them across hosts
+    RATELIMIT_ENABLED = os.environ.get('RATELIMIT_ENABLED', 'true').lower() == 'true'
     RATELIMIT_DEFAULT = "100/hour"
-    RATELIMIT_STORAGE_URL = "memory://"
+    RATELIMIT_STORAGE_URI = os.environ.get('RATELIMIT_STORAGE_URI')
+    RATELIMIT_STRATEGY = os.environ.get('RATELIMIT_STRATEGY', 'sliding-window-counter')
+    # Seconds between batched counter writes for the SQLite storage (0 writes every hit)
+    RATELIMIT_FLUSH_INTERVAL = float(os.environ.get('RATELIMIT_FLUSH_INTERVAL', 0))
+    
+    # GitHub settings
+    GITHUB_API_URL = os.environ.get('GITHUB_API_URL', 'https://api.github.com')
+    # Concurrent GitHub/Ollama requests per analysis on the async endpoints
+    GITHUB_CONCURRENCY = int(os.environ.get('GITHUB_CONCURRENCY', 8))
+    GITHUB_TIMEOUT = float(os.environ.get('GITHUB_TIMEOUT', 15))
+    # Repositories per page of /github/repositories when per_page is not given (GitHub allows 100)
+    GITHUB_REPOS_PER_PAGE = int(os.environ.get('GITHUB_REPOS_PER_PAGE', 30))
+    # Tokens used in turn (comma-separated; defaults to GITHUB_TOKEN). Each is paced to
+    # GITHUB_TOKEN_RATE requests/second in bursts of GITHUB_TOKEN_BURST per worker, and
+    # requests wait up to GITHUB_QUEUE_TIMEOUT seconds for a token that is not rate limited
+    GITHUB_TOKENS = [token.strip() for token in
+                     os.environ.get('GITHUB_TOKENS', os.environ.get('GITHUB_TOKEN', '')).split(',')
+                     if token.strip()]
+    GITHUB_TOKEN_RATE = float(os.environ.get('GITHUB_TOKEN_RATE', 10))
+    GITHUB_TOKEN_BURST = int(os.environ.get('GITHUB_TOKEN_BURST', 50))
+    GITHUB_QUEUE_TIMEOUT = float(os.environ.get('GITHUB_QUEUE_TIMEOUT', 30))
+    # Signed webhooks (issues, issue_comment) at /api/v1/github/webhook keep stored
+    # prioritizations current; stored results are rebuilt from a full listing once
+    # they are GITHUB_RESYNC_INTERVAL seconds old. Unset secret: no webhook, no storing
+    GITHUB_WEBHOOK_SECRET = os.environ.get('GITHUB_WEBHOOK_SECRET')
+    GITHUB_RESYNC_INTERVAL = int(os.environ.get('GITHUB_RESYNC_INTERVAL', 86400))
     
     # Ollama settings
     OLLAMA_API_URL = os.environ.get('OLLAMA_API_URL', 'http://localhost:11434')
@@ -51,16 +144,14 @@ class TestConfig(BaseConfig):
     
     # Disable rate limiting for tests
     RATELIMIT_ENABLED = False
+    RATELIMIT_STORAGE_URI = "memory://"
+    RATELIMIT_STORAGE_OPTIONS = {}
     
-    # Test-specific database settings
-    SQLALCHEMY_ENGINE_OPTIONS = {
-        "pool_pre_ping": True,
-        "pool_size": 5,
-        "max_overflow": 0,
+    # Test-specific database settings on top of the pool profile (sqlite for SQLite URLs)
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI, BaseConfig.DATABASE_POOL_PROFILE, {
         "pool_timeout": 30,
-        "echo": True,
-        "isolation_level": "READ COMMITTED"
-    }
+        "echo": True
+    })
     
     # Preserve SQLAlchemy sessions for testing
     PRESERVE_CONTEXT_ON_EXCEPTION = False
@@ -0,0 +1,24 @@
+import hashlib
+from flask import Response, request
+from core.config import Config
+
+# Revalidate on every use; private because responses depend on the caller's token
+CACHE_CONTROL = 'private, no-cache'
+
+def make_etag(*parts):
+    """Strong ETag value from row identities and versions (quotes added by the headers)"""
+    raw = ':'.join(str(part) for part in (Config.API_VERSION, *parts))
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+def is_not_modified(etag):
+    return request.if_none_match.contains_weak(etag)
+
+def not_modified(etag):
+    """Empty 304 response for a matching If-None-Match"""
+    response = Response(status=304)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = CACHE_CONTROL
+    return response
+
+def cache_headers(etag):
+    return {'ETag': f'"{etag}"', 'Cache-Control': CACHE_CONTROL}
@@ -0,0 +1,85 @@
+import time
+from flask import current_app, g, has_app_context, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+class RequestStats:
+    """SQL statements and database time spent while handling one request"""
+
+    __slots__ = ('count', 'duration')
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def server_timing(self):
+        return f'db;dur={self.duration * 1000:.2f};desc="{self.count} queries"'
+
+class QueryInstrumentation:
+    """
+    Counts SQL statements and database time per request.
+
+    Listens on every SQLAlchemy engine, so bind and replica engines are
+    included. Statements slower than ``SQL_SLOW_QUERY_MS`` are logged with
+    the endpoint that issued them, and ``SQL_SERVER_TIMING`` adds a
+    ``Server-Timing: db;dur=...`` header to every response.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['query_instrumentation'] = self
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+
+        if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+            event.listen(Engine, 'handle_error', _handle_error)
+
+    def _start_request(self):
+        g.sql_stats = RequestStats()
+
+    def _finish_request(self, response):
+        stats = g.get('sql_stats')
+        if stats is None:
+            return response
+        current_app.logger.debug('%s ran %d queries in %.1f ms',
+                                 request.endpoint, stats.count, stats.duration * 1000)
+        if current_app.config.get('SQL_SERVER_TIMING'):
+            response.headers.add('Server-Timing', stats.server_timing())
+        return response
+
+def request_stats():
+    """Stats for the current request, or None outside of one"""
+    return g.get('sql_stats') if has_app_context() else None
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_start_time'].pop()
+    if not has_app_context() or 'query_instrumentation' not in current_app.extensions:
+        return
+
+    stats = g.get('sql_stats')
+    if stats is not None:
+        stats.count += 1
+        stats.duration += elapsed
+
+    threshold = current_app.config.get('SQL_SLOW_QUERY_MS')
+    if threshold and elapsed * 1000 >= threshold:
+        endpoint = request.endpoint if has_request_context() else None
+        current_app.logger.warning('Slow query (%.1f ms) in %s: %s',
+                                   elapsed * 1000, endpoint or '<no request>', statement)
+
+def _handle_error(exception_context):
+    # The statement failed, so after_cursor_execute will not pop its start time
+    if exception_context.execution_context is not None and exception_context.connection is not None:
+        starts = exception_context.connection.info.get('query_start_time')
+        if starts:
+            starts.pop()
+
+query_instrumentation = QueryInstrumentation()
@@ -0,0 +1,132 @@
+import os
+import time
+from functools import lru_cache
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+from jwt.algorithms import OKPAlgorithm, RSAAlgorithm
+from jwt.exceptions import InvalidTokenError
+
+# Asymmetric algorithms supported by the key ring and the key types they sign with
+ALGORITHM_KEY_TYPES = {
+    'RS256': (rsa.RSAPrivateKey, rsa.RSAPublicKey),
+    'EdDSA': (ed25519.Ed25519PrivateKey, ed25519.Ed25519PublicKey),
+}
+
+@lru_cache(maxsize=64)
+def _load_pem(path, mtime):
+    """Parse a PEM key file once per (path, mtime) and return the key object"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if b'PRIVATE KEY' in data:
+        return serialization.load_pem_private_key(data, password=None)
+    return serialization.load_pem_public_key(data)
+
+class KeyRing:
+    """
+    Signing keys for asymmetric JWTs, loaded from a directory of PEM files.
+
+    Every ``<kid>.pem`` file in ``JWT_KEYS_DIR`` is a key; the file name is
+    used as the ``kid`` header. Private keys can sign and verify, public-only
+    keys (retired signing keys) are kept for verification until removed.
+    The active signing key is ``JWT_ACTIVE_KID`` or, if unset, the most
+    recently modified private key.
+    """
+
+    def __init__(self, keys_dir=None, algorithm='HS256', active_kid=None, refresh_interval=30):
+        self.keys_dir = keys_dir
+        self.algorithm = algorithm
+        self.active_kid = active_kid
+        self.refresh_interval = refresh_interval
+        self._signing = None
+        self._verification_keys = {}
+        self._jwks = None
+        self._loaded_at = 0.0
+
+    def init_app(self, app):
+        self.algorithm = app.config.get('JWT_ALGORITHM', 'HS256')
+        self.keys_dir = app.config.get('JWT_KEYS_DIR')
+        self.active_kid = app.config.get('JWT_ACTIVE_KID')
+        if self.enabled:
+            self.load()
+        elif self.algorithm in ALGORITHM_KEY_TYPES and not app.config.get('JWT_PRIVATE_KEY'):
+            raise RuntimeError(
+                f'JWT_KEYS_DIR or JWT_PRIVATE_KEY must be set to use algorithm "{self.algorithm}"'
+            )
+
+    @property
+    def enabled(self):
+        return self.algorithm in ALGORITHM_KEY_TYPES and bool(self.keys_dir)
+
+    def load(self):
+        """(Re)scan the key directory; unchanged files come from the parsed-key cache"""
+        private_type, public_type = ALGORITHM_KEY_TYPES[self.algorithm]
+        signing_candidates = []
+        verification_keys = {}
+
+        for filename in sorted(os.listdir(self.keys_dir)):
+            if not filename.endswith('.pem'):
+                continue
+            kid = filename[:-len('.pem')]
+            path = os.path.join(self.keys_dir, filename)
+            mtime = os.stat(path).st_mtime
+            key = _load_pem(path, mtime)
+
+            if isinstance(key, private_type):
+                signing_candidates.append((mtime, kid, key))
+                verification_keys[kid] = key.public_key()
+            elif isinstance(key, public_type):
+                verification_keys[kid] = key
+            else:
+                raise RuntimeError(f'Key "{kid}" cannot be used with algorithm "{self.algorithm}"')
+
+        if self.active_kid:
+            signing = next(
+                ((kid, key) for _, kid, key in signing_candidates if kid == self.active_kid),
+                None
+            )
+            if signing is None:
+                raise RuntimeError(f'Active signing key "{self.active_kid}" not found in {self.keys_dir}')
+        elif signing_candidates:
+            _, kid, key = max(signing_candidates, key=lambda candidate: candidate[0])
+            signing = (kid, key)
+        else:
+            raise RuntimeError(f'No private signing key found in {self.keys_dir}')
+
+        self._signing = signing
+        self._verification_keys = verification_keys
+        self._jwks = None
+        self._loaded_at = time.monotonic()
+
+    def _maybe_refresh(self):
+        if time.monotonic() - self._loaded_at >= self.refresh_interval:
+            self.load()
+
+    def signing_key(self):
+        """Return ``(kid, private_key)`` for the active signing key"""
+        self._maybe_refresh()
+        return self._signing
+
+    def verification_key(self, kid):
+        """Return the public key for ``kid``, picking up newly rotated keys on refresh"""
+        key = self._verification_keys.get(kid)
+        if key is None:
+            self._maybe_refresh()
+            key = self._verification_keys.get(kid)
+        if key is None:
+            raise InvalidTokenError('Unknown signing key')
+        return key
+
+    def jwks(self):
+        """Return the JSON Web Key Set with every verification key"""
+        if not self.enabled:
+            return {'keys': []}
+        self._maybe_refresh()
+        if self._jwks is None:
+            to_jwk = RSAAlgorithm.to_jwk if self.algorithm == 'RS256' else OKPAlgorithm.to_jwk
+            keys = []
+            for kid, key in self._verification_keys.items():
+                jwk = to_jwk(key, as_dict=True)
+                jwk.update({'kid': kid, 'alg': self.algorithm, 'use': 'sig'})
+                keys.append(jwk)
+            self._jwks = {'keys': keys}
+        return self._jwks
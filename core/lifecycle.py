@@ -0,0 +1,54 @@
+import gc
+import os
+import sys
+from core.database import db
+from core.openapi import openapi_spec
+from core.profiling import request_profiler
+from core.replicas import replica_router
+
+def prepare_for_fork(app):
+    """
+    Call in the master once the app is loaded, before workers are forked
+
+    Builds the OpenAPI spec once for all workers, then moves every object
+    allocated so far into the permanent GC generation, so collections in
+    the workers don't write to (and un-share) those copy-on-write pages.
+    """
+    try:
+        openapi_spec.generate(app)
+    except RuntimeError as e:
+        app.logger.error('Unable to render the OpenAPI spec: %s', e)
+    gc.collect()
+    gc.freeze()
+
+def reset_after_fork(app):
+    """
+    Drop per-process state a worker inherited from the preloading master
+
+    Pooled database connections must not be shared between processes, so
+    every engine gets a fresh pool (``close=False`` leaves the parent's
+    sockets alone). Locks, replica health, cached GitHub responses, GitHub
+    token state and queued webhook updates start empty too.
+    """
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+    replica_router.after_fork()
+    request_profiler.after_fork()
+
+    # Only loaded once a GitHub endpoint was used; nothing to reset otherwise
+    github = sys.modules.get('services.github')
+    if github is not None:
+        github.GitHubService.clear_caches()
+    github_tokens = sys.modules.get('services.github_tokens')
+    if github_tokens is not None:
+        github_tokens.reset_token_pool()
+    github_webhooks = sys.modules.get('services.github_webhooks')
+    if github_webhooks is not None:
+        github_webhooks.issue_updates.after_fork()
+
+def worker_exited(pid):
+    """Let Prometheus drop live gauges of a worker that exited"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,138 @@
+import inspect
+import os
+import time
+from functools import wraps
+from flask import g, request
+from prometheus_client import (CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge,
+                               Histogram, REGISTRY, generate_latest, multiprocess)
+
+# Seconds; API requests are mostly fast, GitHub analysis and Ollama calls are not
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+EXTERNAL_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+REQUESTS = Counter('hive_http_requests_total', 'HTTP requests handled',
+                   ['method', 'route', 'status'])
+REQUEST_LATENCY = Histogram('hive_http_request_duration_seconds', 'Time to produce a response',
+                            ['method', 'route', 'status'], buckets=REQUEST_BUCKETS)
+IN_FLIGHT = Gauge('hive_http_requests_in_flight', 'Requests being handled',
+                  ['method', 'route'], multiprocess_mode='livesum')
+# outcome is ok, empty (the service returned None after handling a failure) or error
+EXTERNAL_CALLS = Counter('hive_external_calls_total', 'Calls to GitHub and Ollama',
+                         ['service', 'operation', 'outcome'])
+EXTERNAL_LATENCY = Histogram('hive_external_call_duration_seconds', 'Duration of calls to GitHub and Ollama',
+                             ['service', 'operation'], buckets=EXTERNAL_BUCKETS)
+CACHE_REQUESTS = Counter('hive_cache_requests_total', 'Cache lookups by result',
+                         ['cache', 'result'])
+# token is the position in GITHUB_TOKENS, never the token itself
+GITHUB_TOKEN_WAIT = Histogram('hive_github_token_wait_seconds', 'Time GitHub requests waited for a token',
+                              buckets=(0.001,) + EXTERNAL_BUCKETS)
+GITHUB_RATE_LIMITED = Counter('hive_github_rate_limited_total', 'GitHub responses rejected by a rate limit',
+                              ['token'])
+# outcome is queued, ignored (an event that cannot change a prioritization) or rejected (bad signature)
+GITHUB_WEBHOOKS = Counter('hive_github_webhooks_total', 'GitHub webhook deliveries', ['event', 'outcome'])
+
+class Metrics:
+    """
+    Prometheus request metrics per route and status.
+
+    The route label is the URL rule (``/api/v1/github/repository/<owner>/<repo_name>``),
+    so it stays bounded no matter which URLs clients send. With
+    ``PROMETHEUS_MULTIPROC_DIR`` set, every gunicorn worker writes its samples
+    there and an exposition covers all of them.
+    """
+
+    def init_app(self, app):
+        app.extensions['metrics'] = self
+        if not app.config.get('METRICS_ENABLED', True):
+            return
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        app.teardown_request(self._teardown_request)
+
+    def _labels(self):
+        rule = request.url_rule
+        return request.method, rule.rule if rule is not None else '<unmatched>'
+
+    def _start_request(self):
+        g.metrics_start = time.perf_counter()
+        g.metrics_labels = self._labels()
+        IN_FLIGHT.labels(*g.metrics_labels).inc()
+
+    def _record(self, labels, status):
+        start = g.pop('metrics_start', None)
+        if start is None:
+            return
+        method, route = labels
+        REQUESTS.labels(method, route, status).inc()
+        REQUEST_LATENCY.labels(method, route, status).observe(time.perf_counter() - start)
+
+    def _finish_request(self, response):
+        if 'metrics_labels' in g:
+            self._record(g.metrics_labels, str(response.status_code))
+        return response
+
+    def _teardown_request(self, exception):
+        labels = g.pop('metrics_labels', None)
+        if labels is None:
+            return
+        # after_request is skipped when the response could not be produced
+        self._record(labels, '500')
+        IN_FLIGHT.labels(*labels).dec()
+
+    def exposition(self):
+        """Text exposition of every metric, across worker processes when configured"""
+        if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = REGISTRY
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+
+def external_call(service, operation):
+    """Count and time a call to an external service; exceptions count as errors"""
+    def observe(start, outcome):
+        EXTERNAL_CALLS.labels(service, operation, outcome).inc()
+        EXTERNAL_LATENCY.labels(service, operation).observe(time.perf_counter() - start)
+
+    def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+            @wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                outcome = 'error'
+                try:
+                    result = await fn(*args, **kwargs)
+                    outcome = 'ok' if result is not None else 'empty'
+                    return result
+                finally:
+                    observe(start, outcome)
+            return async_wrapper
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            outcome = 'error'
+            try:
+                result = fn(*args, **kwargs)
+                outcome = 'ok' if result is not None else 'empty'
+                return result
+            finally:
+                observe(start, outcome)
+        return wrapper
+    return decorator
+
+def cache_metrics(name):
+    """Count hits and misses of an ``lru_cache`` wrapped function"""
+    def decorator(cached):
+        @wraps(cached)
+        def wrapper(*args, **kwargs):
+            misses = cached.cache_info().misses
+            result = cached(*args, **kwargs)
+            CACHE_REQUESTS.labels(name, 'miss' if cached.cache_info().misses > misses else 'hit').inc()
+            return result
+        wrapper.cache_info = cached.cache_info
+        wrapper.cache_clear = cached.cache_clear
+        return wrapper
+    return decorator
+
+metrics = Metrics()
@@ -0,0 +1,71 @@
+import hashlib
+import threading
+from flask import Response, current_app, request
+from core.assets import available_encodings, compress
+from core.serialization import dumps
+
+CACHE_CONTROL = 'public, no-cache'
+
+class OpenAPISpec:
+    """
+    swagger.json encoded once per process and served from memory.
+
+    flask-restx keeps the schema dict after the first request but encodes
+    (and compresses) it again on every one. Here the JSON bytes and their
+    gzip/brotli variants are built once, with a strong ETag, so polling
+    clients get the stored bytes or a 304.
+    """
+
+    def __init__(self):
+        self._api = None
+        self._etag = None
+        self._variants = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app, api):
+        self._api = api
+        self._etag = self._variants = None
+        # Replaces flask-restx's SwaggerView behind the same URL and endpoint
+        app.view_functions[api.endpoint('specs')] = self._serve
+
+    def generate(self, app=None):
+        """
+        The spec as JSON bytes, built on first use. Pass ``app`` outside a
+        request (CLI, gunicorn master) so URLs in the spec can be built.
+        """
+        if self._variants is None:
+            if app is not None:
+                with app.test_request_context():
+                    return self.generate()
+            with self._lock:
+                if self._variants is None:
+                    schema = self._api.__schema__
+                    if 'error' in schema:
+                        raise RuntimeError(schema['error'])
+                    data = dumps(schema)
+                    variants = {None: data}
+                    for encoding in available_encodings():
+                        compressed = compress(encoding, data)
+                        if len(compressed) < len(data):
+                            variants[encoding] = compressed
+                    self._etag = hashlib.sha256(data).hexdigest()[:16]
+                    self._variants = variants
+        return self._variants[None]
+
+    def _serve(self):
+        try:
+            self.generate()
+        except RuntimeError as e:
+            current_app.logger.error('Unable to render the OpenAPI spec: %s', e)
+            return Response(dumps({'error': str(e)}), 500, mimetype='application/json')
+
+        encoding = request.accept_encodings.best_match([name for name in self._variants if name])
+        response = Response(self._variants[encoding], mimetype='application/json')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.set_etag(f'{self._etag}-{encoding}' if encoding else self._etag)
+        response.vary.add('Accept-Encoding')
+        response.headers['Cache-Control'] = CACHE_CONTROL
+        return response.make_conditional(request)
+
+openapi_spec = OpenAPISpec()
@@ -0,0 +1,64 @@
+import base64
+import json
+from urllib.parse import urlencode
+from flask import request
+
+INT64_MIN, INT64_MAX = -2 ** 63, 2 ** 63 - 1
+
+def encode_cursor(position):
+    """Encode a keyset position as an opaque URL-safe token"""
+    raw = json.dumps(position, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode()
+
+def decode_cursor(token):
+    """Decode a cursor token; raises ValueError if it was not issued by encode_cursor"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise ValueError('Invalid cursor')
+    if not isinstance(position, dict) or 'k' not in position:
+        raise ValueError('Invalid cursor')
+    return position
+
+def keyset_page(session, query, key_column, limit, cursor=None):
+    """
+    Fetch one page of ``query`` ordered by a unique, indexed ``key_column``
+
+    Args:
+        session: SQLAlchemy session to execute with
+        query: Select statement with filters applied
+        key_column: Column to order and seek on (e.g. ``User.id``)
+        limit: Page size
+        cursor: Token from a previous page's ``next_cursor``
+
+    Returns:
+        Tuple of (rows, next_cursor); next_cursor is None on the last page
+    """
+    if cursor:
+        try:
+            after = key_column.type.python_type(decode_cursor(cursor)['k'])
+        except (TypeError, ValueError, OverflowError):
+            raise ValueError('Invalid cursor')
+        # Drivers refuse integers wider than a 64-bit column
+        if isinstance(after, int) and not INT64_MIN <= after <= INT64_MAX:
+            raise ValueError('Invalid cursor')
+        query = query.where(key_column > after)
+
+    rows = session.scalars(query.order_by(key_column).limit(limit + 1)).all()
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    return rows, encode_cursor({'k': getattr(rows[-1], key_column.key)})
+
+def pagination_headers(next_cursor):
+    """Headers pointing at the next page, keeping the current query arguments"""
+    if not next_cursor:
+        return {}
+    args = request.args.to_dict()
+    args['cursor'] = next_cursor
+    return {
+        'X-Next-Cursor': next_cursor,
+        'Link': f'<{request.base_url}?{urlencode(args)}>; rel="next"'
+    }
@@ -0,0 +1,182 @@
+import os
+import threading
+import time
+import weakref
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool, StaticPool
+
+class PoolStats:
+    """Counters for one engine's connection pool, kept across pool recreation"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.pre_ping_failures = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_wait(self, seconds):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def as_dict(self):
+        return {
+            'checkouts': self.checkouts,
+            'connects': self.connects,
+            'invalidations': self.invalidations,
+            'pre_ping_failures': self.pre_ping_failures,
+            'timeouts': self.timeouts,
+            'wait_ms_total': round(self.wait_total * 1000, 3),
+            'wait_ms_avg': round(self.wait_total * 1000 / self.checkouts, 3) if self.checkouts else 0.0,
+            'wait_ms_max': round(self.wait_max * 1000, 3),
+        }
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool timing each checkout, including waiting, connecting and pre-ping"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.stats.timeouts += 1
+            raise
+        finally:
+            self.stats.record_wait(time.perf_counter() - start)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+# Engine options per deployment shape; DATABASE_POOL_PROFILE picks one
+POOL_PROFILES = {
+    # Long-lived connections straight to Postgres. No pre-ping round trip per
+    # checkout: connections are recycled before typical idle timeouts and
+    # disconnects found mid-request invalidate the whole pool.
+    'direct': {
+        'poolclass': InstrumentedQueuePool,
+        'pool_size': 5,
+        'max_overflow': 10,
+        'pool_timeout': 10,
+        'pool_recycle': 1800,
+        'pool_pre_ping': False,
+        'pool_use_lifo': True,
+    },
+    # PgBouncer in transaction mode owns the server connections; keep a small
+    # local pool of cheap client connections and never hold them across requests.
+    'pgbouncer': {
+        'poolclass': InstrumentedQueuePool,
+        'pool_size': 2,
+        'max_overflow': 8,
+        'pool_timeout': 5,
+        'pool_recycle': 300,
+        'pool_pre_ping': False,
+    },
+    # Local/test SQLite database files
+    'sqlite': {
+        'poolclass': InstrumentedQueuePool,
+        'pool_size': 5,
+        'max_overflow': 0,
+        'pool_timeout': 30,
+        'connect_args': {'check_same_thread': False},
+    },
+}
+
+def pool_profile_name(database_uri, profile=None):
+    """Configured profile, or 'sqlite'/'direct' depending on the database URL"""
+    if profile:
+        return profile
+    return 'sqlite' if (database_uri or '').startswith('sqlite') else 'direct'
+
+def engine_options(database_uri, profile=None, overrides=None):
+    """
+    Build SQLALCHEMY_ENGINE_OPTIONS from a named pool profile
+
+    Args:
+        database_uri: Primary database URL, used to pick a default profile
+        profile: Name from POOL_PROFILES, or None to choose by URL
+        overrides: Explicit engine options applied on top of the profile
+
+    Returns:
+        Dict of keyword arguments for ``create_engine``
+    """
+    name = pool_profile_name(database_uri, profile)
+    if name not in POOL_PROFILES:
+        raise ValueError(f'Unknown DATABASE_POOL_PROFILE "{name}"; '
+                         f'expected one of {", ".join(POOL_PROFILES)}')
+
+    options = {key: (dict(value) if isinstance(value, dict) else value)
+               for key, value in POOL_PROFILES[name].items()}
+    if (database_uri or '').rstrip('/') in ('sqlite:', 'sqlite:///:memory:'):
+        # In-memory SQLite lives in a single connection
+        options = {'poolclass': StaticPool, 'connect_args': {'check_same_thread': False}}
+    options.update(overrides or {})
+    return options
+
+class PoolMonitor:
+    """Tracks pool statistics for the primary and replica engines of an app"""
+
+    def __init__(self):
+        self.engines = {}
+        self._stats = weakref.WeakKeyDictionary()
+
+    def init_app(self, app, engines):
+        self.engines = dict(engines)
+        for engine in self.engines.values():
+            self.watch(engine)
+        app.extensions['pool_monitor'] = self
+
+    def watch(self, engine):
+        if engine in self._stats:
+            return
+        # InstrumentedQueuePool keeps its own stats (with wait times) across recreation
+        stats = getattr(engine.pool, 'stats', None) or PoolStats()
+        self._stats[engine] = stats
+
+        @event.listens_for(engine, 'handle_error')
+        def count_pre_ping_failure(context):
+            if context.is_pre_ping:
+                stats.pre_ping_failures += 1
+
+        @event.listens_for(engine, 'connect')
+        def count_connect(dbapi_connection, connection_record):
+            stats.connects += 1
+
+        @event.listens_for(engine, 'invalidate')
+        def count_invalidation(dbapi_connection, connection_record, exception):
+            stats.invalidations += 1
+
+        if not isinstance(engine.pool, InstrumentedQueuePool):
+            @event.listens_for(engine, 'checkout')
+            def count_checkout(dbapi_connection, connection_record, connection_proxy):
+                stats.record_wait(0.0)
+
+    def snapshot(self):
+        """Current pool state and counters per engine, for this worker process"""
+        pools = {}
+        for name, engine in self.engines.items():
+            pool = engine.pool
+            state = {'pool_class': type(pool).__name__, 'status': pool.status()}
+            if isinstance(pool, QueuePool):
+                state.update({
+                    'size': pool.size(),
+                    'checked_out': pool.checkedout(),
+                    'checked_in': pool.checkedin(),
+                    'overflow': max(pool.overflow(), 0),
+                    'timeout': pool.timeout(),
+                })
+            state.update(self._stats[engine].as_dict())
+            pools[name] = state
+        return {'pid': os.getpid(), 'pools': pools}
+
+pool_monitor = PoolMonitor()
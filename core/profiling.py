@@ -0,0 +1,277 @@
+import cProfile
+import functools
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from flask import current_app, g, request, url_for
+from flask_jwt_extended import verify_jwt_in_request
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import STRATEGIES
+from core.rbac import has_role
+
+PROFILE_HEADER = 'X-Profile'
+MODES = ('cprofile', 'sampling')
+EXTENSIONS = {'cprofile': '.pstats', 'sampling': '.collapsed'}
+
+_REQUEST_ID = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+# From Python 3.12 cProfile hooks sys.monitoring, which covers every thread and
+# admits one profiler at a time; before that it profiles the enabling thread only
+PROFILER_COVERS_THREADS = sys.version_info >= (3, 12)
+
+class RequestProfiler:
+    """
+    Profiles single requests on demand.
+
+    An admin asks for a profile with an ``X-Profile`` header or ``profile``
+    query parameter, whose value may name the mode: ``cprofile`` (deterministic,
+    saved as pstats) or ``sampling`` (stack samples, saved as collapsed stacks
+    for flame graphs). The artifact is stored under ``PROFILE_DIR`` by request
+    id and linked from the response. ``PROFILE_RATE_LIMIT`` caps how often
+    profiles are taken across workers, and only one runs per worker at a time.
+    Async views run on an event loop thread of their own, which is profiled
+    along with the request thread.
+    """
+
+    def __init__(self):
+        self._busy = threading.Lock()
+        self._rate_limiter = None
+
+    def init_app(self, app):
+        app.extensions['request_profiler'] = self
+        # Out of the shared temp dir: profiles reveal code paths and timings to whoever reads them
+        if not app.config.get('PROFILE_DIR'):
+            app.config['PROFILE_DIR'] = os.path.join(app.instance_path, 'profiles')
+        if not app.config.get('PROFILE_ENABLED'):
+            return
+        # Same storage as the API rate limits, so the cap holds across workers
+        storage = storage_from_string(app.config.get('RATELIMIT_STORAGE_URI', 'memory://'),
+                                      **app.config.get('RATELIMIT_STORAGE_OPTIONS', {}))
+        self._rate_limiter = STRATEGIES[app.config.get('RATELIMIT_STRATEGY', 'fixed-window')](storage)
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.teardown_request(self._teardown)
+        async_to_sync = app.async_to_sync
+        app.async_to_sync = lambda func: async_to_sync(self._profiled(func))
+
+    def after_fork(self):
+        self._busy = threading.Lock()
+
+    def _requested_mode(self):
+        value = request.headers.get(PROFILE_HEADER) or request.args.get('profile')
+        if not value or value.lower() in ('0', 'false', 'off'):
+            return None
+        value = value.lower()
+        return value if value in MODES else current_app.config['PROFILE_MODE']
+
+    def _allowed(self):
+        item = parse(current_app.config['PROFILE_RATE_LIMIT'])
+        return self._rate_limiter.hit(item, 'request-profiler')
+
+    def _is_admin(self):
+        try:
+            verify_jwt_in_request(optional=True)
+        except Exception:
+            return False
+        return has_role('admin')
+
+    def _start(self):
+        mode = self._requested_mode()
+        if mode is None or not self._is_admin():
+            return
+        if not self._allowed():
+            g.profile_skipped = 'rate limited'
+            return
+        if not self._busy.acquire(blocking=False):
+            g.profile_skipped = 'busy'
+            return
+
+        profiler = _Profile() if mode == 'cprofile' else _Sampler(
+            current_app.config['PROFILE_SAMPLE_INTERVAL'])
+        g.profile = (mode, profiler, time.perf_counter())
+        try:
+            profiler.enable()
+        except BaseException:
+            g.pop('profile')
+            self._busy.release()
+            raise
+
+    def _profiled(self, func):
+        # Runs on the thread asgiref starts an event loop in, where the request's g is visible
+        @functools.wraps(func)
+        async def profiled(*args, **kwargs):
+            profile = g.get('profile')
+            if profile is None:
+                return await func(*args, **kwargs)
+            with profile[1].thread():
+                return await func(*args, **kwargs)
+        return profiled
+
+    def _stop(self):
+        profile = g.pop('profile', None)
+        if profile is None:
+            return None
+        mode, profiler, start = profile
+        try:
+            profiler.disable()
+        finally:
+            self._busy.release()
+        return mode, profiler, time.perf_counter() - start
+
+    def _finish(self, response):
+        stopped = self._stop()
+        if stopped is None:
+            if 'profile_skipped' in g:
+                response.headers[PROFILE_HEADER] = f'skipped; reason="{g.pop("profile_skipped")}"'
+            return response
+
+        mode, profiler, elapsed = stopped
+        request_id = request_id_for(request)
+        path = self.save(request_id, mode, profiler)
+        current_app.logger.info('Profiled %s %s (%.1f ms) to %s', request.method, request.path,
+                                elapsed * 1000, path)
+        response.headers['X-Request-ID'] = request_id
+        response.headers[PROFILE_HEADER] = f'{mode}; dur={elapsed * 1000:.1f}'
+        response.headers.add('Link', f'<{url_for("admin_profile", request_id=request_id)}>; rel="profile"')
+        return response
+
+    def _teardown(self, exception):
+        # after_request is skipped when the response could not be produced
+        self._stop()
+
+    def save(self, request_id, mode, profiler):
+        directory = current_app.config['PROFILE_DIR']
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        path = os.path.join(directory, request_id + EXTENSIONS[mode])
+        profiler.dump(path)
+        self._prune(directory, current_app.config['PROFILE_MAX_FILES'])
+        return path
+
+    def _prune(self, directory, keep):
+        for artifact in self.artifacts(directory)[keep:]:
+            try:
+                os.remove(os.path.join(directory, artifact['file']))
+            except FileNotFoundError:
+                pass
+
+    def artifacts(self, directory=None):
+        """Stored profiles, newest first"""
+        directory = directory or current_app.config['PROFILE_DIR']
+        if not os.path.isdir(directory):
+            return []
+        found = []
+        for entry in os.scandir(directory):
+            request_id, extension = os.path.splitext(entry.name)
+            if extension not in EXTENSIONS.values():
+                continue
+            stat = entry.stat()
+            found.append({
+                'request_id': request_id,
+                'file': entry.name,
+                'format': 'pstats' if extension == '.pstats' else 'collapsed',
+                'size': stat.st_size,
+                'created_at': stat.st_mtime,
+            })
+        return sorted(found, key=lambda artifact: artifact['created_at'], reverse=True)
+
+    def find(self, request_id):
+        """Path of the profile stored for ``request_id``, or None"""
+        if not _REQUEST_ID.match(request_id):
+            return None
+        for extension in EXTENSIONS.values():
+            path = os.path.join(current_app.config['PROFILE_DIR'], request_id + extension)
+            if os.path.exists(path):
+                return path
+        return None
+
+def request_id_for(req):
+    """The client's X-Request-ID when it is safe to use as a file name, else a new id"""
+    request_id = req.headers.get('X-Request-ID', '')
+    if _REQUEST_ID.match(request_id) and request_id not in ('.', '..'):
+        return request_id
+    return uuid.uuid4().hex
+
+class _Profile:
+    """
+    cProfile of the calling thread, plus one per thread added with
+    ``thread()``, saved together; a single profiler when it covers every thread
+    """
+
+    def __init__(self):
+        self._profiles = [cProfile.Profile()]
+
+    def enable(self):
+        self._profiles[0].enable()
+
+    def disable(self):
+        self._profiles[0].disable()
+
+    @contextmanager
+    def thread(self):
+        if PROFILER_COVERS_THREADS:
+            # A second profiler would raise "Another profiling tool is already active"
+            yield
+            return
+        profile = cProfile.Profile()
+        self._profiles.append(profile)
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+
+    def dump(self, path):
+        pstats.Stats(*self._profiles).dump_stats(path)
+
+class _Sampler:
+    """Samples the stacks of the calling thread, and of threads added with ``thread()``, from a background thread"""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.stacks = Counter()
+        self._thread_ids = {threading.get_ident()}
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+
+    def enable(self):
+        self._thread.start()
+
+    def disable(self):
+        self._stopped.set()
+        self._thread.join()
+
+    @contextmanager
+    def thread(self):
+        thread_id = threading.get_ident()
+        self._thread_ids.add(thread_id)
+        try:
+            yield
+        finally:
+            self._thread_ids.discard(thread_id)
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            frames = sys._current_frames()
+            for thread_id in list(self._thread_ids):
+                frame = frames.get(thread_id)
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f'{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                    frame = frame.f_back
+                if stack:
+                    self.stacks[';'.join(reversed(stack))] += 1
+
+    def dump(self, path):
+        with open(path, 'w') as artifact:
+            for stack, count in self.stacks.most_common():
+                artifact.write(f'{stack} {count}\n')
+
+request_profiler = RequestProfiler()
@@ -0,0 +1,246 @@
+import atexit
+import os
+import sqlite3
+import threading
+import time
+import urllib.parse
+from contextlib import contextmanager
+from math import floor
+from limits.errors import ConfigurationError
+from limits.storage import Storage, SlidingWindowCounterSupport
+from limits.storage.base import TimestampedSlidingWindow
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ratelimit_counters (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL,
+    expires_at REAL NOT NULL
+) WITHOUT ROWID
+"""
+
+# Adds to a live counter, or starts a new one when the stored counter has expired
+_INCR = """
+INSERT INTO ratelimit_counters (key, value, expires_at) VALUES (:key, :amount, :expires_at)
+ON CONFLICT (key) DO UPDATE SET
+    value = CASE WHEN expires_at <= :now THEN excluded.value ELSE value + excluded.value END,
+    expires_at = CASE WHEN expires_at <= :now THEN excluded.expires_at ELSE expires_at END
+RETURNING value
+"""
+
+_GET = 'SELECT value, expires_at FROM ratelimit_counters WHERE key = ? AND expires_at > ?'
+
+# Expired counters are deleted by writers at most this often
+_PURGE_INTERVAL = 60
+
+class SQLiteStorage(Storage, SlidingWindowCounterSupport, TimestampedSlidingWindow):
+    """
+    Rate limit counters in a SQLite file shared by every worker on the host
+
+    Registered for ``sqlite:///relative/path.db`` and ``sqlite:////absolute/path.db``
+    storage URIs. The database runs in WAL mode, so reads never wait for the
+    writer and a hit costs one short write transaction.
+
+    With the ``flush_interval`` option (seconds), hits are counted in process
+    memory and written in a single transaction at most that often, and the
+    other workers' counts are re-read at the same rate. A worker can then admit
+    up to one interval's worth of hits that the others have not seen yet.
+    """
+
+    STORAGE_SCHEME = ['sqlite']
+
+    def __init__(self, uri, wrap_exceptions=False, flush_interval=0, busy_timeout=5, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self.path = urllib.parse.urlparse(uri).path[1:]
+        if not self.path:
+            raise ConfigurationError(f'No database file in rate limit storage uri {uri}')
+        self.flush_interval = float(flush_interval)
+        self.busy_timeout = float(busy_timeout)
+        self._local = threading.local()
+        self._next_purge = 0.0
+        self._pid = None
+        self._process_state()
+        if self.flush_interval:
+            atexit.register(self.flush)
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def _connection(self):
+        # One connection per thread, and never one inherited across a fork
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=self.busy_timeout,
+                                         isolation_level=None, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(_SCHEMA)
+            local.connection, local.pid = connection, os.getpid()
+        return local.connection
+
+    @contextmanager
+    def _transaction(self):
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield connection
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+
+    def _process_state(self):
+        """Buffered hits and cached counts belong to a single process"""
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._lock = threading.Lock()
+            self._pending = {}
+            self._cache = {}
+            self._next_flush = time.time() + self.flush_interval
+
+    def _incr(self, connection, key, expiry, amount, now):
+        value = connection.execute(_INCR, {
+            'key': key, 'amount': amount, 'expires_at': now + expiry, 'now': now,
+        }).fetchone()[0]
+        if now >= self._next_purge:
+            self._next_purge = now + _PURGE_INTERVAL
+            connection.execute('DELETE FROM ratelimit_counters WHERE expires_at <= ?', (now,))
+        return value
+
+    def _read(self, connection, key, now):
+        row = connection.execute(_GET, (key, now)).fetchone()
+        return row[0] if row else 0
+
+    def _buffered(self, key, now):
+        """Shared count (re-read once per flush interval) plus this process's unflushed hits"""
+        cached = self._cache.get(key)
+        if cached is None or now - cached[1] >= self.flush_interval:
+            cached = self._cache[key] = (self._read(self._connection(), key, now), now)
+        return cached[0] + self._pending.get(key, (0, 0))[0]
+
+    def _buffer(self, key, expiry, amount, now):
+        pending = self._pending.get(key)
+        self._pending[key] = (amount + (pending[0] if pending else 0), expiry)
+        if now >= self._next_flush:
+            self._flush(now)
+
+    def _flush(self, now):
+        self._next_flush = now + self.flush_interval
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        with self._transaction() as connection:
+            for key, (amount, expiry) in pending.items():
+                self._cache[key] = (self._incr(connection, key, expiry, amount, now), now)
+
+    def flush(self):
+        """Write the hits buffered by this process"""
+        if self.flush_interval:
+            self._process_state()
+            with self._lock:
+                self._flush(time.time())
+
+    def incr(self, key, expiry, amount=1):
+        now = time.time()
+        if not self.flush_interval:
+            with self._transaction() as connection:
+                return self._incr(connection, key, expiry, amount, now)
+        self._process_state()
+        with self._lock:
+            value = self._buffered(key, now) + amount
+            self._buffer(key, expiry, amount, now)
+        return value
+
+    def get(self, key):
+        now = time.time()
+        if not self.flush_interval:
+            return self._read(self._connection(), key, now)
+        self._process_state()
+        with self._lock:
+            return self._buffered(key, now)
+
+    def get_expiry(self, key):
+        now = time.time()
+        row = self._connection().execute(_GET, (key, now)).fetchone()
+        if row:
+            return row[1]
+        pending = self._pending.get(key) if self._pid == os.getpid() else None
+        return now + pending[1] if pending else now
+
+    def check(self):
+        try:
+            self._connection().execute('SELECT 1')
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self):
+        self._process_state()
+        with self._lock:
+            self._pending.clear()
+            self._cache.clear()
+        with self._transaction() as connection:
+            return connection.execute('DELETE FROM ratelimit_counters').rowcount
+
+    def clear(self, key):
+        self._process_state()
+        with self._lock:
+            self._pending.pop(key, None)
+            self._cache.pop(key, None)
+        with self._transaction() as connection:
+            connection.execute('DELETE FROM ratelimit_counters WHERE key = ?', (key,))
+
+    def _sliding_window(self, previous_count, current_count, expiry, now):
+        previous_ttl = (1 - (((now - expiry) / expiry) % 1)) * expiry if previous_count else 0.0
+        current_ttl = (1 - ((now / expiry) % 1)) * expiry + expiry
+        return previous_count, previous_ttl, current_count, current_ttl
+
+    def acquire_sliding_window_entry(self, key, limit, expiry, amount=1):
+        if amount > limit:
+            return False
+        now = time.time()
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+
+        if not self.flush_interval:
+            # Read and increment in one write transaction, so concurrent
+            # workers can never both take the last entry
+            with self._transaction() as connection:
+                previous, previous_ttl, current, _ = self._sliding_window(
+                    self._read(connection, previous_key, now),
+                    self._read(connection, current_key, now), expiry, now)
+                if floor(previous * previous_ttl / expiry + current) + amount > limit:
+                    return False
+                self._incr(connection, current_key, 2 * expiry, amount, now)
+                return True
+
+        self._process_state()
+        with self._lock:
+            previous, previous_ttl, current, _ = self._sliding_window(
+                self._buffered(previous_key, now), self._buffered(current_key, now), expiry, now)
+            if floor(previous * previous_ttl / expiry + current) + amount > limit:
+                return False
+            self._buffer(current_key, 2 * expiry, amount, now)
+            return True
+
+    def get_sliding_window(self, key, expiry):
+        now = time.time()
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        return self._sliding_window(self.get(previous_key), self.get(current_key), expiry, now)
+
+    def clear_sliding_window(self, key, expiry):
+        previous_key, current_key = self.sliding_window_keys(key, expiry, time.time())
+        self.clear(previous_key)
+        self.clear(current_key)
+
+def configure_storage(app):
+    """
+    Default the limiter storage to ``ratelimit.db`` in the instance folder,
+    which only the application's user writes to, and pass ``flush_interval``
+    to SQLite storages
+    """
+    if not app.config.get('RATELIMIT_STORAGE_URI'):
+        os.makedirs(app.instance_path, exist_ok=True)
+        app.config['RATELIMIT_STORAGE_URI'] = 'sqlite:///' + os.path.join(app.instance_path, 'ratelimit.db')
+    if app.config['RATELIMIT_STORAGE_URI'].startswith('sqlite'):
+        app.config.setdefault('RATELIMIT_STORAGE_OPTIONS',
+                              {'flush_interval': app.config.get('RATELIMIT_FLUSH_INTERVAL', 0)})
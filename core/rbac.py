@@ -1,20 +1,165 @@
+import hashlib
 from functools import wraps
-from flask import jsonify
-from flask_jwt_extended import get_current_user, verify_jwt_in_request
+from flask import current_app
+from sqlalchemy import event
+from flask_jwt_extended import get_current_user, get_jwt, verify_jwt_in_request
+from core.database import db
+from models.role import Role
+
+class RoleGeneration:
+    """The role masks of one load of the roles and hierarchy; never changes once built"""
+
+    def __init__(self, ids, bits, closure, version):
+        self.ids = ids
+        self.bits = bits
+        self.closure = closure
+        self.version = version
+        self._required = {}
+
+    def knows(self, role_ids=(), role_names=()):
+        """Whether every role id and name was loaded (or the name's mask already cached)"""
+        return (all(role_id in self.closure for role_id in role_ids) and
+                (role_names in self._required or all(name in self.ids for name in role_names)))
+
+    def granted(self, role_ids):
+        """Return the effective mask for a set of assigned role ids"""
+        mask = 0
+        for role_id in role_ids:
+            mask |= self.closure.get(role_id, 0)
+        return mask
+
+    def required(self, role_names):
+        """Return the mask matching any of ``role_names``, cached per name tuple"""
+        role_names = tuple(role_names)
+        mask = self._required.get(role_names)
+        if mask is None:
+            mask = 0
+            for name in role_names:
+                if name in self.bits:
+                    mask |= 1 << self.bits[name]
+            self._required[role_names] = mask
+        return mask
+
+class RoleRegistry:
+    """
+    Maps role names to bit positions and precomputes the role hierarchy.
+
+    Roles get dense bit positions in id order, so masks stay small however
+    high role ids grow. The closure mask of a role holds its own bit plus the
+    bits of every role it implies through ``ROLE_HIERARCHY``, so a permission
+    check is a single ``granted & required`` test. ``version`` fingerprints
+    the masks; it changes when roles or the hierarchy do, which makes masks
+    issued before the change unusable.
+
+    Each load builds a new ``RoleGeneration``; masks compared with each other
+    must come from the same one, as bit positions move between loads.
+    """
+
+    def __init__(self):
+        self._generation = None
+
+    def load(self):
+        hierarchy = current_app.config.get('ROLE_HIERARCHY', {})
+        ids = dict(db.session.execute(db.select(Role.name, Role.id).order_by(Role.id)).all())
+        bits = {name: index for index, name in enumerate(ids)}
+
+        closure = {}
+        def resolve(name, visiting=()):
+            if name in closure:
+                return closure[name]
+            mask = 1 << bits[name] if name in bits else 0
+            for implied in hierarchy.get(name, ()):
+                if implied not in visiting:
+                    mask |= resolve(implied, visiting + (name,))
+            closure[name] = mask
+            return mask
+
+        for name in ids:
+            resolve(name)
+
+        version = hashlib.sha256(repr(sorted(closure.items())).encode()).hexdigest()[:16]
+        self._generation = RoleGeneration(
+            ids, bits, {ids[name]: mask for name, mask in closure.items() if name in ids}, version)
+        return self._generation
+
+    def invalidate(self):
+        self._generation = None
+
+    def generation(self, role_ids=(), role_names=()):
+        """The current generation, loaded (once) if missing or unaware of any of the roles"""
+        generation = self._generation
+        if generation is None or not generation.knows(tuple(role_ids), tuple(role_names)):
+            generation = self.load()
+        return generation
+
+    @property
+    def version(self):
+        return self.generation().version
+
+    def masks(self, role_ids, role_names):
+        """``(granted, required, version)`` for assigned role ids and required names, from one generation"""
+        role_ids, role_names = tuple(role_ids), tuple(role_names)
+        generation = self.generation(role_ids, role_names)
+        return generation.granted(role_ids), generation.required(role_names), generation.version
+
+    def granted_mask(self, role_ids):
+        """Return the effective mask for a set of assigned role ids"""
+        role_ids = tuple(role_ids)
+        return self.generation(role_ids).granted(role_ids)
+
+    def required_mask(self, role_names):
+        """Return the mask matching any of ``role_names``"""
+        role_names = tuple(role_names)
+        return self.generation(role_names=role_names).required(role_names)
+
+role_registry = RoleRegistry()
+
+@event.listens_for(Role, 'after_insert')
+@event.listens_for(Role, 'after_update')
+@event.listens_for(Role, 'after_delete')
+def _invalidate_on_role_change(mapper, connection, target):
+    role_registry.invalidate()
+
+@event.listens_for(Role.__table__, 'after_create')
+@event.listens_for(Role.__table__, 'after_drop')
+def _invalidate_on_schema_change(target, connection, **kw):
+    role_registry.invalidate()
+
+def has_role(*role_names):
+    """Whether the request's JWT grants any of ``role_names``; False without a valid token"""
+    try:
+        try:
+            claims = get_jwt()
+        except RuntimeError:
+            # Not behind @jwt_required(); verify here (once per request)
+            verify_jwt_in_request()
+            claims = get_jwt()
+        granted = None
+        # A mask issued under other roles or another hierarchy has other bits
+        if current_app.config.get('RBAC_TOKEN_CLAIMS'):
+            generation = role_registry.generation(role_names=role_names)
+            if claims.get('role_version') == generation.version:
+                granted, required, version = (claims.get('role_mask'), generation.required(role_names),
+                                              generation.version)
+        if granted is None:
+            user = get_current_user()
+            if not (user and user.is_active):
+                return False
+            granted, required, version = user.role_masks(role_names)
+        # Roles changed while checking: the masks may not match the roles in place now
+        if role_registry.version != version:
+            return False
+    except Exception:
+        return False
+    return bool(granted & required)
 
 def role_required(*role_names):
     def wrapper(fn):
         @wraps(fn)
         def decorator(*args, **kwargs):
-            try:
-                verify_jwt_in_request()
-                user = get_current_user()
-                
-                if not user or not user.has_any_role(role_names):
-                    return jsonify({"msg": "Insufficient permissions"}), 403
-                return fn(*args, **kwargs)
-            except Exception:
-                return jsonify({"msg": "Insufficient permissions"}), 403
+            if not has_role(*role_names):
+                return {"msg": "Insufficient permissions"}, 403
+            return fn(*args, **kwargs)
         return decorator
     return wrapper
 
@@ -0,0 +1,203 @@
+import itertools
+import math
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from flask import current_app, g, has_app_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import DBAPIError
+
+REPLICA_BIND_PREFIX = 'replica_'
+# Time of the client's last write; a cookie for browsers, the header for other clients
+LAST_WRITE_COOKIE = 'last_write'
+LAST_WRITE_HEADER = 'X-Last-Write'
+
+class ReplicaRouter:
+    """
+    Chooses a read replica engine for read-only requests.
+
+    Each of ``DATABASE_REPLICA_URLS`` gets an engine named ``replica_<n>``
+    that ``RoutingSession`` binds reads to. They are kept out of
+    ``SQLALCHEMY_BINDS`` so ``db.create_all()`` never writes to them. A
+    replica that fails to connect is skipped for ``REPLICA_RETRY_SECONDS``.
+    After a request commits a write, the client's reads stay on the primary
+    for ``REPLICA_READ_AFTER_WRITE_SECONDS`` so they see it despite
+    replication lag. The time of the write travels with the client, in the
+    ``last_write`` cookie and ``X-Last-Write`` response header, so whichever
+    worker or host serves the next request honours the window.
+    """
+
+    def __init__(self, app=None):
+        self.keys = []
+        self.engines = {}
+        self._cycle = None
+        self._down_until = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        urls = app.config.get('DATABASE_REPLICA_URLS') or []
+        engine_options = app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+        for engine in self.engines.values():
+            engine.dispose()
+        self.engines = {
+            f'{REPLICA_BIND_PREFIX}{index}': create_engine(url, **engine_options)
+            for index, url in enumerate(urls)
+        }
+        self.keys = list(self.engines)
+        self._cycle = itertools.cycle(self.keys)
+        self._down_until = {}
+        app.extensions['replicas'] = self
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+
+    def after_fork(self):
+        """Forget connections and state inherited from the parent process"""
+        for engine in self.engines.values():
+            engine.dispose(close=False)
+        self._lock = threading.Lock()
+        self._down_until = {}
+
+    def _start_request(self):
+        g.replica_reads = False
+        g.last_write = None
+        value = request.headers.get(LAST_WRITE_HEADER) or request.cookies.get(LAST_WRITE_COOKIE)
+        try:
+            g.client_last_write = float(value) if value else None
+        except ValueError:
+            g.client_last_write = None
+
+    def _finish_request(self, response):
+        if g.get('last_write') is None:
+            return response
+        value = f'{g.last_write:.3f}'
+        window = current_app.config.get('REPLICA_READ_AFTER_WRITE_SECONDS', 5)
+        response.headers[LAST_WRITE_HEADER] = value
+        response.set_cookie(LAST_WRITE_COOKIE, value, max_age=math.ceil(window), httponly=True, samesite='Lax')
+        return response
+
+    @property
+    def enabled(self):
+        return bool(self.keys)
+
+    def healthy_keys(self):
+        now = time.monotonic()
+        return [key for key in self.keys if self._down_until.get(key, 0) <= now]
+
+    def choose(self):
+        """Return a healthy replica engine, or None to use the primary"""
+        healthy = self.healthy_keys()
+        if not healthy:
+            return None
+        if current_app.config.get('REPLICA_SELECTION') == 'least_connections':
+            key = min(healthy, key=lambda key: _checked_out(self.engines[key]))
+        else:
+            with self._lock:
+                for key in itertools.islice(self._cycle, len(self.keys)):
+                    if key in healthy:
+                        break
+        return self.engines[key]
+
+    def mark_down(self, engine):
+        for key, replica in self.engines.items():
+            if replica is engine:
+                retry = current_app.config.get('REPLICA_RETRY_SECONDS', 30)
+                self._down_until[key] = time.monotonic() + retry
+                current_app.logger.warning('Replica %s unavailable; using the primary for %ss',
+                                           key, retry)
+
+    def is_replica(self, engine):
+        return any(replica is engine for replica in self.engines.values())
+
+    def record_write(self):
+        """Remember that this request wrote, for the response to tell the client"""
+        g.last_write = time.time()
+
+    def recently_wrote(self):
+        """Whether the client wrote within the read-after-write window"""
+        at = g.get('client_last_write')
+        window = current_app.config.get('REPLICA_READ_AFTER_WRITE_SECONDS', 5)
+        # A time in the future is not trusted, so it cannot pin reads to the primary
+        return at is not None and 0 <= time.time() - at < window
+
+replica_router = ReplicaRouter()
+
+def _checked_out(engine):
+    checkedout = getattr(engine.pool, 'checkedout', None)
+    return checkedout() if checkedout else 0
+
+def _router():
+    if not has_app_context():
+        return None
+    router = current_app.extensions.get('replicas')
+    return router if router is not None and router.enabled else None
+
+def replica_reads(fn):
+    """
+    Route the SELECTs of a read-only view to a replica
+
+    Place it above ``@jwt_required()`` so the JWT user lookup is routed too.
+    """
+    @wraps(fn)
+    def decorator(*args, **kwargs):
+        g.replica_reads = True
+        return fn(*args, **kwargs)
+    return decorator
+
+@contextmanager
+def use_primary():
+    """Read from the primary inside the block, e.g. for security-sensitive checks"""
+    previous = g.get('replica_reads', False)
+    g.replica_reads = False
+    try:
+        yield
+    finally:
+        g.replica_reads = previous
+
+class RoutingSession(Session):
+    """Session sending plain SELECTs of replica-routed requests to a replica"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            if getattr(clause, 'is_dml', False):
+                self.info['has_writes'] = True
+            elif not self._flushing and self._can_use_replica(clause):
+                engine = _router().choose()
+                if engine is not None:
+                    return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _can_use_replica(self, clause):
+        router = _router()
+        if router is None or not g.get('replica_reads'):
+            return False
+        if not getattr(clause, 'is_select', False) or clause._for_update_arg is not None:
+            return False
+        if self.info.get('has_writes'):
+            return False
+        return not router.recently_wrote()
+
+    def _connection_for_bind(self, engine, execution_options=None, **kw):
+        try:
+            return super()._connection_for_bind(engine, execution_options, **kw)
+        except DBAPIError:
+            router = _router()
+            if router is None or not router.is_replica(engine):
+                raise
+            # Fall back to the primary for this statement and skip the replica for a while
+            router.mark_down(engine)
+            return super()._connection_for_bind(
+                super().get_bind(), execution_options, **kw)
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _record_flush(session, flush_context):
+    session.info['has_writes'] = True
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _record_commit(session):
+    router = _router()
+    if router is not None and session.info.get('has_writes'):
+        router.record_write()
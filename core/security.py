@@ -1,23 +1,51 @@
 from datetime import datetime
 from flask_jwt_extended import JWTManager
+from flask_jwt_extended.config import config as jwt_config
+from flask_jwt_extended.exceptions import (
+    RevokedTokenError, UserClaimsVerificationError, InvalidHeaderError, InvalidQueryParamError,
+    JWTDecodeError, WrongTokenError)
+from jwt.exceptions import ExpiredSignatureError, InvalidTokenError
 from flask_talisman import Talisman
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from models.token import TokenBlacklist
 from core.database import db
+from core.keys import KeyRing
+from core.replicas import use_primary
+from core.ratelimit import SQLiteStorage  # noqa: F401 - registers the sqlite:// limiter storage
 
 jwt = JWTManager()
+key_ring = KeyRing()
 talisman = Talisman()
 limiter = Limiter(
     key_func=get_remote_address,
     default_limits=["100 per hour"],
-    storage_uri="memory://",
 )
 
+@jwt.encode_key_loader
+def encode_key_callback(identity):
+    if not key_ring.enabled:
+        return jwt_config.encode_key
+    return key_ring.signing_key()[1]
+
+@jwt.decode_key_loader
+def decode_key_callback(jwt_header, jwt_payload):
+    if not key_ring.enabled:
+        return jwt_config.decode_key
+    return key_ring.verification_key(jwt_header.get('kid'))
+
+@jwt.additional_headers_loader
+def additional_headers_callback(identity):
+    if not key_ring.enabled:
+        return {}
+    return {'kid': key_ring.signing_key()[0]}
+
 @jwt.token_in_blocklist_loader
 def check_if_token_revoked(jwt_header, jwt_payload):
     jti = jwt_payload["jti"]
-    token = TokenBlacklist.query.filter_by(jti=jti).first()
+    # Revocations must apply immediately, so never read them from a lagging replica
+    with use_primary():
+        token = TokenBlacklist.query.filter_by(jti=jti).first()
     return token is not None
 
 @jwt.revoked_token_loader
@@ -33,3 +61,21 @@ def expired_token_callback(jwt_header, jwt_payload):
         'message': 'The token has expired.',
         'error': 'token_expired'
     }, 401
+
+# Statuses flask-jwt-extended answers its errors with; the rest (a missing,
+# stale or unknown token) are 401s
+_JWT_ERROR_STATUS = (
+    (UserClaimsVerificationError, 400),
+    ((InvalidHeaderError, InvalidQueryParamError, JWTDecodeError, WrongTokenError, InvalidTokenError), 422),
+)
+
+def jwt_error_response(e):
+    """``(body, status)`` for a JWT error, as flask-jwt-extended's handlers answer it"""
+    if isinstance(e, RevokedTokenError):
+        return revoked_token_callback(e.jwt_header, e.jwt_data)
+    if isinstance(e, ExpiredSignatureError):
+        return expired_token_callback(None, None)
+    for errors, status in _JWT_ERROR_STATUS:
+        if isinstance(e, errors):
+            return {'msg': str(e)}, status
+    return {'msg': str(e)}, 401
@@ -10,10 +10,12 @@ def version_required(min_version: APIVersion):
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            # Extract version from request path
+            # Extract version from request path; the innermost segment wins so
+            # /api/v1/api/v2/users resolves to v2 under the default v1 prefix
+            versions = {version.value for version in APIVersion}
             path_parts = request.path.split('/')
             try:
-                current_version = next(part for part in path_parts if part.startswith('v'))
+                current_version = next(part for part in reversed(path_parts) if part in versions)
                 if APIVersion(current_version).value < min_version.value:
                     abort(404)
             except (StopIteration, ValueError):
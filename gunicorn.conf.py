@@ -0,0 +1,38 @@
+# Production server profile; gunicorn reads this file from the working directory.
+# Override any setting with the GUNICORN_* variables below.
+import os
+import shutil
+
+wsgi_app = 'wsgi:app'
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('GUNICORN_WORKERS', 4))
+# 'sync' handles one request per worker; 'gthread' adds GUNICORN_THREADS threads
+# per worker for I/O-bound endpoints such as the GitHub analysis
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'sync')
+threads = int(os.environ.get('GUNICORN_THREADS', 4 if worker_class == 'gthread' else 1))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+# Load the app once in the master and fork workers from it, sharing its memory
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() == 'true'
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 0))
+
+def on_starting(server):
+    # Samples from a previous run would be aggregated with this one's
+    directory = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory, exist_ok=True)
+
+def when_ready(server):
+    if server.cfg.preload_app:
+        from core.lifecycle import prepare_for_fork
+        prepare_for_fork(server.app.wsgi())
+
+def post_fork(server, worker):
+    if server.cfg.preload_app:
+        from core.lifecycle import reset_after_fork
+        reset_after_fork(server.app.wsgi())
+
+def child_exit(server, worker):
+    from core.lifecycle import worker_exited
+    worker_exited(worker.pid)
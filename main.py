@@ -1,5 +1,8 @@
 from app import create_app
+from core.cli import init_db
 
 if __name__ == "__main__":
     app = create_app()
+    with app.app_context():
+        init_db()
     app.run(host="0.0.0.0", port=5000)
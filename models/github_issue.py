@@ -0,0 +1,37 @@
+from datetime import datetime
+from core.database import db
+
+class TrackedRepository(db.Model):
+    """Repository whose prioritization is stored and kept current by webhooks"""
+    __tablename__ = 'github_repositories'
+
+    id = db.Column(db.Integer, primary_key=True)
+    # Lowercase, as GitHub owner and repository names are case-insensitive
+    owner = db.Column(db.String(100), nullable=False)
+    name = db.Column(db.String(100), nullable=False)
+    # Last full listing of the open issues
+    synced_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    issues = db.relationship('StoredIssue', backref='repository', lazy=True, cascade='all, delete-orphan')
+
+    __table_args__ = (db.UniqueConstraint('owner', 'name', name='uq_github_repositories_owner_name'),)
+
+    def __repr__(self):
+        return f'<TrackedRepository {self.owner}/{self.name}>'
+
+class StoredIssue(db.Model):
+    """Analysis and dependencies of one open issue of a tracked repository"""
+    __tablename__ = 'github_issues'
+
+    id = db.Column(db.Integer, primary_key=True)
+    repository_id = db.Column(db.Integer, db.ForeignKey('github_repositories.id', ondelete='CASCADE'),
+                              nullable=False)
+    issue_number = db.Column(db.Integer, nullable=False)
+    analysis = db.Column(db.JSON, nullable=False)
+    dependencies = db.Column(db.JSON, nullable=False, default=list)
+
+    __table_args__ = (db.UniqueConstraint('repository_id', 'issue_number',
+                                          name='uq_github_issues_repository_id_issue_number'),)
+
+    def __repr__(self):
+        return f'<StoredIssue #{self.issue_number}>'
@@ -2,10 +2,16 @@ from core.database import db
 
 class Role(db.Model):
     __tablename__ = 'roles'
+    # Ids are never reused (AUTOINCREMENT on SQLite, sequences elsewhere), which
+    # the role list ETag relies on
+    __table_args__ = {'sqlite_autoincrement': True}
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(80), unique=True, nullable=False)
     description = db.Column(db.String(255))
+    # Incremented by the ORM on every update; backs the role list ETag
+    version = db.Column(db.Integer, nullable=False, default=1)
+    __mapper_args__ = {'version_id_col': version}
 
     def __repr__(self):
         return f'<Role {self.name}>'
@@ -13,5 +19,6 @@ class Role(db.Model):
 # Association table for many-to-many relationship between users and roles
 user_roles = db.Table('user_roles',
     db.Column('user_id', db.Integer, db.ForeignKey('users.id'), primary_key=True),
-    db.Column('role_id', db.Integer, db.ForeignKey('roles.id'), primary_key=True)
+    db.Column('role_id', db.Integer, db.ForeignKey('roles.id'), primary_key=True),
+    db.Index('ix_user_roles_role_id_user_id', 'role_id', 'user_id')
 )
@@ -1,10 +1,17 @@
 from datetime import datetime
+from sqlalchemy import event
 from core.database import db
+from core.rbac import role_registry
 from werkzeug.security import generate_password_hash, check_password_hash
 from models.role import user_roles
 
 class User(db.Model):
     __tablename__ = 'users'
+    __table_args__ = (
+        # Back the keyset-paginated user listings and their filters
+        db.Index('ix_users_is_active_id', 'is_active', 'id'),
+        db.Index('ix_users_created_at_id', 'created_at', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(64), unique=True, nullable=False)
@@ -12,9 +19,13 @@ class User(db.Model):
     password_hash = db.Column(db.String(256), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     is_active = db.Column(db.Boolean, default=True)
+    # Incremented by the ORM on every update; backs ETags and optimistic locking
+    version = db.Column(db.Integer, nullable=False, default=1)
+    __mapper_args__ = {'version_id_col': version}
     
-    # Add roles relationship
-    roles = db.relationship('Role', secondary=user_roles, lazy='subquery',
+    # Roles are not loaded with the user; endpoints that render or check
+    # roles ask for them with .options(selectinload(User.roles))
+    roles = db.relationship('Role', secondary=user_roles, lazy='select',
                           backref=db.backref('users', lazy=True))
 
     def set_password(self, password):
@@ -23,8 +34,42 @@ class User(db.Model):
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
     
+    @property
+    def role_mask(self):
+        """Bitmask of assigned roles and the roles they imply"""
+        return self.role_masks()[0]
+
+    def role_masks(self, role_names=()):
+        """
+        ``(granted, required, version)``: the user's mask and the mask of
+        ``role_names`` from the same role generation. The user's mask is
+        computed once per load and generation.
+        """
+        role_ids = [role.id for role in self.roles]
+        generation = role_registry.generation(role_ids, role_names)
+        cached = self.__dict__.get('_role_mask')
+        if cached is None or cached[0] != generation.version:
+            cached = self.__dict__['_role_mask'] = (generation.version, generation.granted(role_ids))
+        return cached[1], generation.required(role_names), generation.version
+
     def has_role(self, role_name):
-        return any(role.name == role_name for role in self.roles)
+        return self.has_any_role((role_name,))
     
     def has_any_role(self, role_names):
-        return any(self.has_role(role_name) for role_name in role_names)
+        granted, required, _ = self.role_masks(role_names)
+        return bool(granted & required)
+
+@event.listens_for(User.roles, 'append')
+@event.listens_for(User.roles, 'remove')
+def _reset_role_mask(target, value, initiator):
+    target.__dict__.pop('_role_mask', None)
+
+@event.listens_for(User, 'expire')
+def _reset_role_mask_on_expire(target, attrs):
+    # Expiry can fire for instances that were already garbage collected
+    if target is not None:
+        target.__dict__.pop('_role_mask', None)
+
+@event.listens_for(User, 'refresh')
+def _reset_role_mask_on_refresh(target, context, attrs):
+    target.__dict__.pop('_role_mask', None)
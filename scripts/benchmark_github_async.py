@@ -0,0 +1,63 @@
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, 'tests'))
+
+from stand_ins import StandInServer
+
+def blocking(analyses):
+    from services.github import GitHubService
+    # One thread per analysis, like one busy worker (thread) per request
+    with ThreadPoolExecutor(max_workers=analyses) as pool:
+        futures = [pool.submit(GitHubService().prioritize_issues, 'octo', 'hive') for _ in range(analyses)]
+        threads = threading.active_count()
+        return [future.result() for future in futures], threads
+
+def concurrent(analyses):
+    from services.github_async import AsyncGitHubService
+
+    async def prioritize():
+        async with AsyncGitHubService() as github:
+            return await github.prioritize_issues('octo', 'hive')
+
+    async def run():
+        return await asyncio.gather(*(prioritize() for _ in range(analyses)))
+    # All analyses share one event loop on this thread
+    return asyncio.run(run()), threading.active_count()
+
+def benchmark(issues, latency, analyses, concurrency, skip_blocking):
+    with StandInServer(issues=issues, latency=latency) as stand_in:
+        os.environ['GITHUB_API_URL'] = stand_in.url
+        os.environ['OLLAMA_API_URL'] = stand_in.url
+        os.environ['GITHUB_CONCURRENCY'] = str(concurrency)
+        print(f'{analyses} concurrent prioritizations of {issues} issues, '
+              f'{latency * 1000:.0f} ms per stand-in response')
+
+        variants = {'async (one event loop)': concurrent}
+        if not skip_blocking:
+            variants['blocking (thread each)'] = blocking
+        for name, run in variants.items():
+            requests = stand_in.requests
+            start = time.perf_counter()
+            results, threads = run(analyses)
+            elapsed = time.perf_counter() - start
+            assert all(len(result) == issues for result in results), 'an analysis came back incomplete'
+            print(f'{name:24} {elapsed:7.2f} s  {elapsed / analyses * 1000:8.1f} ms/analysis  '
+                  f'{stand_in.requests - requests:6} upstream requests  {threads:3} threads')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare blocking and async GitHub analysis against local stand-ins')
+    parser.add_argument('--issues', type=int, default=20, help='Open issues in the stand-in repository')
+    parser.add_argument('--latency', type=float, default=0.05, help='Seconds before each stand-in response')
+    parser.add_argument('--analyses', type=int, default=10, help='Prioritizations running at the same time')
+    parser.add_argument('--concurrency', type=int, default=8, help='GITHUB_CONCURRENCY for the async service')
+    parser.add_argument('--skip-blocking', action='store_true',
+                        help='Only run the async service (PyGithub waits 0.25 s between requests)')
+    args = parser.parse_args()
+    benchmark(args.issues, args.latency, args.analyses, args.concurrency, args.skip_blocking)
@@ -0,0 +1,63 @@
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import SlidingWindowCounterRateLimiter
+from core.ratelimit import SQLiteStorage  # noqa: F401 - registers sqlite://
+
+def _worker(uri, options, limit, hits, clients, results):
+    limiter = SlidingWindowCounterRateLimiter(storage_from_string(uri, **options))
+    item = parse(limit)
+    allowed = 0
+    start = time.perf_counter()
+    for hit in range(hits):
+        allowed += limiter.hit(item, f'client-{hit % clients}')
+    elapsed = time.perf_counter() - start
+    flush = getattr(limiter.storage, 'flush', None)
+    if flush is not None:
+        flush()
+    results.put((allowed, elapsed))
+
+def benchmark(workers, hits, clients):
+    context = multiprocessing.get_context('fork')
+    # Each client may make a quarter of all the hits sent its way
+    per_client = workers * hits // clients
+    limit = f'{max(per_client // 4, 1)}/hour'
+    expected = clients * max(per_client // 4, 1)
+
+    with tempfile.TemporaryDirectory() as directory:
+        variants = {
+            'memory (per worker)': ('memory://', {}),
+            'sqlite, every hit': (f"sqlite:///{os.path.join(directory, 'hit.db')}", {}),
+            'sqlite, 50 ms batches': (f"sqlite:///{os.path.join(directory, 'batch.db')}",
+                                      {'flush_interval': 0.05}),
+        }
+        print(f'{workers} workers x {hits} hits over {clients} clients, '
+              f'limit {limit} per client ({expected} allowed in total)')
+        for name, (uri, options) in variants.items():
+            results = context.Queue()
+            processes = [context.Process(target=_worker, args=(uri, options, limit, hits, clients, results))
+                         for _ in range(workers)]
+            for process in processes:
+                process.start()
+            outcomes = [results.get() for _ in processes]
+            for process in processes:
+                process.join()
+
+            allowed = sum(outcome[0] for outcome in outcomes)
+            per_hit = sum(outcome[1] for outcome in outcomes) / (workers * hits)
+            print(f'{name:24} {per_hit * 1e6:8.1f} us/hit  allowed {allowed:6} ({allowed / expected:.2f}x limit)')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure rate limit storage overhead per request')
+    parser.add_argument('--workers', type=int, default=4, help='Processes hitting the limiter at once')
+    parser.add_argument('--hits', type=int, default=5000, help='Hits per worker')
+    parser.add_argument('--clients', type=int, default=50, help='Distinct rate limit keys')
+    args = parser.parse_args()
+    benchmark(args.workers, args.hits, args.clients)
@@ -0,0 +1,161 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import timeit
+import tracemalloc
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from services.scoring import IssueScoring, issue_references
+
+DEFAULT_BASELINE = os.path.join(ROOT, 'scripts', 'baselines', 'scoring.json')
+
+WORDS = ('request handler cache token user repository page query response worker session timeout '
+         'security performance memory latency interface accessibility api function method class '
+         'bug error exception the a of to and in is for on with').split()
+
+def _sentence(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize() + rng.choice('.!?')
+
+def _body(rng, sentences, code_blocks=0, references=0, issue_count=1):
+    parts = [_sentence(rng, rng.randint(6, 18)) for _ in range(sentences)]
+    for _ in range(code_blocks):
+        parts.insert(rng.randrange(len(parts) + 1),
+                     '```python\ndef handler(request):\n    return cache.get(request.path)\n```')
+    for _ in range(references):
+        parts.insert(rng.randrange(len(parts) + 1), f'See #{rng.randint(1, issue_count)}.')
+    return '\n'.join(parts)
+
+def corpora(count, seed):
+    """Synthetic issue bodies keyed by corpus name; the same seed gives the same text"""
+    rng = random.Random(seed)
+    return {
+        'small': [_body(rng, rng.randint(1, 3)) for _ in range(count)],
+        'large': [_body(rng, rng.randint(150, 250)) for _ in range(count)],
+        'code_heavy': [_body(rng, rng.randint(10, 20), code_blocks=rng.randint(4, 12)) for _ in range(count)],
+        'reference_heavy': [_body(rng, rng.randint(5, 10), references=rng.randint(5, 20), issue_count=count)
+                            for _ in range(count)],
+    }
+
+def prioritization_inputs(scoring, bodies):
+    """Analyses and dependency map shaped like prioritize_issues builds them"""
+    ai = {'technical_complexity': 6, 'implementation_effort': 'high', 'priority_level': 'high'}
+    analyses = {}
+    dependency_map = {}
+    for number, body in enumerate(bodies, start=1):
+        analysis = scoring._build_analysis(number, f'Issue {number}', body, 'open', None, None,
+                                           ai if number % 3 == 0 else None)
+        analyses[number] = analysis
+        dependency_map[number] = [{'issue_number': ref} for ref in sorted(issue_references(body)) if ref != number]
+    return analyses, dependency_map
+
+def cases(count, seed):
+    """``name -> (function, operations per call)``"""
+    scoring = IssueScoring()
+    texts = corpora(count, seed)
+    cases = {}
+    for corpus, bodies in texts.items():
+        cases[f'text_complexity[{corpus}]'] = (
+            lambda bodies=bodies: [scoring._calculate_text_complexity(body) for body in bodies], len(bodies))
+        cases[f'impact_scores[{corpus}]'] = (
+            lambda bodies=bodies: [scoring._calculate_impact_scores(body) for body in bodies], len(bodies))
+
+    estimates = [(scoring._calculate_text_complexity(body), scoring._calculate_impact_scores(body),
+                  {'technical_complexity': 7, 'implementation_effort': 'low'} if n % 2 else None)
+                 for n, body in enumerate(texts['small'])]
+    cases['estimate_time'] = (
+        lambda: [scoring._estimate_implementation_time(*estimate) for estimate in estimates], len(estimates))
+
+    analyses, dependency_map = prioritization_inputs(scoring, texts['reference_heavy'])
+    cases['score_issue'] = (lambda: [scoring.score_issue(analysis) for analysis in analyses.values()],
+                            len(analyses))
+    cases['issue_references[reference_heavy]'] = (
+        lambda: [issue_references(body) for body in texts['reference_heavy']], count)
+    cases['order_issues[reference_heavy]'] = (lambda: scoring._order_issues(analyses, dependency_map), 1)
+    return cases
+
+def measure(fn, operations, repeat, min_time):
+    """Best ops/sec over ``repeat`` runs of at least ``min_time`` seconds, and peak traced memory"""
+    timer = timeit.Timer(fn)
+    number, elapsed = timer.autorange()
+    number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+    best = min(timer.repeat(repeat=repeat, number=number)) / number
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'ops_per_sec': round(operations / best, 1), 'peak_kib': round(peak / 1024, 1)}
+
+def compare(results, baseline, threshold):
+    """Regressions as messages: throughput below, or peak memory above, baseline by more than ``threshold``"""
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        if result['ops_per_sec'] < reference['ops_per_sec'] * (1 - threshold):
+            regressions.append(f"{name}: {result['ops_per_sec']:.0f} ops/s vs baseline "
+                               f"{reference['ops_per_sec']:.0f} ops/s")
+        if result['peak_kib'] > reference['peak_kib'] * (1 + threshold):
+            regressions.append(f"{name}: peak {result['peak_kib']:.1f} KiB vs baseline "
+                               f"{reference['peak_kib']:.1f} KiB")
+    return regressions
+
+def benchmark(args):
+    measured = cases(args.issues, args.seed)
+    results = {}
+    for name, (fn, operations) in measured.items():
+        results[name] = measure(fn, operations, args.repeat, args.min_time)
+        print(f"{name:36} {results[name]['ops_per_sec']:14,.0f} ops/s  {results[name]['peak_kib']:10.1f} KiB peak")
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w') as handle:
+            json.dump({'python': platform.python_version(), 'machine': platform.machine(),
+                       'issues': args.issues, 'seed': args.seed, 'results': results}, handle, indent=2)
+            handle.write('\n')
+        print(f'Baseline written to {args.baseline}')
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f'No baseline at {args.baseline}; run with --save-baseline first')
+        return 0
+    with open(args.baseline) as handle:
+        baseline = json.load(handle)
+    if (baseline['issues'], baseline['seed']) != (args.issues, args.seed):
+        print('Baseline was recorded with different --issues/--seed; not comparing')
+        return 2
+    regressions = compare(results, baseline['results'], args.threshold)
+    # A busy machine slows single runs down; only a slowdown that persists
+    # when measured again counts, keeping the best result of every attempt
+    for _ in range(args.retries):
+        if not regressions:
+            break
+        for name in [name for name in results if compare({name: results[name]}, baseline['results'],
+                                                          args.threshold)]:
+            fn, operations = measured[name]
+            again = measure(fn, operations, args.repeat, args.min_time)
+            results[name] = {'ops_per_sec': max(results[name]['ops_per_sec'], again['ops_per_sec']),
+                             'peak_kib': min(results[name]['peak_kib'], again['peak_kib'])}
+        regressions = compare(results, baseline['results'], args.threshold)
+    for regression in regressions:
+        print(f'REGRESSION {regression}')
+    print(f'{len(regressions)} regression(s) beyond {args.threshold:.0%} of the baseline')
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Microbenchmark the issue scoring functions against a baseline')
+    parser.add_argument('--issues', type=int, default=200, help='Issues per synthetic corpus')
+    parser.add_argument('--seed', type=int, default=7, help='Seed for the synthetic corpora')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per benchmark; the best counts')
+    parser.add_argument('--min-time', type=float, default=0.2, help='Seconds per timed run')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON file')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='Allowed slowdown or memory growth before failing (0.25 = 25%%)')
+    parser.add_argument('--retries', type=int, default=3, help='Re-measurements of a regressed benchmark')
+    parser.add_argument('--save-baseline', action='store_true', help='Record these results as the baseline')
+    sys.exit(benchmark(parser.parse_args()))
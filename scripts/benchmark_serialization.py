@@ -0,0 +1,70 @@
+import argparse
+import json
+import os
+import sys
+import timeit
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask_restx import marshal
+from api.github import prioritized_issue_model
+from core.serialization import compile_model, dumps, orjson
+
+def sample_issues(count):
+    """Prioritized issues shaped like GitHubService.prioritize_issues output"""
+    created = datetime(2024, 1, 1)
+    return [{
+        'issue_number': number,
+        'title': f'Issue {number}: improve request handling',
+        'complexity': 0.5 + number % 5,
+        'security_impact': 0.3,
+        'performance_impact': 0.8,
+        'ux_impact': 0.1,
+        'implementation_time': 8,
+        'score': 42.5 - number * 0.01,
+        'state': 'open',
+        'created_at': created + timedelta(hours=number),
+        'updated_at': created + timedelta(hours=number + 1),
+        'dependencies': [{'issue_number': number - 1, 'title': 'Previous issue',
+                          'state': 'closed', 'created_at': created}] if number else [],
+        'ai_insights': {
+            'technical_complexity': 0.6,
+            'impact_assessment': {'security': 0.3, 'performance': 0.8, 'ux': 0.1},
+            'implementation_effort': 'medium',
+            'priority_level': 'high',
+            'required_expertise': ['python', 'flask'],
+            'potential_risks': ['regression'],
+            'suggestions': ['add tests', 'profile first']
+        } if number % 4 else None
+    } for number in range(count)]
+
+def benchmark(count, repeat):
+    issues = sample_issues(count)
+    encoder = compile_model(prioritized_issue_model)
+
+    # Same output, checked before timing anything
+    assert json.loads(dumps(encoder(issues))) == json.loads(json.dumps(marshal(issues, prioritized_issue_model)))
+
+    variants = {
+        'restx marshal + json.dumps': lambda: json.dumps(marshal(issues, prioritized_issue_model)).encode(),
+        'compiled encoder + json.dumps': lambda: json.dumps(encoder(issues)).encode(),
+    }
+    if orjson is not None:
+        variants['compiled encoder + orjson'] = lambda: dumps(encoder(issues))
+
+    results = {}
+    for name, fn in variants.items():
+        best = min(timeit.repeat(fn, number=1, repeat=repeat))
+        results[name] = best
+        print(f'{name:32} {best * 1000:8.2f} ms  {count / best:10.0f} issues/s')
+
+    baseline = results['restx marshal + json.dumps']
+    fastest = min(results.values())
+    print(f'Speedup: {baseline / fastest:.1f}x')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare response serialization throughput')
+    parser.add_argument('--count', type=int, default=1000, help='Issues per response')
+    parser.add_argument('--repeat', type=int, default=20, help='Timed runs per variant (best is reported)')
+    args = parser.parse_args()
+    benchmark(args.count, args.repeat)
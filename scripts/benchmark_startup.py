@@ -0,0 +1,63 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in a fresh interpreter, like a gunicorn worker without preloading
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.create_app()
+created = time.perf_counter()
+heavy = ('github', 'numpy', 'requests')
+print(json.dumps({
+    'import_ms': (imported - start) * 1000,
+    'create_app_ms': (created - imported) * 1000,
+    'heavy_modules': [name for name in heavy if name in sys.modules],
+}))
+"""
+
+def measure(env, runs):
+    results = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', PROBE], cwd=ROOT, env=env,
+                                check=True, capture_output=True, text=True).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    return results
+
+def benchmark(runs):
+    with tempfile.TemporaryDirectory() as directory:
+        env = {
+            **os.environ,
+            'DATABASE_URL': f"sqlite:///{os.path.join(directory, 'startup.db')}",
+            'RATELIMIT_STORAGE_URI': 'memory://',
+        }
+        env.pop('FLASK_TESTING', None)
+        subprocess.run([sys.executable, '-m', 'flask', '--app', 'wsgi', 'init-db'],
+                       cwd=ROOT, env=env, check=True, capture_output=True)
+
+        variants = {
+            'default (flask init-db)': env,
+            'DATABASE_INIT_ON_STARTUP': {**env, 'DATABASE_INIT_ON_STARTUP': 'true'},
+        }
+        print(f'Median of {runs} fresh interpreters')
+        for name, variant_env in variants.items():
+            results = measure(variant_env, runs)
+            import_ms = statistics.median(result['import_ms'] for result in results)
+            create_ms = statistics.median(result['create_app_ms'] for result in results)
+            heavy = ', '.join(results[-1]['heavy_modules']) or 'none'
+            print(f'{name:26} import {import_ms:7.1f} ms  create_app {create_ms:7.1f} ms  '
+                  f'total {import_ms + create_ms:7.1f} ms  heavy modules loaded: {heavy}')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure application import and startup time')
+    parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters per variant')
+    args = parser.parse_args()
+    benchmark(args.runs)
@@ -0,0 +1,102 @@
+import argparse
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def children(pid):
+    with open(f'/proc/{pid}/task/{pid}/children') as handle:
+        return [int(child) for child in handle.read().split()]
+
+def memory_kb(pid):
+    """RSS, PSS and USS (private pages) of a process, from smaps_rollup"""
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as handle:
+        for line in handle:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1])
+    return fields['Rss'], fields['Pss'], fields['Private_Clean'] + fields['Private_Dirty']
+
+def wait_until_serving(url, master, workers, deadline):
+    while time.monotonic() < deadline:
+        try:
+            if len(children(master.pid)) == workers:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return
+        except (OSError, FileNotFoundError):
+            pass
+        time.sleep(0.02)
+    raise RuntimeError(f'gunicorn did not start serving {url}')
+
+def run_variant(name, overrides, workers, requests, database_url):
+    port = free_port()
+    env = {
+        **os.environ,
+        'DATABASE_URL': database_url,
+        'RATELIMIT_STORAGE_URI': 'memory://',
+        'GUNICORN_BIND': f'127.0.0.1:{port}',
+        'GUNICORN_WORKERS': str(workers),
+        **overrides,
+    }
+    env.pop('FLASK_TESTING', None)
+    url = f'http://127.0.0.1:{port}/api/v1/swagger.json'
+
+    start = time.monotonic()
+    master = subprocess.Popen([sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py'],
+                              cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_serving(url, master, workers, start + 60)
+        boot = time.monotonic() - start
+        for _ in range(requests):
+            with urllib.request.urlopen(url) as response:
+                response.read()
+
+        workers_memory = [memory_kb(pid) for pid in children(master.pid)]
+        master_memory = memory_kb(master.pid)
+        rss = sum(memory[0] for memory in workers_memory) / len(workers_memory)
+        uss = sum(memory[2] for memory in workers_memory) / len(workers_memory)
+        total_pss = master_memory[1] + sum(memory[1] for memory in workers_memory)
+        print(f'{name:22} boot {boot * 1000:7.0f} ms  per worker: RSS {rss / 1024:6.1f} MiB  '
+              f'USS {uss / 1024:6.1f} MiB  total PSS {total_pss / 1024:7.1f} MiB')
+    finally:
+        master.send_signal(signal.SIGTERM)
+        master.wait(timeout=30)
+
+def benchmark(workers, requests):
+    directory = tempfile.mkdtemp()
+    try:
+        database_url = f"sqlite:///{os.path.join(directory, 'workers.db')}"
+        subprocess.run([sys.executable, '-m', 'flask', '--app', 'wsgi', 'init-db'], cwd=ROOT, check=True,
+                       capture_output=True, env={**os.environ, 'DATABASE_URL': database_url,
+                                                 'RATELIMIT_STORAGE_URI': 'memory://'})
+        print(f'{workers} workers, {requests} requests after boot')
+        variants = {
+            'sync': {'GUNICORN_PRELOAD': 'false'},
+            'sync + preload': {'GUNICORN_PRELOAD': 'true'},
+            'gthread + preload': {'GUNICORN_PRELOAD': 'true', 'GUNICORN_WORKER_CLASS': 'gthread'},
+        }
+        for name, overrides in variants.items():
+            run_variant(name, overrides, workers, requests, database_url)
+    finally:
+        shutil.rmtree(directory)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure gunicorn boot time and memory per worker (Linux)')
+    parser.add_argument('--workers', type=int, default=4, help='Worker processes')
+    parser.add_argument('--requests', type=int, default=50, help='Requests to serve before measuring memory')
+    args = parser.parse_args()
+    benchmark(args.workers, args.requests)
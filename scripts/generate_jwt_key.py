@@ -0,0 +1,65 @@
+import argparse
+import os
+import sys
+from datetime import datetime, timezone
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+
+def generate_key(keys_dir, algorithm, kid=None):
+    """Write a new private signing key to ``<keys_dir>/<kid>.pem``"""
+    kid = kid or datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S')
+    if algorithm == 'RS256':
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    elif algorithm == 'EdDSA':
+        key = ed25519.Ed25519PrivateKey.generate()
+    else:
+        print(f'Error: unsupported algorithm "{algorithm}"')
+        sys.exit(1)
+
+    os.makedirs(keys_dir, exist_ok=True)
+    path = os.path.join(keys_dir, f'{kid}.pem')
+    if os.path.exists(path):
+        print(f'Error: key "{kid}" already exists')
+        sys.exit(1)
+
+    pem = key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption()
+    )
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(pem)
+    return kid, path
+
+def retire_key(keys_dir, kid):
+    """Replace a private key with its public half so it only verifies tokens"""
+    path = os.path.join(keys_dir, f'{kid}.pem')
+    with open(path, 'rb') as f:
+        key = serialization.load_pem_private_key(f.read(), password=None)
+    pem = key.public_key().public_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    with open(path, 'wb') as f:
+        f.write(pem)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Manage JWT signing keys in JWT_KEYS_DIR')
+    parser.add_argument('--dir', default=os.environ.get('JWT_KEYS_DIR'), help='Key directory')
+    parser.add_argument('--algorithm', default=os.environ.get('JWT_ALGORITHM', 'RS256'),
+                        choices=['RS256', 'EdDSA'])
+    parser.add_argument('--kid', help='Key id (defaults to a UTC timestamp)')
+    parser.add_argument('--retire', metavar='KID', help='Keep only the public half of an existing key')
+    args = parser.parse_args()
+
+    if not args.dir:
+        print('Error: --dir or JWT_KEYS_DIR is required')
+        sys.exit(1)
+
+    if args.retire:
+        retire_key(args.dir, args.retire)
+        print(f'Retired signing key {args.retire}')
+    else:
+        kid, path = generate_key(args.dir, args.algorithm, args.kid)
+        print(f'Generated {args.algorithm} signing key {kid} at {path}')
@@ -1,22 +1,93 @@
 # Previous imports remain the same...
 from github import Github
-import os
+from github.Auth import Auth
+from github.GithubException import GithubException
+from github.Requester import WithRequester
+from urllib3.util import Retry
 from datetime import datetime, timedelta
 import re
 from collections import defaultdict
-import numpy as np
-from functools import lru_cache
+from functools import lru_cache, wraps
+from urllib.parse import urlparse
 from services.ollama import OllamaService
+from services.github_tokens import GitHubRateLimited, account_scoped, token_pool
+from services.scoring import IssueScoring, issue_references
+from core.config import Config
+from core.metrics import cache_metrics, external_call
 
-class GitHubService:
+# Server errors are retried; rate limits are left to PooledAuth
+SERVER_ERROR_RETRY = Retry(total=3, backoff_factor=0.5, status_forcelist=(500, 502, 503, 504),
+                           raise_on_status=False)
+
+class PooledAuth(Auth, WithRequester):
+    """
+    PyGithub authentication taking a token from the pool for every request
+
+    Every REST call of PyGithub goes through its requester's
+    ``requestJsonAndCheck``, which is wrapped to record each response on the
+    token that was sent. A request rejected by a rate limit goes out again
+    with the next ready token, as ``TokenPoolTransport`` does for httpx, and
+    requests to the signed-in account's endpoints keep to the primary token.
+    """
+
+    def __init__(self, pool):
+        WithRequester.__init__(self)
+        self.pool = pool
+        self._token = None
+        self._primary = False
+
+    @property
+    def token_type(self):
+        return 'Bearer'
+
+    @property
+    def token(self):
+        return self._token.value if self._token is not None else ''
+
+    def authentication(self, headers):
+        self._token = self.pool.acquire(self._primary)
+        if self._token.value:
+            headers['Authorization'] = f'Bearer {self._token.value}'
+
+    def withRequester(self, requester):
+        super().withRequester(requester)
+        request = requester.requestJsonAndCheck
+
+        @wraps(request)
+        def pooled(verb, url, *args, **kwargs):
+            self._primary = account_scoped(urlparse(url).path)
+            while True:
+                try:
+                    headers, output = request(verb, url, *args, **kwargs)
+                except GithubException as e:
+                    if self._token is not None and self.pool.record(self._token, e.status, e.headers or {}):
+                        continue
+                    raise
+                self.pool.record(self._token, 200, headers)
+                return headers, output
+
+        requester.requestJsonAndCheck = pooled
+        return self
+
+class GitHubService(IssueScoring):
     def __init__(self):
-        self.client = Github(os.environ.get('GITHUB_TOKEN'))
-        self._security_keywords = {'security', 'vulnerability', 'exploit', 'csrf', 'xss', 'injection', 'authentication'}
-        self._performance_keywords = {'performance', 'optimization', 'slow', 'memory', 'cpu', 'latency', 'bottleneck'}
-        self._ux_keywords = {'usability', 'user experience', 'ux', 'ui', 'interface', 'accessibility', 'responsive'}
+        # The pool paces requests per token, in place of PyGithub's fixed
+        # 0.25 s between requests, and moves rate-limited requests to another
+        # token in place of PyGithub's retry, which waits for the same one
+        self.client = Github(auth=PooledAuth(token_pool()), base_url=Config.GITHUB_API_URL,
+                             seconds_between_requests=None, retry=SERVER_ERROR_RETRY)
         self.ollama = OllamaService()
+
+    @classmethod
+    def clear_caches(cls):
+        """Empty the per-process caches of GitHub responses and analyses"""
+        for method in (cls.get_user_info, cls.list_repositories, cls.get_repository,
+                       cls.analyze_issue, cls.prioritize_issues):
+            method.cache_clear()
     
+    @cache_metrics('github.get_user_info')
     @lru_cache(maxsize=100)
+    @external_call('github', 'get_user_info')
     def get_user_info(self):
         """Get authenticated user information"""
         user = self.client.get_user()
@@ -29,7 +100,9 @@ class GitHubService:
             'following': user.following
         }
     
+    @cache_metrics('github.list_repositories')
     @lru_cache(maxsize=100)
+    @external_call('github', 'list_repositories')
     def list_repositories(self, username=None):
         """List repositories for a user or authenticated user"""
         if username:
@@ -47,6 +120,7 @@ class GitHubService:
             'language': repo.language
         } for repo in repos]
     
+    @external_call('github', 'create_repository')
     def create_repository(self, name, description=None, private=False):
         """Create a new repository"""
         user = self.client.get_user()
@@ -62,7 +136,9 @@ class GitHubService:
             'clone_url': repo.clone_url
         }
     
+    @cache_metrics('github.get_repository')
     @lru_cache(maxsize=100)
+    @external_call('github', 'get_repository')
     def get_repository(self, owner, repo_name):
         """Get repository details"""
         try:
@@ -78,75 +154,20 @@ class GitHubService:
                 'created_at': repo.created_at,
                 'updated_at': repo.updated_at
             }
+        except GitHubRateLimited:
+            raise
         except Exception:
             return None
 
-    def _calculate_text_complexity(self, text):
-        """Calculate text complexity based on length and structure"""
-        if not text:
-            return 1
-        
-        # Factors affecting complexity
-        words = len(text.split())
-        sentences = len(re.split(r'[.!?]+', text))
-        code_blocks = len(re.findall(r'```.*?```', text, re.DOTALL))
-        technical_terms = len(re.findall(r'\b(?:api|function|method|class|bug|error|exception)\b', text.lower()))
-        
-        # Normalize and combine factors
-        complexity = (
-            min(words / 100, 5) +  # Length factor
-            min(sentences / 10, 2) +  # Structure factor
-            min(code_blocks * 0.5, 2) +  # Technical complexity
-            min(technical_terms * 0.2, 1)  # Domain complexity
-        )
-        
-        return min(max(complexity, 1), 10)  # Ensure score is between 1-10
-
-    def _calculate_impact_scores(self, text):
-        """Calculate security, performance, and UX impact scores based on keyword analysis"""
-        text_lower = text.lower()
-        
-        # Calculate impact scores based on keyword presence and context
-        security_score = sum(2 if kw in text_lower else 0 for kw in self._security_keywords)
-        performance_score = sum(2 if kw in text_lower else 0 for kw in self._performance_keywords)
-        ux_score = sum(2 if kw in text_lower else 0 for kw in self._ux_keywords)
-        
-        # Normalize scores to 1-10 range
-        return {
-            'security': min(max(security_score, 1), 10),
-            'performance': min(max(performance_score, 1), 10),
-            'ux': min(max(ux_score, 1), 10)
-        }
-
-    def _estimate_implementation_time(self, complexity, impact_scores, ai_analysis=None):
-        """Estimate implementation time in hours based on complexity, impact scores, and AI analysis"""
-        base_time = complexity * 2  # Base time in hours
-        impact_factor = max(impact_scores.values()) / 10  # Impact factor 0-1
-        
-        # Include AI analysis if available
-        if ai_analysis and isinstance(ai_analysis, dict):
-            ai_complexity = ai_analysis.get('technical_complexity', 5) / 10
-            effort_map = {'low': 0.7, 'medium': 1.0, 'high': 1.3}
-            ai_effort = effort_map.get(
-                ai_analysis.get('implementation_effort', 'medium').lower(), 
-                1.0
-            )
-            return round(base_time * (1 + impact_factor) * ((ai_complexity + ai_effort) / 2))
-            
-        return round(base_time * (1 + impact_factor))
-
+    @cache_metrics('github.analyze_issue')
     @lru_cache(maxsize=200)
+    @external_call('github', 'analyze_issue')
     def analyze_issue(self, owner, repo_name, issue_number):
         """Analyze a specific issue for complexity and impact"""
         try:
             repo = self.client.get_repo(f"{owner}/{repo_name}")
             issue = repo.get_issue(issue_number)
             
-            # Analyze issue content
-            content = f"{issue.title}\n{issue.body}"
-            complexity = self._calculate_text_complexity(content)
-            impact_scores = self._calculate_impact_scores(content)
-            
             # Get AI analysis if available
             ai_analysis = None
             if self.ollama.health_check():
@@ -155,52 +176,17 @@ class GitHubService:
                     'body': issue.body
                 })
             
-            # Estimate implementation time
-            implementation_time = self._estimate_implementation_time(
-                complexity, 
-                impact_scores,
-                ai_analysis
-            )
-            
-            # Base analysis results
-            analysis = {
-                'issue_number': issue_number,
-                'title': issue.title,
-                'complexity': complexity,
-                'security_impact': impact_scores['security'],
-                'performance_impact': impact_scores['performance'],
-                'ux_impact': impact_scores['ux'],
-                'implementation_time': implementation_time,
-                'state': issue.state,
-                'created_at': issue.created_at,
-                'updated_at': issue.updated_at
-            }
-            
-            # Include AI insights if available
-            if ai_analysis:
-                analysis.update({
-                    'ai_insights': {
-                        'technical_complexity': ai_analysis.get('technical_complexity'),
-                        'impact_assessment': ai_analysis.get('impact_assessment', {}),
-                        'implementation_effort': ai_analysis.get('implementation_effort'),
-                        'priority_level': ai_analysis.get('priority_level'),
-                        'required_expertise': ai_analysis.get('required_expertise', []),
-                        'potential_risks': ai_analysis.get('potential_risks', []),
-                        'suggestions': [
-                            f"Priority: {ai_analysis.get('priority_level', 'medium').title()} - Consider implementing this issue with {ai_analysis.get('implementation_effort', 'medium')} effort",
-                            *[f"Required expertise: {exp}" for exp in ai_analysis.get('required_expertise', [])],
-                            *[f"Risk consideration: {risk}" for risk in ai_analysis.get('potential_risks', [])]
-                        ]
-                    }
-                })
-            
-            return analysis
+            return self._build_analysis(issue_number, issue.title, issue.body, issue.state,
+                                        issue.created_at, issue.updated_at, ai_analysis)
             
+        except GitHubRateLimited:
+            raise
         except Exception as e:
             print(f"Error analyzing issue: {str(e)}")
             return None
 
     # Rest of the methods remain the same...
+    @external_call('github', 'analyze_issue_dependencies')
     def analyze_issue_dependencies(self, owner, repo_name, issue_number):
         """Analyze dependencies between issues"""
         try:
@@ -211,15 +197,11 @@ class GitHubService:
             referenced_issues = set()
             
             # Check issue body for references
-            referenced_issues.update(
-                int(num) for num in re.findall(r'#(\d+)', issue.body)
-            )
+            referenced_issues.update(issue_references(issue.body))
             
             # Check comments for references
             for comment in issue.get_comments():
-                referenced_issues.update(
-                    int(num) for num in re.findall(r'#(\d+)', comment.body)
-                )
+                referenced_issues.update(issue_references(comment.body))
             
             # Get details of referenced issues
             dependencies = []
@@ -232,6 +214,8 @@ class GitHubService:
                         'state': ref_issue.state,
                         'created_at': ref_issue.created_at
                     })
+                except GitHubRateLimited:
+                    raise
                 except:
                     continue
             
@@ -240,10 +224,14 @@ class GitHubService:
                 'dependencies': dependencies,
                 'dependency_count': len(dependencies)
             }
+        except GitHubRateLimited:
+            raise
         except Exception:
             return None
 
+    @cache_metrics('github.prioritize_issues')
     @lru_cache(maxsize=50)
+    @external_call('github', 'prioritize_issues')
     def prioritize_issues(self, owner, repo_name):
         """Prioritize issues based on score and dependencies"""
         try:
@@ -261,81 +249,9 @@ class GitHubService:
                     deps = self.analyze_issue_dependencies(owner, repo_name, issue.number)
                     dependency_map[issue.number] = deps['dependencies'] if deps else []
             
-            # Calculate scores and create dependency graph
-            scores = {
-                num: self.score_issue(analysis)
-                for num, analysis in issue_analyses.items()
-            }
-            
-            # Sort issues considering both score and dependencies
-            prioritized_issues = []
-            processed = set()
-            
-            def process_issue(issue_num):
-                if issue_num in processed:
-                    return
-                
-                # Process dependencies first
-                for dep in dependency_map.get(issue_num, []):
-                    dep_num = dep['issue_number']
-                    if dep_num in issue_analyses:
-                        process_issue(dep_num)
-                
-                processed.add(issue_num)
-                issue_data = {
-                    **issue_analyses[issue_num],
-                    'score': scores[issue_num],
-                    'dependencies': dependency_map.get(issue_num, [])
-                }
-                
-                # Include AI suggestions if available
-                if 'ai_insights' in issue_analyses[issue_num]:
-                    issue_data['ai_insights'] = issue_analyses[issue_num]['ai_insights']
-                    
-                prioritized_issues.append(issue_data)
-            
-            # Process all issues
-            for issue_num in sorted(scores, key=scores.get, reverse=True):
-                process_issue(issue_num)
-            
-            return prioritized_issues
+            return self._order_issues(issue_analyses, dependency_map)
             
+        except GitHubRateLimited:
+            raise
         except Exception:
             return []
-
-    def score_issue(self, issue_analysis):
-        """Calculate composite score for an issue"""
-        if not issue_analysis:
-            return 0
-        
-        # Weights for different factors
-        weights = {
-            'complexity': 0.25,
-            'security_impact': 0.3,
-            'performance_impact': 0.2,
-            'ux_impact': 0.15,
-            'implementation_time': 0.1
-        }
-        
-        # Normalize implementation time to 1-10 scale
-        normalized_time = min(10, max(1, 10 - (issue_analysis['implementation_time'] / 8)))
-        
-        # Calculate weighted score
-        score = (
-            weights['complexity'] * issue_analysis['complexity'] +
-            weights['security_impact'] * issue_analysis['security_impact'] +
-            weights['performance_impact'] * issue_analysis['performance_impact'] +
-            weights['ux_impact'] * issue_analysis['ux_impact'] +
-            weights['implementation_time'] * normalized_time
-        )
-        
-        # Adjust score based on AI insights if available
-        if 'ai_insights' in issue_analysis:
-            ai_priority_map = {'low': 0.8, 'medium': 1.0, 'high': 1.2}
-            ai_score_multiplier = ai_priority_map.get(
-                issue_analysis['ai_insights'].get('priority_level', 'medium').lower(),
-                1.0
-            )
-            score *= ai_score_multiplier
-        
-        return round(score, 2)
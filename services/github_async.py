@@ -0,0 +1,301 @@
+import asyncio
+from datetime import datetime
+import httpx
+from services.github_tokens import GitHubRateLimited, account_scoped, token_pool
+from services.ollama import AsyncOllamaService
+from services.scoring import IssueScoring, issue_references
+from core.config import Config
+from core.metrics import external_call
+
+def timestamp(value):
+    """GitHub's ISO 8601 timestamps as aware datetimes, like PyGithub returns them"""
+    return datetime.fromisoformat(value.replace('Z', '+00:00')) if value else None
+
+def _raise_rate_limited(results):
+    """Re-raise a rate limit among ``gather(..., return_exceptions=True)`` results"""
+    for result in results:
+        if isinstance(result, GitHubRateLimited):
+            raise result
+
+def reference(issue):
+    """Dependency entry for an issue given as GitHub's JSON"""
+    return {
+        'issue_number': issue['number'],
+        'title': issue['title'],
+        'state': issue['state'],
+        'created_at': timestamp(issue.get('created_at'))
+    }
+
+class TokenPoolTransport(httpx.AsyncBaseTransport):
+    """
+    httpx transport sending every request with a token from the pool
+
+    A request rejected by a rate limit goes out again with the next ready
+    token, so callers see it queued rather than failed. Requests to the
+    signed-in account's endpoints keep to the primary token.
+    """
+
+    def __init__(self, pool, transport):
+        self.pool = pool
+        self._transport = transport
+
+    async def handle_async_request(self, request):
+        primary = account_scoped(request.url.path)
+        while True:
+            token = await self.pool.acquire_async(primary)
+            if token.value:
+                request.headers['Authorization'] = f'Bearer {token.value}'
+            response = await self._transport.handle_async_request(request)
+            if not self.pool.record(token, response.status_code, response.headers):
+                return response
+            await response.aclose()
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+class AsyncGitHubService(IssueScoring):
+    """
+    GitHubService for async views, talking to the GitHub REST API over httpx
+
+    Results match GitHubService. Prioritization fetches and analyzes all open
+    issues concurrently, at most ``GITHUB_CONCURRENCY`` requests at a time,
+    and checks Ollama once per run instead of once per issue. Requests take
+    their token from the process-wide pool (``services.github_tokens``).
+    Use it as an async context manager so its connections are closed.
+    """
+
+    def __init__(self):
+        self.client = httpx.AsyncClient(base_url=Config.GITHUB_API_URL,
+                                        headers={'Accept': 'application/vnd.github+json'},
+                                        timeout=Config.GITHUB_TIMEOUT,
+                                        transport=TokenPoolTransport(token_pool(), httpx.AsyncHTTPTransport()))
+        self.ollama = AsyncOllamaService()
+        self._slots = asyncio.Semaphore(Config.GITHUB_CONCURRENCY)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        await self.client.aclose()
+        await self.ollama.aclose()
+
+    async def _get(self, path, **params):
+        async with self._slots:
+            # An empty params dict would drop the query of a pagination link
+            response = await self.client.get(path, params=params or None)
+        response.raise_for_status()
+        return response
+
+    async def _get_all(self, path, **params):
+        """Every item of a paginated listing, following the Link headers"""
+        response = await self._get(path, per_page=100, **params)
+        items = response.json()
+        while 'next' in response.links:
+            response = await self._get(response.links['next']['url'])
+            items.extend(response.json())
+        return items
+
+    @external_call('github', 'get_user_info')
+    async def get_user_info(self):
+        """Get authenticated user information"""
+        user = (await self._get('/user')).json()
+        return {
+            'login': user['login'],
+            'name': user.get('name'),
+            'email': user.get('email'),
+            'public_repos': user.get('public_repos'),
+            'followers': user.get('followers'),
+            'following': user.get('following')
+        }
+
+    @staticmethod
+    def _repository_summary(repo):
+        return {
+            'name': repo['name'],
+            'description': repo.get('description'),
+            'url': repo['html_url'],
+            'stars': repo.get('stargazers_count'),
+            'forks': repo.get('forks_count'),
+            'language': repo.get('language')
+        }
+
+    @external_call('github', 'list_repositories')
+    async def list_repositories(self, username=None):
+        """List repositories for a user or authenticated user"""
+        repos = await self._get_all(f'/users/{username}/repos' if username else '/user/repos')
+        return [self._repository_summary(repo) for repo in repos]
+
+    @external_call('github', 'list_repositories_page')
+    async def list_repositories_page(self, username=None, page=1, per_page=30):
+        """
+        ``(repositories, has_next)`` for one page of a user's (or the
+        authenticated user's) repositories, from a single GitHub request;
+        None when the user does not exist
+        """
+        try:
+            response = await self._get(f'/users/{username}/repos' if username else '/user/repos',
+                                       page=page, per_page=per_page)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 404:
+                return None
+            raise
+        return [self._repository_summary(repo) for repo in response.json()], 'next' in response.links
+
+    async def iter_repositories(self, username=None, page=1, per_page=30):
+        """Pages of repositories from ``page`` on, fetched one at a time as they are consumed"""
+        while True:
+            result = await self.list_repositories_page(username, page, per_page)
+            if result is None:
+                return
+            repos, has_next = result
+            yield repos
+            if not has_next:
+                return
+            page += 1
+
+    @external_call('github', 'get_repository')
+    async def get_repository(self, owner, repo_name):
+        """Get repository details"""
+        try:
+            repo = (await self._get(f'/repos/{owner}/{repo_name}')).json()
+            return {
+                'name': repo['name'],
+                'description': repo.get('description'),
+                'url': repo['html_url'],
+                'stars': repo.get('stargazers_count'),
+                'forks': repo.get('forks_count'),
+                'language': repo.get('language'),
+                'issues_count': repo.get('open_issues_count'),
+                'created_at': timestamp(repo.get('created_at')),
+                'updated_at': timestamp(repo.get('updated_at'))
+            }
+        except GitHubRateLimited:
+            raise
+        except Exception:
+            return None
+
+    async def _issue(self, owner, repo_name, issue_number):
+        return (await self._get(f'/repos/{owner}/{repo_name}/issues/{issue_number}')).json()
+
+    async def _analyze(self, issue, ollama_status=None):
+        async with self._slots:
+            ai_analysis = await self.ollama.analyze_issue(
+                {'title': issue['title'], 'body': issue.get('body')}, status=ollama_status)
+        return self._build_analysis(issue['number'], issue['title'], issue.get('body'), issue['state'],
+                                    timestamp(issue.get('created_at')), timestamp(issue.get('updated_at')),
+                                    ai_analysis)
+
+    async def _dependencies(self, owner, repo_name, issue):
+        referenced_issues = issue_references(issue.get('body'))
+        if issue.get('comments'):
+            comments = await self._get_all(f"/repos/{owner}/{repo_name}/issues/{issue['number']}/comments")
+            for comment in comments:
+                referenced_issues.update(issue_references(comment.get('body')))
+
+        referenced = await asyncio.gather(
+            *(self._issue(owner, repo_name, number) for number in sorted(referenced_issues)),
+            return_exceptions=True)
+        _raise_rate_limited(referenced)
+        return [reference(ref_issue) for ref_issue in referenced if not isinstance(ref_issue, BaseException)]
+
+    @external_call('github', 'analyze_issue')
+    async def analyze_issue(self, owner, repo_name, issue_number):
+        """Analyze a specific issue for complexity and impact"""
+        try:
+            return await self._analyze(await self._issue(owner, repo_name, issue_number))
+        except GitHubRateLimited:
+            raise
+        except Exception as e:
+            print(f"Error analyzing issue: {str(e)}")
+            return None
+
+    @external_call('github', 'analyze_issue_dependencies')
+    async def analyze_issue_dependencies(self, owner, repo_name, issue_number):
+        """Analyze dependencies between issues"""
+        try:
+            issue = await self._issue(owner, repo_name, issue_number)
+            dependencies = await self._dependencies(owner, repo_name, issue)
+            return {
+                'issue_number': issue_number,
+                'dependencies': dependencies,
+                'dependency_count': len(dependencies)
+            }
+        except GitHubRateLimited:
+            raise
+        except Exception:
+            return None
+
+    @external_call('github', 'refresh_issue')
+    async def refresh_issue(self, owner, repo_name, issue, analyze=True):
+        """
+        ``(analysis, dependencies)`` of an issue given as GitHub's JSON, such as
+        a webhook payload; the analysis is None unless ``analyze``
+        """
+        if not analyze:
+            return None, await self._dependencies(owner, repo_name, issue)
+        return tuple(await asyncio.gather(self._analyze(issue), self._dependencies(owner, repo_name, issue)))
+
+    async def _collect(self, owner, repo_name):
+        issues, ollama_status = await asyncio.gather(
+            self._get_all(f'/repos/{owner}/{repo_name}/issues', state='open'),
+            self.ollama.get_connection_status())
+
+        async def analyze(issue):
+            analysis, dependencies = await asyncio.gather(
+                self._analyze(issue, ollama_status),
+                self._dependencies(owner, repo_name, issue))
+            return issue['number'], analysis, dependencies
+
+        results = await asyncio.gather(*(analyze(issue) for issue in issues), return_exceptions=True)
+        _raise_rate_limited(results)
+        issue_analyses = {}
+        dependency_map = {}
+        for result in results:
+            if isinstance(result, BaseException):
+                continue
+            number, analysis, dependencies = result
+            issue_analyses[number] = analysis
+            dependency_map[number] = dependencies
+        return issue_analyses, dependency_map
+
+    @external_call('github', 'collect_issues')
+    async def collect_issues(self, owner, repo_name):
+        """``(issue_analyses, dependency_map)`` of every open issue, or None when they cannot be listed"""
+        try:
+            return await self._collect(owner, repo_name)
+        except GitHubRateLimited:
+            raise
+        except Exception:
+            return None
+
+    @external_call('github', 'prioritize_issues')
+    async def prioritize_issues(self, owner, repo_name):
+        """Prioritize issues based on score and dependencies; None when they cannot be listed"""
+        collected = await self.collect_issues(owner, repo_name)
+        return self._order_issues(*collected) if collected is not None else None
+
+def repository_pages(username=None, page=1, per_page=30):
+    """
+    ``iter_repositories`` as a plain generator, for a streamed WSGI response:
+    it runs on an event loop of its own, one page per iteration
+    """
+    async def pages():
+        async with AsyncGitHubService() as github:
+            async for repos in github.iter_repositories(username, page, per_page):
+                yield repos
+
+    iterator = pages()
+    loop = asyncio.new_event_loop()
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(iterator.__anext__())
+            except StopAsyncIteration:
+                return
+    finally:
+        # Also closes the client when the response is abandoned part way
+        loop.run_until_complete(iterator.aclose())
+        loop.close()
@@ -0,0 +1,171 @@
+import asyncio
+import threading
+import time
+import urllib.parse
+from core.config import Config
+from core.metrics import GITHUB_RATE_LIMITED, GITHUB_TOKEN_WAIT
+
+# Secondary rate limits without a Retry-After: GitHub asks for at least a minute
+SECONDARY_LIMIT_WAIT = 60
+
+class GitHubRateLimited(Exception):
+    """No token in the pool can make a request before the queue timeout"""
+
+    def __init__(self, retry_after):
+        super().__init__(f'Every GitHub token is rate limited for another {retry_after:.0f} s')
+        self.retry_after = retry_after
+
+class _Token:
+    __slots__ = ('index', 'value', 'level', 'updated', 'limit', 'remaining', 'reset_at', 'blocked_until')
+
+    def __init__(self, index, value, burst, now):
+        self.index = index
+        self.value = value
+        self.level = float(burst)
+        self.updated = now
+        self.limit = None
+        self.remaining = None  # unknown until GitHub reports it
+        self.reset_at = None
+        self.blocked_until = 0.0
+
+class TokenPool:
+    """
+    GitHub tokens handed out in turn, within each token's rate limits
+
+    Every token is paced by a token bucket (``rate`` requests per second,
+    bursts of ``burst``) and tracks the ``X-RateLimit-Remaining``/``Reset``
+    GitHub reports for it. A token that is out of requests, or was rejected
+    by a secondary rate limit, rests until its reset or ``Retry-After``.
+    Requests take the ready token with the most requests left; when none is
+    ready they wait for the first one that will be, unless that is more than
+    ``timeout`` seconds away (``GitHubRateLimited``). Requests acting as the
+    signed-in account (``primary``) always take the first token, so they see
+    and change one account. State is per process.
+    """
+
+    def __init__(self, tokens, rate, burst, timeout, clock=time.time):
+        self.rate = rate
+        self.burst = burst
+        self.timeout = timeout
+        self._clock = clock
+        now = clock()
+        # Without tokens, requests go out unauthenticated (60 an hour per IP)
+        self._tokens = [_Token(index, value, burst, now) for index, value in enumerate(tokens or [None])]
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._tokens)
+
+    def _ready_in(self, token, now):
+        """Seconds until ``token`` can make a request (0 when it can now)"""
+        token.level = min(self.burst, token.level + (now - token.updated) * self.rate)
+        token.updated = now
+        if token.reset_at is not None and now >= token.reset_at:
+            token.remaining, token.reset_at = None, None
+        waits = [token.blocked_until - now, (1 - token.level) / self.rate]
+        if token.remaining is not None and token.remaining <= 0:
+            waits.append(token.reset_at - now if token.reset_at is not None else SECONDARY_LIMIT_WAIT)
+        return max(0, *waits)
+
+    def _reserve(self, primary=False):
+        """``(token, 0)`` with one request taken from it, or ``(None, seconds to wait)``"""
+        with self._lock:
+            now = self._clock()
+            tokens = self._tokens[:1] if primary else self._tokens
+            waits = {token: self._ready_in(token, now) for token in tokens}
+            ready = [token for token, wait in waits.items() if wait == 0]
+            if not ready:
+                return None, min(waits.values())
+            token = max(ready, key=lambda token: (
+                float('inf') if token.remaining is None else token.remaining, token.level))
+            token.level -= 1
+            if token.remaining is not None:
+                token.remaining -= 1
+            return token, 0
+
+    def _queued(self, start, wait):
+        if self._clock() + wait - start > self.timeout:
+            raise GitHubRateLimited(wait)
+
+    def acquire(self, primary=False):
+        """The next token, blocking while every token is resting"""
+        start = self._clock()
+        while True:
+            token, wait = self._reserve(primary)
+            if token is not None:
+                GITHUB_TOKEN_WAIT.observe(self._clock() - start)
+                return token
+            self._queued(start, wait)
+            time.sleep(wait)
+
+    async def acquire_async(self, primary=False):
+        """``acquire`` for the event loop"""
+        start = self._clock()
+        while True:
+            token, wait = self._reserve(primary)
+            if token is not None:
+                GITHUB_TOKEN_WAIT.observe(self._clock() - start)
+                return token
+            self._queued(start, wait)
+            await asyncio.sleep(wait)
+
+    def record(self, token, status, headers):
+        """Update ``token`` from a response; True when a rate limit rejected the request"""
+        with self._lock:
+            now = self._clock()
+            if 'x-ratelimit-remaining' in headers:
+                token.remaining = int(float(headers['x-ratelimit-remaining']))
+            if 'x-ratelimit-limit' in headers:
+                token.limit = int(float(headers['x-ratelimit-limit']))
+            if 'x-ratelimit-reset' in headers:
+                token.reset_at = float(headers['x-ratelimit-reset'])
+
+            retry_after = headers.get('retry-after')
+            limited = status == 429 or (status == 403 and (token.remaining == 0 or retry_after is not None))
+            if not limited:
+                return False
+            if retry_after is not None:
+                token.blocked_until = now + float(retry_after)
+            elif token.remaining == 0 and token.reset_at is not None:
+                token.blocked_until = token.reset_at
+            else:
+                token.blocked_until = now + SECONDARY_LIMIT_WAIT
+        GITHUB_RATE_LIMITED.labels(str(token.index)).inc()
+        return True
+
+    def status(self):
+        """Per-token state, without the token values"""
+        with self._lock:
+            now = self._clock()
+            return [{
+                'token': token.index,
+                'remaining': token.remaining,
+                'limit': token.limit,
+                'reset_at': token.reset_at,
+                'ready_in': round(self._ready_in(token, now), 3),
+            } for token in self._tokens]
+
+def account_scoped(path):
+    """Whether an API path acts as the token's own account (``/user``, ``/user/repos``...)"""
+    base = urllib.parse.urlparse(Config.GITHUB_API_URL).path.rstrip('/')
+    if base and path.startswith(base + '/'):
+        path = path[len(base):]
+    return path == '/user' or path.startswith('/user/')
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def token_pool():
+    """The process-wide pool of ``GITHUB_TOKENS``"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = TokenPool(Config.GITHUB_TOKENS, Config.GITHUB_TOKEN_RATE, Config.GITHUB_TOKEN_BURST,
+                                  Config.GITHUB_QUEUE_TIMEOUT)
+    return _pool
+
+def reset_token_pool():
+    """Forget token state, e.g. in a freshly forked worker"""
+    global _pool
+    _pool = None
@@ -0,0 +1,158 @@
+import asyncio
+import hashlib
+import hmac
+import threading
+from core.database import db
+from services.github_async import AsyncGitHubService, reference, timestamp
+from services.github_tokens import GitHubRateLimited
+from services.issue_store import IssueStore
+
+# issues actions that change what the analysis reads (title, body, state)
+ANALYZED_ACTIONS = {'opened', 'edited', 'reopened'}
+# issue_comment actions; comments only add or remove references
+COMMENT_ACTIONS = {'created', 'edited', 'deleted'}
+
+def valid_signature(secret, body, signature):
+    """Whether ``signature`` (X-Hub-Signature-256) is the HMAC-SHA256 of ``body`` under ``secret``"""
+    if not signature or not signature.startswith('sha256='):
+        return False
+    expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(signature[len('sha256='):], expected)
+
+class IssueUpdate:
+    """
+    Change of one issue to apply to the stored results
+
+    ``action`` is ``refresh`` (analysis when ``analyze``, and dependencies),
+    ``close`` or ``delete``; closing keeps the issue in other issues'
+    dependencies with its new state, deleting drops it from them.
+    """
+    __slots__ = ('owner', 'repo_name', 'issue', 'action', 'analyze')
+
+    def __init__(self, owner, repo_name, issue, action, analyze=False):
+        self.owner = owner
+        self.repo_name = repo_name
+        self.issue = issue
+        self.action = action
+        self.analyze = analyze
+
+    @classmethod
+    def from_event(cls, event, payload):
+        """The update for a webhook delivery, or None when the event cannot change a prioritization"""
+        action = payload.get('action')
+        if event == 'issues' and action in ANALYZED_ACTIONS:
+            action, analyze = 'refresh', True
+        elif event == 'issues' and action == 'closed':
+            action, analyze = 'close', False
+        elif event == 'issues' and action in ('deleted', 'transferred'):
+            action, analyze = 'delete', False
+        elif event == 'issue_comment' and action in COMMENT_ACTIONS:
+            action, analyze = 'refresh', False
+        else:
+            return None
+        repository = payload['repository']
+        return cls(repository['owner']['login'], repository['name'], payload['issue'], action, analyze)
+
+    @property
+    def key(self):
+        return self.owner.lower(), self.repo_name.lower(), self.issue['number']
+
+    def merge(self, newer):
+        """One update with the effect of this one followed by ``newer``"""
+        return IssueUpdate(newer.owner, newer.repo_name, newer.issue, newer.action,
+                           newer.analyze or (self.analyze and newer.action == 'refresh'))
+
+def apply_update(update, store):
+    """Apply ``update`` to a tracked repository's stored results; False when there was nothing to do"""
+    repository = store.repository(update.owner, update.repo_name)
+    if repository is None:
+        return False
+    issue = update.issue
+    number = issue['number']
+    if update.action == 'refresh' and issue['state'] == 'open':
+        stored = store.issue(repository, number)
+        updated_at = timestamp(issue.get('updated_at'))
+        # Deliveries can arrive out of order; keep the newer state
+        if stored is not None and updated_at and stored[0]['updated_at'] and updated_at < stored[0]['updated_at']:
+            return False
+        analysis, dependencies = asyncio.run(_refresh(update, update.analyze or stored is None))
+        if analysis is None:
+            analysis = {**stored[0], 'updated_at': updated_at}
+        store.save_issue(repository, analysis, dependencies)
+    else:
+        store.remove_issue(repository, number)
+    store.update_references(repository, number, None if update.action == 'delete' else reference(issue))
+    db.session.commit()
+    return True
+
+async def _refresh(update, analyze):
+    async with AsyncGitHubService() as github:
+        return await github.refresh_issue(update.owner, update.repo_name, update.issue, analyze)
+
+class IssueUpdateQueue:
+    """
+    Webhook updates applied in arrival order on a background thread
+
+    Updates of an issue that is still waiting are merged, so a burst of edits
+    and comments costs one refresh. The thread starts with the first update
+    in each process. Updates not applied when the process exits are lost;
+    the next full listing of the repository corrects them.
+    """
+
+    def __init__(self):
+        self._reset()
+
+    def _reset(self):
+        self._pending = {}
+        self._unfinished = 0
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def after_fork(self):
+        """Forget updates and the thread inherited from the parent process"""
+        self._reset()
+
+    def put(self, app, update):
+        with self._condition:
+            queued = self._pending.get(update.key)
+            if queued is None:
+                self._pending[update.key] = (app, update)
+                self._unfinished += 1
+            else:
+                self._pending[update.key] = (app, queued[1].merge(update))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='github-issue-updates', daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def join(self, timeout=None):
+        """Wait until every queued update was applied; False on timeout"""
+        with self._condition:
+            return self._condition.wait_for(lambda: self._unfinished == 0, timeout)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending)
+                app, update = self._pending.pop(next(iter(self._pending)))
+            try:
+                self._apply(app, update)
+            finally:
+                with self._condition:
+                    self._unfinished -= 1
+                    self._condition.notify_all()
+
+    def _apply(self, app, update):
+        with app.app_context():
+            try:
+                apply_update(update, IssueStore(app.config['GITHUB_RESYNC_INTERVAL']))
+            except GitHubRateLimited as e:
+                db.session.rollback()
+                app.logger.warning('Update of %s/%s#%s skipped: %s', update.owner, update.repo_name,
+                                   update.issue['number'], e)
+            except Exception:
+                db.session.rollback()
+                app.logger.exception('Update of %s/%s#%s failed', update.owner, update.repo_name,
+                                     update.issue['number'])
+
+issue_updates = IssueUpdateQueue()
@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta
+from core.database import db
+from models.github_issue import StoredIssue, TrackedRepository
+from services.scoring import IssueScoring
+
+# Keys of analyses and dependencies holding datetimes, kept as ISO 8601 in JSON
+_TIMESTAMPS = ('created_at', 'updated_at')
+
+def _dump(item):
+    return {key: value.isoformat() if key in _TIMESTAMPS and value is not None else value
+            for key, value in item.items()}
+
+def _load(item):
+    return {key: datetime.fromisoformat(value) if key in _TIMESTAMPS and value is not None else value
+            for key, value in item.items()}
+
+class IssueStore(IssueScoring):
+    """
+    Stored prioritizations of tracked repositories
+
+    A repository is tracked from its first prioritization; afterwards its
+    prioritized issues are ordered from the stored analyses and dependencies,
+    which webhooks update one issue at a time. Stored results older than
+    ``max_age`` seconds are treated as missing, so a missed webhook is
+    corrected by the next full listing. Callers commit the session.
+    """
+
+    def __init__(self, max_age):
+        self.max_age = max_age
+
+    def repository(self, owner, repo_name):
+        """The tracked repository, or None"""
+        return db.session.scalars(db.select(TrackedRepository).filter_by(
+            owner=owner.lower(), name=repo_name.lower())).one_or_none()
+
+    def load(self, owner, repo_name):
+        """``(issue_analyses, dependency_map)`` as stored, or None when missing or expired"""
+        repository = self.repository(owner, repo_name)
+        if repository is None or repository.synced_at < datetime.utcnow() - timedelta(seconds=self.max_age):
+            return None
+        issue_analyses, dependency_map = {}, {}
+        for stored in repository.issues:
+            issue_analyses[stored.issue_number] = _load(stored.analysis)
+            dependency_map[stored.issue_number] = [_load(dependency) for dependency in stored.dependencies]
+        return issue_analyses, dependency_map
+
+    def prioritized(self, owner, repo_name):
+        """Prioritized issues from the stored results, or None when missing or expired"""
+        stored = self.load(owner, repo_name)
+        return self._order_issues(*stored) if stored is not None else None
+
+    def replace(self, owner, repo_name, issue_analyses, dependency_map):
+        """Store a full prioritization, tracking the repository from now on; returns its prioritized issues"""
+        repository = self.repository(owner, repo_name)
+        if repository is None:
+            repository = TrackedRepository(owner=owner.lower(), name=repo_name.lower())
+            db.session.add(repository)
+        repository.synced_at = datetime.utcnow()
+        # Rows are updated in place: replacing the collection would insert the
+        # new rows before deleting the old ones, against the unique issue number
+        stored = {issue.issue_number: issue for issue in repository.issues}
+        for number, issue in stored.items():
+            if number not in issue_analyses:
+                repository.issues.remove(issue)
+        for number, analysis in issue_analyses.items():
+            issue = stored.get(number)
+            if issue is None:
+                issue = StoredIssue(issue_number=number)
+                repository.issues.append(issue)
+            issue.analysis = _dump(analysis)
+            issue.dependencies = [_dump(dependency) for dependency in dependency_map.get(number, [])]
+        return self._order_issues(issue_analyses, dependency_map)
+
+    def issue(self, repository, issue_number):
+        """``(analysis, dependencies)`` stored for an issue, or None"""
+        stored = self._stored(repository, issue_number)
+        if stored is None:
+            return None
+        return _load(stored.analysis), [_load(dependency) for dependency in stored.dependencies]
+
+    def _stored(self, repository, issue_number):
+        return db.session.scalars(db.select(StoredIssue).filter_by(
+            repository_id=repository.id, issue_number=issue_number)).one_or_none()
+
+    def save_issue(self, repository, analysis, dependencies):
+        stored = self._stored(repository, analysis['issue_number'])
+        if stored is None:
+            stored = StoredIssue(issue_number=analysis['issue_number'])
+            repository.issues.append(stored)
+        stored.analysis = _dump(analysis)
+        stored.dependencies = [_dump(dependency) for dependency in dependencies]
+
+    def remove_issue(self, repository, issue_number):
+        stored = self._stored(repository, issue_number)
+        if stored is not None:
+            repository.issues.remove(stored)
+
+    def update_references(self, repository, issue_number, dependency):
+        """
+        Replace the entry for ``issue_number`` in the dependencies of every
+        stored issue that references it; ``dependency=None`` drops it
+        """
+        for stored in repository.issues:
+            if not any(entry['issue_number'] == issue_number for entry in stored.dependencies):
+                continue
+            stored.dependencies = [
+                _dump(dependency) if entry['issue_number'] == issue_number else entry
+                for entry in stored.dependencies
+                if dependency is not None or entry['issue_number'] != issue_number]
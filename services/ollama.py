@@ -1,4 +1,6 @@
+import asyncio
 import os
+import httpx
 import requests
 from typing import Dict, Any, Optional, Tuple
 import json
@@ -6,6 +8,7 @@ from core.config import Config
 import time
 from requests.adapters import HTTPAdapter
 from requests.packages.urllib3.util.retry import Retry
+from core.metrics import external_call
 
 class OllamaService:
     def __init__(self, model: str = None, max_retries: int = 3):
@@ -56,6 +59,7 @@ class OllamaService:
         session.mount("https://", adapter)
         return session
 
+    @external_call('ollama', 'connection_status')
     def get_connection_status(self) -> Dict[str, Any]:
         """
         Get detailed connection status including configuration and health
@@ -63,21 +67,8 @@ class OllamaService:
         Returns:
             Dict containing connection status details
         """
-        status = {
-            'configured': bool(self.base_url and self.model),
-            'base_url': self.base_url,
-            'model': self.model,
-            'is_healthy': False,
-            'health_details': '',
-            'available_models': [],
-            'errors': []
-        }
-        
+        status = self._new_status()
         if not status['configured']:
-            if not self.base_url:
-                status['errors'].append("Ollama API URL is not configured")
-            if not self.model:
-                status['errors'].append("Ollama model is not configured")
             return status
             
         try:
@@ -99,17 +90,7 @@ class OllamaService:
                     )
                     
                     if model_response.status_code == 200:
-                        models_data = model_response.json()
-                        if isinstance(models_data, dict) and 'models' in models_data:
-                            status['available_models'] = [
-                                model['name'] for model in models_data.get('models', [])
-                            ]
-                            
-                            if self.model not in status['available_models']:
-                                status['errors'].append(
-                                    f"Model '{self.model}' is not available. "
-                                    f"Available models: {', '.join(status['available_models'])}"
-                                )
+                        self._record_models(status, model_response.json())
                     else:
                         status['errors'].append("Failed to retrieve available models")
                         
@@ -132,8 +113,9 @@ class OllamaService:
         Returns:
             Tuple[bool, str]: (is_healthy, status_message)
         """
-        status = self.get_connection_status()
-        
+        return self._health_from_status(self.get_connection_status())
+
+    def _health_from_status(self, status: Dict[str, Any]) -> Tuple[bool, str]:
         if not status['configured']:
             return False, status['errors'][0]
             
@@ -148,6 +130,7 @@ class OllamaService:
             
         return True, "Ollama service is healthy and configured correctly"
 
+    @external_call('ollama', 'analyze_issue')
     def analyze_issue(self, issue_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """
         Analyze a GitHub issue using Ollama
@@ -183,19 +166,7 @@ class OllamaService:
                     
                     if response.status_code == 200:
                         try:
-                            result = json.loads(response.json()['response'])
-                            return {
-                                'technical_complexity': result.get('technical_complexity', 5),
-                                'impact_assessment': {
-                                    'security': result.get('impact_assessment', {}).get('security', 1),
-                                    'performance': result.get('impact_assessment', {}).get('performance', 1),
-                                    'ux': result.get('impact_assessment', {}).get('ux', 1)
-                                },
-                                'implementation_effort': result.get('implementation_effort', 'medium'),
-                                'priority_level': result.get('priority_level', 'medium'),
-                                'required_expertise': result.get('required_expertise', []),
-                                'potential_risks': result.get('potential_risks', [])
-                            }
+                            return self._parse_analysis(response.json())
                         except (json.JSONDecodeError, KeyError) as e:
                             print(f"Error parsing Ollama response: {str(e)}")
                             continue
@@ -228,9 +199,164 @@ class OllamaService:
             print(f"Error during Ollama analysis: {str(e)}")
             return None
             
+    def _new_status(self) -> Dict[str, Any]:
+        """Connection status before any request, with configuration errors filled in"""
+        status = {
+            'configured': bool(self.base_url and self.model),
+            'base_url': self.base_url,
+            'model': self.model,
+            'is_healthy': False,
+            'health_details': '',
+            'available_models': [],
+            'errors': []
+        }
+        
+        if not self.base_url:
+            status['errors'].append("Ollama API URL is not configured")
+        if not self.model:
+            status['errors'].append("Ollama model is not configured")
+        return status
+
+    def _record_models(self, status: Dict[str, Any], models_data: Any) -> None:
+        """Store the models listed by /api/tags and flag a missing configured model"""
+        if isinstance(models_data, dict) and 'models' in models_data:
+            status['available_models'] = [
+                model['name'] for model in models_data.get('models', [])
+            ]
+            
+            if self.model not in status['available_models']:
+                status['errors'].append(
+                    f"Model '{self.model}' is not available. "
+                    f"Available models: {', '.join(status['available_models'])}"
+                )
+
+    def _parse_analysis(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Analysis from a /api/generate response; raises JSONDecodeError or KeyError"""
+        result = json.loads(payload['response'])
+        return {
+            'technical_complexity': result.get('technical_complexity', 5),
+            'impact_assessment': {
+                'security': result.get('impact_assessment', {}).get('security', 1),
+                'performance': result.get('impact_assessment', {}).get('performance', 1),
+                'ux': result.get('impact_assessment', {}).get('ux', 1)
+            },
+            'implementation_effort': result.get('implementation_effort', 'medium'),
+            'priority_level': result.get('priority_level', 'medium'),
+            'required_expertise': result.get('required_expertise', []),
+            'potential_risks': result.get('potential_risks', [])
+        }
+
     def _generate_prompt(self, issue_data: Dict[str, Any]) -> str:
         """Generate analysis prompt for the issue"""
         return self._template.format(
             title=issue_data.get('title', ''),
             body=issue_data.get('body', '')
         )
+
+class AsyncOllamaService(OllamaService):
+    """
+    OllamaService for async views; the same checks and results over httpx
+
+    Pass the status from one ``get_connection_status()`` to ``analyze_issue``
+    when analyzing many issues, instead of checking the service per issue.
+    """
+
+    def _create_session(self) -> httpx.AsyncClient:
+        """Client retrying failed connections; status codes are retried in analyze_issue"""
+        return httpx.AsyncClient(transport=httpx.AsyncHTTPTransport(retries=self.max_retries))
+
+    async def aclose(self) -> None:
+        await self.session.aclose()
+
+    @external_call('ollama', 'connection_status')
+    async def get_connection_status(self) -> Dict[str, Any]:
+        """Get detailed connection status including configuration and health"""
+        status = self._new_status()
+        if not status['configured']:
+            return status
+
+        try:
+            health_response = await self.session.get(f"{self.base_url}/api/health", timeout=5)
+            status['is_healthy'] = health_response.status_code == 200
+            status['health_details'] = f"Health check status: {health_response.status_code}"
+
+            if status['is_healthy']:
+                try:
+                    model_response = await self.session.get(f"{self.base_url}/api/tags", timeout=5)
+                    if model_response.status_code == 200:
+                        self._record_models(status, model_response.json())
+                    else:
+                        status['errors'].append("Failed to retrieve available models")
+                except Exception as e:
+                    status['errors'].append(f"Error checking available models: {str(e)}")
+
+        except httpx.ConnectError:
+            status['errors'].append(f"Failed to connect to Ollama service at {self.base_url}")
+        except httpx.TimeoutException:
+            status['errors'].append("Connection to Ollama service timed out")
+        except Exception as e:
+            status['errors'].append(f"Unexpected error: {str(e)}")
+
+        return status
+
+    async def health_check(self) -> Tuple[bool, str]:
+        """Check if Ollama service is available and configured correctly"""
+        return self._health_from_status(await self.get_connection_status())
+
+    @external_call('ollama', 'analyze_issue')
+    async def analyze_issue(self, issue_data: Dict[str, Any],
+                            status: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """Analyze a GitHub issue using Ollama; None if the analysis fails"""
+        try:
+            if status is None:
+                status = await self.get_connection_status()
+            if not status['is_healthy'] or status['errors']:
+                return None
+
+            prompt = self._generate_prompt(issue_data)
+
+            for attempt in range(self.max_retries):
+                try:
+                    response = await self.session.post(
+                        f"{self.base_url}/api/generate",
+                        json={
+                            "model": self.model,
+                            "prompt": prompt,
+                            "stream": False
+                        },
+                        timeout=30
+                    )
+
+                    if response.status_code == 200:
+                        try:
+                            return self._parse_analysis(response.json())
+                        except (json.JSONDecodeError, KeyError) as e:
+                            print(f"Error parsing Ollama response: {str(e)}")
+                            continue
+                    elif response.status_code == 404:
+                        print(f"Model '{self.model}' not found")
+                        return None
+                    elif response.status_code >= 500 or response.status_code == 429:
+                        print(f"Server error (attempt {attempt + 1}/{self.max_retries})")
+                        if attempt < self.max_retries - 1:
+                            await asyncio.sleep(2 ** attempt)
+                            continue
+                    else:
+                        print(f"Unexpected status code: {response.status_code}")
+                        return None
+
+                except httpx.TimeoutException:
+                    print(f"Request timeout (attempt {attempt + 1}/{self.max_retries})")
+                    if attempt < self.max_retries - 1:
+                        await asyncio.sleep(2 ** attempt)
+                        continue
+                    return None
+                except httpx.HTTPError as e:
+                    print(f"Request failed: {str(e)}")
+                    return None
+
+            return None
+
+        except Exception as e:
+            print(f"Error during Ollama analysis: {str(e)}")
+            return None
@@ -0,0 +1,202 @@
+import re
+
+class IssueScoring:
+    """Heuristic issue scoring shared by the blocking and the async GitHub services"""
+
+    _security_keywords = {'security', 'vulnerability', 'exploit', 'csrf', 'xss', 'injection', 'authentication'}
+    _performance_keywords = {'performance', 'optimization', 'slow', 'memory', 'cpu', 'latency', 'bottleneck'}
+    _ux_keywords = {'usability', 'user experience', 'ux', 'ui', 'interface', 'accessibility', 'responsive'}
+
+    def _calculate_text_complexity(self, text):
+        """Calculate text complexity based on length and structure"""
+        if not text:
+            return 1
+
+        # Factors affecting complexity
+        words = len(text.split())
+        sentences = len(re.split(r'[.!?]+', text))
+        code_blocks = len(re.findall(r'```.*?```', text, re.DOTALL))
+        technical_terms = len(re.findall(r'\b(?:api|function|method|class|bug|error|exception)\b', text.lower()))
+
+        # Normalize and combine factors
+        complexity = (
+            min(words / 100, 5) +  # Length factor
+            min(sentences / 10, 2) +  # Structure factor
+            min(code_blocks * 0.5, 2) +  # Technical complexity
+            min(technical_terms * 0.2, 1)  # Domain complexity
+        )
+
+        return min(max(complexity, 1), 10)  # Ensure score is between 1-10
+
+    def _calculate_impact_scores(self, text):
+        """Calculate security, performance, and UX impact scores based on keyword analysis"""
+        text_lower = text.lower()
+
+        # Calculate impact scores based on keyword presence and context
+        security_score = sum(2 if kw in text_lower else 0 for kw in self._security_keywords)
+        performance_score = sum(2 if kw in text_lower else 0 for kw in self._performance_keywords)
+        ux_score = sum(2 if kw in text_lower else 0 for kw in self._ux_keywords)
+
+        # Normalize scores to 1-10 range
+        return {
+            'security': min(max(security_score, 1), 10),
+            'performance': min(max(performance_score, 1), 10),
+            'ux': min(max(ux_score, 1), 10)
+        }
+
+    def _estimate_implementation_time(self, complexity, impact_scores, ai_analysis=None):
+        """Estimate implementation time in hours based on complexity, impact scores, and AI analysis"""
+        base_time = complexity * 2  # Base time in hours
+        impact_factor = max(impact_scores.values()) / 10  # Impact factor 0-1
+
+        # Include AI analysis if available
+        if ai_analysis and isinstance(ai_analysis, dict):
+            ai_complexity = ai_analysis.get('technical_complexity', 5) / 10
+            effort_map = {'low': 0.7, 'medium': 1.0, 'high': 1.3}
+            ai_effort = effort_map.get(
+                ai_analysis.get('implementation_effort', 'medium').lower(),
+                1.0
+            )
+            return round(base_time * (1 + impact_factor) * ((ai_complexity + ai_effort) / 2))
+
+        return round(base_time * (1 + impact_factor))
+
+    def _build_analysis(self, issue_number, title, body, state, created_at, updated_at, ai_analysis=None):
+        """Analysis result for one issue, with AI insights when Ollama produced any"""
+        # Analyze issue content
+        content = f"{title}\n{body}"
+        complexity = self._calculate_text_complexity(content)
+        impact_scores = self._calculate_impact_scores(content)
+
+        # Estimate implementation time
+        implementation_time = self._estimate_implementation_time(
+            complexity,
+            impact_scores,
+            ai_analysis
+        )
+
+        # Base analysis results
+        analysis = {
+            'issue_number': issue_number,
+            'title': title,
+            'complexity': complexity,
+            'security_impact': impact_scores['security'],
+            'performance_impact': impact_scores['performance'],
+            'ux_impact': impact_scores['ux'],
+            'implementation_time': implementation_time,
+            'state': state,
+            'created_at': created_at,
+            'updated_at': updated_at
+        }
+
+        # Include AI insights if available
+        if ai_analysis:
+            analysis.update({
+                'ai_insights': {
+                    'technical_complexity': ai_analysis.get('technical_complexity'),
+                    'impact_assessment': ai_analysis.get('impact_assessment', {}),
+                    'implementation_effort': ai_analysis.get('implementation_effort'),
+                    'priority_level': ai_analysis.get('priority_level'),
+                    'required_expertise': ai_analysis.get('required_expertise', []),
+                    'potential_risks': ai_analysis.get('potential_risks', []),
+                    'suggestions': [
+                        f"Priority: {ai_analysis.get('priority_level', 'medium').title()} - Consider implementing this issue with {ai_analysis.get('implementation_effort', 'medium')} effort",
+                        *[f"Required expertise: {exp}" for exp in ai_analysis.get('required_expertise', [])],
+                        *[f"Risk consideration: {risk}" for risk in ai_analysis.get('potential_risks', [])]
+                    ]
+                }
+            })
+
+        return analysis
+
+    def _order_issues(self, issue_analyses, dependency_map):
+        """Issues by descending score, each preceded by the issues it depends on"""
+        # Calculate scores and create dependency graph
+        scores = {
+            num: self.score_issue(analysis)
+            for num, analysis in issue_analyses.items()
+        }
+
+        # Sort issues considering both score and dependencies
+        prioritized_issues = []
+        entered = set()
+
+        def emit(issue_num):
+            issue_data = {
+                **issue_analyses[issue_num],
+                'score': scores[issue_num],
+                'dependencies': dependency_map.get(issue_num, [])
+            }
+
+            # Include AI suggestions if available
+            if 'ai_insights' in issue_analyses[issue_num]:
+                issue_data['ai_insights'] = issue_analyses[issue_num]['ai_insights']
+
+            prioritized_issues.append(issue_data)
+
+        def process_issue(issue_num):
+            # Depth-first with an explicit stack, dependencies first. Issues are
+            # marked when entered, so references in a cycle (#1 -> #2 -> #1) end
+            # the walk instead of recursing forever.
+            if issue_num in entered:
+                return
+            entered.add(issue_num)
+            stack = [(issue_num, iter(dependency_map.get(issue_num, [])))]
+            while stack:
+                current, dependencies = stack[-1]
+                for dep in dependencies:
+                    dep_num = dep['issue_number']
+                    if dep_num in issue_analyses and dep_num not in entered:
+                        entered.add(dep_num)
+                        stack.append((dep_num, iter(dependency_map.get(dep_num, []))))
+                        break
+                else:
+                    stack.pop()
+                    emit(current)
+
+        # Process all issues
+        for issue_num in sorted(scores, key=scores.get, reverse=True):
+            process_issue(issue_num)
+
+        return prioritized_issues
+
+    def score_issue(self, issue_analysis):
+        """Calculate composite score for an issue"""
+        if not issue_analysis:
+            return 0
+
+        # Weights for different factors
+        weights = {
+            'complexity': 0.25,
+            'security_impact': 0.3,
+            'performance_impact': 0.2,
+            'ux_impact': 0.15,
+            'implementation_time': 0.1
+        }
+
+        # Normalize implementation time to 1-10 scale
+        normalized_time = min(10, max(1, 10 - (issue_analysis['implementation_time'] / 8)))
+
+        # Calculate weighted score
+        score = (
+            weights['complexity'] * issue_analysis['complexity'] +
+            weights['security_impact'] * issue_analysis['security_impact'] +
+            weights['performance_impact'] * issue_analysis['performance_impact'] +
+            weights['ux_impact'] * issue_analysis['ux_impact'] +
+            weights['implementation_time'] * normalized_time
+        )
+
+        # Adjust score based on AI insights if available
+        if 'ai_insights' in issue_analysis:
+            ai_priority_map = {'low': 0.8, 'medium': 1.0, 'high': 1.2}
+            ai_score_multiplier = ai_priority_map.get(
+                issue_analysis['ai_insights'].get('priority_level', 'medium').lower(),
+                1.0
+            )
+            score *= ai_score_multiplier
+
+        return round(score, 2)
+
+def issue_references(text):
+    """Issue numbers referenced as ``#123`` in an issue body or comment"""
+    return {int(num) for num in re.findall(r'#(\d+)', text or '')}
@@ -0,0 +1,67 @@
+import csv
+import io
+import json
+from sqlalchemy import select
+from core.database import db
+from models.user import User
+from models.role import Role, user_roles
+
+EXPORT_COLUMNS = ['id', 'username', 'email', 'is_active', 'created_at', 'roles']
+
+class UserExportService:
+    """Stream every user with roles in constant memory"""
+
+    def __init__(self, batch_size=1000):
+        self.batch_size = batch_size
+
+    def iter_batches(self):
+        """
+        Yield lists of user dicts, one list per server-side cursor batch
+
+        Rows are read as plain column tuples (no ORM identity map) with
+        ``yield_per``, and the roles of each batch are fetched with one query.
+        """
+        result = db.session.execute(
+            select(User.id, User.username, User.email, User.is_active, User.created_at)
+            .order_by(User.id)
+            .execution_options(yield_per=self.batch_size)
+        )
+        for partition in result.partitions():
+            roles = {row.id: [] for row in partition}
+            role_rows = db.session.execute(
+                select(user_roles.c.user_id, Role.name)
+                .join(Role, Role.id == user_roles.c.role_id)
+                .where(user_roles.c.user_id.in_(list(roles)))
+                .order_by(user_roles.c.user_id, Role.name)
+            )
+            for user_id, role_name in role_rows:
+                roles[user_id].append(role_name)
+
+            yield [{
+                'id': row.id,
+                'username': row.username,
+                'email': row.email,
+                'is_active': row.is_active,
+                'created_at': row.created_at.isoformat() if row.created_at else None,
+                'roles': roles[row.id]
+            } for row in partition]
+
+    def iter_ndjson(self):
+        """Yield newline-delimited JSON, one chunk per batch"""
+        for batch in self.iter_batches():
+            yield ''.join(json.dumps(user, separators=(',', ':')) + '\n' for user in batch)
+
+    def iter_csv(self):
+        """Yield CSV with a header row, one chunk per batch; roles are ';'-separated"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_COLUMNS)
+        yield buffer.getvalue()
+
+        for batch in self.iter_batches():
+            buffer.seek(0)
+            buffer.truncate()
+            for user in batch:
+                writer.writerow([*(user[column] for column in EXPORT_COLUMNS[:-1]),
+                                 ';'.join(user['roles'])])
+            yield buffer.getvalue()
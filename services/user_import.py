@@ -0,0 +1,118 @@
+import csv
+import io
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import insert, or_, select
+from werkzeug.security import generate_password_hash
+from core.config import Config
+from core.database import db
+from models.user import User
+from models.role import Role, user_roles
+from api.schemas import users_schema
+
+class UserImportService:
+    """Bulk user creation with one conflict query and batched inserts"""
+
+    def __init__(self, batch_size=None, hash_workers=None, default_role='user'):
+        self.batch_size = batch_size or Config.BULK_IMPORT_BATCH_SIZE
+        self.hash_workers = hash_workers or Config.BULK_IMPORT_HASH_WORKERS
+        self.default_role = default_role
+
+    @staticmethod
+    def parse_csv(text):
+        """Parse CSV with a username,email,password header into row dicts"""
+        reader = csv.DictReader(io.StringIO(text))
+        return [
+            {key.strip(): (value or '').strip() for key, value in row.items() if key}
+            for row in reader
+        ]
+
+    def import_users(self, rows):
+        """
+        Validate and insert users, reporting a result for every input row
+
+        Args:
+            rows: List of dicts with username, email and password
+
+        Returns:
+            Dict with created/failed counts and per-row results
+        """
+        results = [None] * len(rows)
+        validation_errors = users_schema.validate(rows)
+
+        # Rows that passed validation and are unique within this upload
+        candidates = []
+        seen_usernames, seen_emails = set(), set()
+        for index, row in enumerate(rows):
+            if index in validation_errors:
+                results[index] = {'row': index, 'status': 'invalid', 'errors': validation_errors[index]}
+            elif row['username'] in seen_usernames or row['email'] in seen_emails:
+                results[index] = {'row': index, 'status': 'duplicate',
+                                  'errors': {'_row': ['Duplicate username or email in upload']}}
+            else:
+                seen_usernames.add(row['username'])
+                seen_emails.add(row['email'])
+                candidates.append(index)
+
+        # One query for every username/email that already exists
+        existing_usernames, existing_emails = set(), set()
+        if candidates:
+            existing = db.session.execute(
+                select(User.username, User.email).where(or_(
+                    User.username.in_(seen_usernames),
+                    User.email.in_(seen_emails)
+                ))
+            )
+            for username, email in existing:
+                existing_usernames.add(username)
+                existing_emails.add(email)
+
+        to_create = []
+        for index in candidates:
+            row = rows[index]
+            errors = {}
+            if row['username'] in existing_usernames:
+                errors['username'] = ['Username already exists']
+            if row['email'] in existing_emails:
+                errors['email'] = ['Email already exists']
+            if errors:
+                results[index] = {'row': index, 'status': 'conflict', 'errors': errors}
+            else:
+                to_create.append(index)
+
+        # Password hashing dominates the cost; hashlib releases the GIL
+        with ThreadPoolExecutor(max_workers=self.hash_workers) as executor:
+            password_hashes = list(executor.map(
+                generate_password_hash, (rows[index]['password'] for index in to_create)
+            ))
+
+        role_id = db.session.execute(
+            select(Role.id).where(Role.name == self.default_role)
+        ).scalar_one_or_none()
+
+        for start in range(0, len(to_create), self.batch_size):
+            batch = to_create[start:start + self.batch_size]
+            created = db.session.execute(
+                insert(User).returning(User.id, sort_by_parameter_order=True),
+                [{
+                    'username': rows[index]['username'],
+                    'email': rows[index]['email'],
+                    'password_hash': password_hashes[start + offset]
+                } for offset, index in enumerate(batch)]
+            ).scalars().all()
+
+            if role_id is not None:
+                db.session.execute(
+                    insert(user_roles),
+                    [{'user_id': user_id, 'role_id': role_id} for user_id in created]
+                )
+
+            for index, user_id in zip(batch, created):
+                results[index] = {'row': index, 'status': 'created', 'id': user_id}
+
+        db.session.commit()
+
+        return {
+            'created': len(to_create),
+            'failed': len(rows) - len(to_create),
+            'results': results
+        }
@@ -1,7 +1,11 @@
+import os
 import pytest
+
+# Selects TestConfig, which core.config picks once at import
+os.environ['FLASK_TESTING'] = 'true'
+
 from app import create_app
 from core.database import db
-import os
 
 @pytest.fixture(scope='session')
 def app():
@@ -0,0 +1,39 @@
+from contextlib import contextmanager
+from sqlalchemy import event
+from core.database import db
+
+class QueryCounter:
+    """Statements executed while a count_queries() block was active"""
+
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def __str__(self):
+        return '\n'.join(f'{i + 1}: {statement}' for i, statement in enumerate(self.statements))
+
+@contextmanager
+def count_queries(engine=None):
+    """Record every SQL statement sent to the database inside the block"""
+    engine = engine or db.engine
+    counter = QueryCounter()
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        counter.statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+@contextmanager
+def query_budget(budget, engine=None):
+    """Fail if the block sends more than ``budget`` statements to the database"""
+    with count_queries(engine) as counter:
+        yield counter
+    if counter.count > budget:
+        raise AssertionError(f'{counter.count} queries exceeded the budget of {budget}:\n{counter}')
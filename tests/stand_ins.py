@@ -0,0 +1,176 @@
+import json
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+MODEL = 'llama2'
+CREATED = '2024-01-02T03:04:05Z'
+
+def _issue(base, number):
+    # Every issue references the previous one, so prioritization has dependencies to order
+    body = f'Login is slow and leaks memory, see #{number - 1}' if number > 1 else 'Security review of the API'
+    return {'number': number, 'title': f'Issue {number}', 'body': body, 'state': 'open',
+            'comments': 1 if number % 2 == 0 else 0, 'created_at': CREATED, 'updated_at': CREATED,
+            'url': f'{base}/repos/octo/hive/issues/{number}'}
+
+def _repo(base, name):
+    return {'name': name, 'description': f'{name} repository', 'html_url': f'https://github.com/octo/{name}',
+            'clone_url': f'https://github.com/octo/{name}.git', 'stargazers_count': 3, 'forks_count': 1,
+            'language': 'Python', 'open_issues_count': 0, 'created_at': CREATED, 'updated_at': CREATED,
+            'full_name': f'octo/{name}', 'url': f'{base}/repos/octo/{name}'}
+
+class StandInServer:
+    """
+    GitHub REST and Ollama endpoints on a local port, for tests and benchmarks
+
+    Point ``GITHUB_API_URL`` and ``OLLAMA_API_URL`` at ``url``. Every response
+    is delayed by ``latency`` seconds to stand in for the network; requests
+    are served on their own threads, so slow calls overlap like they do
+    against the real services. Listings are paginated with at most
+    ``page_size`` items per page. Users ``octo`` and the authenticated user
+    own ``repos`` repositories, ``hive`` and ``comb`` first; repository
+    ``missing`` does not exist.
+
+    With ``rate_limit``, every token (Authorization header) gets that many
+    GitHub requests per ``rate_window`` seconds, reported in ``X-RateLimit-*``
+    headers; further requests get GitHub's 403 until the window resets.
+    ``token_requests`` counts GitHub requests per token.
+    """
+
+    def __init__(self, issues=10, latency=0.0, page_size=100, port=0, rate_limit=None, rate_window=60, repos=2):
+        self.issues = issues
+        self.repos = ['hive', 'comb', *(f'repo-{n}' for n in range(3, repos + 1))][:repos]
+        self.latency = latency
+        self.page_size = page_size
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.requests = 0
+        self.token_requests = Counter()
+        self._windows = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def route(self, method, path, query, body):
+        """``(status, payload, headers)`` for a request"""
+        if method == 'POST' and path == '/api/generate':
+            analysis = {'technical_complexity': 6, 'impact_assessment': {'security': 7, 'performance': 5, 'ux': 2},
+                        'implementation_effort': 'medium', 'priority_level': 'high',
+                        'required_expertise': ['python'], 'potential_risks': ['regressions']}
+            return 200, {'model': body.get('model'), 'response': json.dumps(analysis)}, {}
+        if method == 'GET' and path == '/api/health':
+            return 200, {'status': 'ok'}, {}
+        if method == 'GET' and path == '/api/tags':
+            return 200, {'models': [{'name': MODEL}]}, {}
+        if method == 'GET' and path in ('/user', '/users/octo'):
+            return 200, {'login': 'octo', 'name': 'Octo Cat', 'email': 'octo@example.com', 'public_repos': 2,
+                         'followers': 5, 'following': 1, 'url': f'{self.url}/users/octo'}, {}
+        if method == 'GET' and path in ('/user/repos', '/users/octo/repos'):
+            return self._page(path, query, [_repo(self.url, name) for name in self.repos])
+
+        match = re.fullmatch(r'/repos/([^/]+)/([^/]+)(/issues(?:/(\d+)(/comments)?)?)?', path)
+        if method != 'GET' or not match or match.group(2) == 'missing':
+            return 404, {'message': 'Not Found'}, {}
+        owner, name, issues, number, comments = match.groups()
+        if not issues:
+            return 200, {**_repo(self.url, name), 'open_issues_count': self.issues}, {}
+        if number is None:
+            return self._page(path, query, [_issue(self.url, n) for n in range(1, self.issues + 1)])
+        number = int(number)
+        if not 1 <= number <= self.issues:
+            return 404, {'message': 'Not Found'}, {}
+        if comments:
+            return self._page(path, query, [{'id': number, 'body': f'Blocked on #{max(number - 2, 1)}'}]
+                              if number % 2 == 0 else [])
+        return 200, _issue(self.url, number), {}
+
+    def limit(self, path, authorization):
+        """``(rejected, headers)`` of the rate limit for a GitHub request"""
+        if path.startswith('/api/'):
+            return False, {}  # Ollama
+        token = authorization.split()[-1] if authorization else None
+        with self._lock:
+            self.token_requests[token] += 1
+            if self.rate_limit is None:
+                return False, {}
+            now = time.time()
+            reset, used = self._windows.get(token, (0, 0))
+            if now >= reset:
+                reset, used = now + self.rate_window, 0
+            rejected = used >= self.rate_limit
+            self._windows[token] = (reset, used + (not rejected))
+            remaining = self.rate_limit - self._windows[token][1]
+        return rejected, {'X-RateLimit-Limit': str(self.rate_limit), 'X-RateLimit-Remaining': str(remaining),
+                          'X-RateLimit-Reset': f'{reset:.3f}'}
+
+    def _page(self, path, query, items):
+        size = min(int(query.get('per_page', [30])[0]), self.page_size)
+        page = int(query.get('page', [1])[0])
+        headers = {}
+        if page * size < len(items):
+            headers['Link'] = f'<{self.url}{path}?per_page={size}&page={page + 1}>; rel="next"'
+        return 200, items[(page - 1) * size:page * size], headers
+
+    def _handler(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # One write per response; split writes stall keep-alive clients on delayed ACKs
+            wbufsize = 64 * 1024
+            disable_nagle_algorithm = True
+
+            def _respond(self):
+                with stand_in._lock:
+                    stand_in.requests += 1
+                if stand_in.latency:
+                    time.sleep(stand_in.latency)
+                url = urlparse(self.path)
+                length = int(self.headers.get('Content-Length') or 0)
+                body = json.loads(self.rfile.read(length)) if length else {}
+                path = url.path.rstrip('/') or '/'
+                rejected, limit_headers = stand_in.limit(path, self.headers.get('Authorization'))
+                if rejected:
+                    status, payload, headers = 403, {'message': 'API rate limit exceeded'}, {}
+                else:
+                    status, payload, headers = stand_in.route(self.command, path, parse_qs(url.query), body)
+                headers = {**limit_headers, **headers}
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = _respond
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,133 @@
+import unittest
+import gzip
+import os
+import re
+import shutil
+import tempfile
+from flask import url_for
+from app import create_app
+from core.assets import StaticAssets, brotli, precompress
+
+STYLE = b'body { color: #333; }\n' * 400
+
+class TestStaticAssets(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        os.environ['FLASK_TESTING'] = 'true'
+        cls.directory = tempfile.mkdtemp()
+        cls.app = create_app()
+        cls.assets = StaticAssets()
+        cls.assets.init_app(cls.app)
+        cls.assets.mount(cls.app, 'test_assets', '/test-assets', [cls.directory])
+        cls.client = cls.app.test_client()
+
+    def setUp(self):
+        for name in os.listdir(self.directory):
+            os.remove(os.path.join(self.directory, name))
+        self.write('style.css', STYLE)
+        self.write('logo.png', b'\x89PNG' + bytes(range(256)) * 4)
+        self.assets.clear()
+        self.app.config['ASSETS_CACHE_MAX_FILE_SIZE'] = 256 * 1024
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.directory, ignore_errors=True)
+        os.environ.pop('FLASK_TESTING', None)
+
+    def write(self, name, data):
+        path = os.path.join(self.directory, name)
+        with open(path, 'wb') as handle:
+            handle.write(data)
+        return path
+
+    def url(self, filename):
+        with self.app.test_request_context():
+            return url_for('test_assets', filename=filename)
+
+    def get(self, url, encoding=None, **headers):
+        if encoding:
+            headers['Accept-Encoding'] = encoding
+        response = self.client.get(url, headers=headers)
+        response.get_data()
+        response.close()
+        return response
+
+    def test_versioned_url_is_immutable(self):
+        url = self.url('style.css')
+        self.assertRegex(url, r'^/test-assets/style\.[0-9a-f]{12}\.css$')
+
+        response = self.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, STYLE)
+        self.assertEqual(response.headers['Cache-Control'], 'public, max-age=31536000, immutable')
+
+        plain = self.get('/test-assets/style.css')
+        self.assertEqual(plain.data, STYLE)
+        self.assertEqual(plain.headers['Cache-Control'], 'public, no-cache')
+        self.assertEqual(plain.headers['ETag'], response.headers['ETag'])
+
+    def test_changed_file_gets_new_url(self):
+        url = self.url('style.css')
+        path = self.write('style.css', STYLE + b'a { color: red; }\n')
+        os.utime(path, ns=(os.stat(path).st_atime_ns, os.stat(path).st_mtime_ns + 10**9))
+
+        self.assertNotEqual(self.url('style.css'), url)
+        # An old page still gets the current file, but revalidates it
+        stale = self.get(url)
+        self.assertEqual(stale.status_code, 200)
+        self.assertTrue(stale.data.endswith(b'red; }\n'))
+        self.assertEqual(stale.headers['Cache-Control'], 'public, no-cache')
+
+    def test_not_modified(self):
+        response = self.get(self.url('logo.png'))
+        self.assertNotIn('Vary', response.headers)
+        again = self.get(self.url('logo.png'), **{'If-None-Match': response.headers['ETag']})
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.data, b'')
+
+    def test_compressed_in_memory(self):
+        response = self.get(self.url('style.css'), encoding='gzip')
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        self.assertEqual(gzip.decompress(response.data), STYLE)
+        self.assertTrue(response.headers['ETag'].endswith('-gzip"'))
+
+        identity = self.get(self.url('style.css'))
+        self.assertNotIn('Content-Encoding', identity.headers)
+        self.assertNotEqual(identity.headers['ETag'], response.headers['ETag'])
+        # Images are served as they are
+        self.assertNotIn('Content-Encoding', self.get(self.url('logo.png'), encoding='gzip').headers)
+
+    def test_precompressed_from_disk(self):
+        self.app.config['ASSETS_CACHE_MAX_FILE_SIZE'] = 0
+        self.assertNotIn('Content-Encoding', self.get(self.url('style.css'), encoding='gzip').headers)
+
+        written = precompress(self.directory)
+        self.assertIn(os.path.join(self.directory, 'style.css.gz'), written)
+        self.assertFalse(any(path.startswith(os.path.join(self.directory, 'logo.png')) for path in written))
+        self.assertEqual(precompress(self.directory), [])
+
+        response = self.get(self.url('style.css'), encoding='gzip')
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.data), STYLE)
+        if brotli is not None:
+            response = self.get(self.url('style.css'), encoding='br, gzip')
+            self.assertEqual(response.headers['Content-Encoding'], 'br')
+            self.assertEqual(brotli.decompress(response.data), STYLE)
+
+    def test_missing_and_outside_files(self):
+        self.assertEqual(self.get('/test-assets/missing.css').status_code, 404)
+        self.assertEqual(self.get('/test-assets/missing.0123456789ab.css').status_code, 404)
+        self.assertEqual(self.get('/test-assets/../app.py').status_code, 404)
+
+    def test_swagger_ui_assets(self):
+        page = self.client.get('/').get_data(as_text=True)
+        urls = re.findall(r'(?:href|src)="(/swaggerui/[^"]+)"', page)
+        self.assertTrue(urls)
+        for url in urls:
+            response = self.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            self.assertIn('immutable', response.headers['Cache-Control'], url)
+
+if __name__ == '__main__':
+    unittest.main()
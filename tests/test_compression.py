@@ -0,0 +1,115 @@
+import unittest
+import os
+import gzip
+import json
+import zlib
+from app import create_app
+from core.compression import brotli
+from core.database import db
+from models.user import User
+from models.role import Role
+
+class TestCompression(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        os.environ['FLASK_TESTING'] = 'true'
+        cls.app = create_app()
+        cls.client = cls.app.test_client()
+        cls.app_context = cls.app.app_context()
+        cls.app_context.push()
+
+    def setUp(self):
+        db.session.remove()
+        db.drop_all()
+        db.create_all()
+
+        admin_role = Role(name='admin', description='Administrator role')
+        admin = User(username='admin_test', email='admin@test.com')
+        admin.set_password('admin123')
+        admin.roles.append(admin_role)
+        db.session.add(admin)
+        for i in range(200):
+            db.session.add(User(username=f'user_{i}', email=f'user_{i}@test.com', password_hash='x'))
+        db.session.commit()
+
+        response = self.client.post('/api/v1/auth/login',
+            json={'username': 'admin_test', 'password': 'admin123'})
+        token = json.loads(response.data.decode())['access_token']
+        self.headers = {'Authorization': f'Bearer {token}'}
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+
+    @classmethod
+    def tearDownClass(cls):
+        db.session.remove()
+        db.engine.dispose()
+        cls.app_context.pop()
+        os.environ.pop('FLASK_TESTING', None)
+
+    def get_users(self, encoding=None):
+        headers = dict(self.headers)
+        if encoding:
+            headers['Accept-Encoding'] = encoding
+        return self.client.get('/api/v1/api/users', headers=headers)
+
+    def test_gzip_json(self):
+        plain = self.get_users()
+        self.assertNotIn('Content-Encoding', plain.headers)
+        self.assertIn('Accept-Encoding', plain.headers['Vary'])
+
+        response = self.get_users('gzip')
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertLess(len(response.data), len(plain.data))
+        self.assertEqual(int(response.headers['Content-Length']), len(response.data))
+        self.assertEqual(gzip.decompress(response.data), plain.data)
+
+    @unittest.skipIf(brotli is None, 'brotli is not installed')
+    def test_brotli_preferred(self):
+        response = self.get_users('gzip, deflate, br')
+        self.assertEqual(response.headers['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.data), self.get_users().data)
+
+    def test_client_preference_and_refusal(self):
+        self.assertEqual(self.get_users('br;q=0.5, gzip').headers['Content-Encoding'], 'gzip')
+        self.assertNotIn('Content-Encoding', self.get_users('identity').headers)
+
+    def test_small_responses_are_not_compressed(self):
+        response = self.client.get('/api/v1/api/profile',
+            headers={**self.headers, 'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Content-Encoding', response.headers)
+
+    def test_etag_becomes_weak_when_compressed(self):
+        self.app.config['COMPRESS_MIN_SIZE'] = 0
+        try:
+            response = self.client.get('/api/v1/api/profile',
+                headers={**self.headers, 'Accept-Encoding': 'gzip'})
+        finally:
+            self.app.config['COMPRESS_MIN_SIZE'] = 1024
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertTrue(response.headers['ETag'].startswith('W/"'))
+
+        revalidated = self.client.get('/api/v1/api/profile', headers={
+            **self.headers, 'If-None-Match': response.headers['ETag']})
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_streamed_export(self):
+        response = self.client.get('/api/v1/api/users/export?format=ndjson',
+            headers={**self.headers, 'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertNotIn('Content-Length', response.headers)
+        lines = zlib.decompress(response.data, 16 + zlib.MAX_WBITS).decode().splitlines()
+        self.assertEqual(len(lines), 201)
+
+    def test_static_assets_are_encoded_once(self):
+        # Static assets carry their own (precompressed) encoding; it is not compressed again
+        response = self.client.get('/swaggerui/swagger-ui.css', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        with open(os.path.join(self.app.root_path, 'static', 'swagger-ui', 'swagger-ui.css'), 'rb') as handle:
+            self.assertEqual(gzip.decompress(response.data), handle.read())
+        response.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import unittest
+import os
+import json
+from unittest.mock import patch
+from sqlalchemy.orm.exc import StaleDataError
+from app import create_app
+from core.database import db
+from models.user import User
+from models.role import Role
+from query_counter import count_queries
+
+class TestConditionalGet(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        os.environ['FLASK_TESTING'] = 'true'
+        cls.app = create_app()
+        cls.client = cls.app.test_client()
+        cls.app_context = cls.app.app_context()
+        cls.app_context.push()
+
+    def setUp(self):
+        db.session.remove()
+        db.drop_all()
+        db.create_all()
+
+        admin_role = Role(name='admin', description='Administrator role')
+        db.session.add(admin_role)
+        self.admin = User(username='admin_test', email='admin@test.com')
+        self.admin.set_password('admin123')
+        self.admin.roles.append(admin_role)
+        self.other = User(username='other', email='other@test.com', password_hash='x')
+        db.session.add_all([self.admin, self.other])
+        db.session.commit()
+
+        response = self.client.post('/api/v1/auth/login',
+            json={'username': 'admin_test', 'password': 'admin123'})
+        token = json.loads(response.data.decode())['access_token']
+        self.headers = {'Authorization': f'Bearer {token}'}
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+
+    @classmethod
+    def tearDownClass(cls):
+        db.session.remove()
+        db.engine.dispose()
+        cls.app_context.pop()
+        os.environ.pop('FLASK_TESTING', None)
+
+    def _revalidate(self, path, etag):
+        return self.client.get(path, headers={**self.headers, 'If-None-Match': etag})
+
+    def test_profile_not_modified(self):
+        """Profile answers 304 until the user row changes"""
+        response = self.client.get('/api/v1/api/profile', headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Cache-Control'], 'private, no-cache')
+        etag = response.headers['ETag']
+
+        response = self._revalidate('/api/v1/api/profile', etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b'')
+
+        self.admin.email = 'changed@test.com'
+        db.session.commit()
+        response = self._revalidate('/api/v1/api/profile', etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+    def test_user_not_modified_without_loading_user(self):
+        """A matching ETag is answered from the version column alone"""
+        path = f'/api/v1/api/users/{self.other.id}'
+        etag = self.client.get(path, headers=self.headers).headers['ETag']
+        db.session.remove()
+
+        with count_queries() as counter:
+            response = self._revalidate(path, etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertIn('users.version', counter.statements[-1])
+        self.assertNotIn('users.email', counter.statements[-1])
+
+    def test_role_list_etag_changes_on_insert(self):
+        """Creating a role invalidates the role list ETag"""
+        etag = self.client.get('/api/v1/api/roles', headers=self.headers).headers['ETag']
+        self.assertEqual(self._revalidate('/api/v1/api/roles', etag).status_code, 304)
+
+        db.session.add(Role(name='user', description='Regular user role'))
+        db.session.commit()
+        self.assertEqual(self._revalidate('/api/v1/api/roles', etag).status_code, 200)
+
+    def test_role_list_etag_changes_when_newest_role_is_replaced(self):
+        """Deleting the newest role and creating another never reuses its id"""
+        db.session.add(Role(name='user', description='Regular user role'))
+        db.session.commit()
+        etag = self.client.get('/api/v1/api/roles', headers=self.headers).headers['ETag']
+
+        db.session.delete(Role.query.filter_by(name='user').one())
+        db.session.commit()
+        db.session.add(Role(name='auditor', description='Auditor role'))
+        db.session.commit()
+        self.assertEqual(self._revalidate('/api/v1/api/roles', etag).status_code, 200)
+
+    def test_concurrent_update_is_a_conflict(self):
+        """A write over a row changed by another request answers 409"""
+        with patch('api.resources.UserImportService.import_users',
+                   side_effect=StaleDataError('users row changed')):
+            response = self.client.post('/api/v1/api/users/import', headers=self.headers, json=[])
+        self.assertEqual(response.status_code, 409)
+
+if __name__ == '__main__':
+    unittest.main()
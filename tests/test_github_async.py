@@ -0,0 +1,226 @@
+import unittest
+import os
+import asyncio
+import json
+from datetime import timedelta
+from unittest.mock import patch
+from flask_jwt_extended import create_access_token
+from flask_jwt_extended.exceptions import (
+    JWTExtendedException, NoAuthorizationError, UserClaimsVerificationError, WrongTokenError)
+from jwt.exceptions import DecodeError
+from app import create_app
+from core.config import Config
+from core.database import db
+from core.security import jwt_error_response
+from models.user import User
+from models.role import Role
+from services.github import GitHubService
+from services.github_async import AsyncGitHubService
+from services.github_tokens import GitHubRateLimited, TokenPool
+from stand_ins import StandInServer
+
+class TestAsyncGitHubService(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.stand_in = StandInServer(issues=4, page_size=3).start()
+        cls.patches = [patch.object(Config, 'GITHUB_API_URL', cls.stand_in.url),
+                       patch.object(Config, 'OLLAMA_API_URL', cls.stand_in.url)]
+        for patcher in cls.patches:
+            patcher.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        for patcher in cls.patches:
+            patcher.stop()
+        cls.stand_in.stop()
+
+    def _run(self, method, *args):
+        async def call():
+            async with AsyncGitHubService() as github:
+                return await getattr(github, method)(*args)
+        return asyncio.run(call())
+
+    def test_prioritization_matches_blocking_service(self):
+        expected = GitHubService().prioritize_issues('octo', 'hive')
+        self.assertEqual(len(expected), 4)
+        self.assertEqual(self._run('prioritize_issues', 'octo', 'hive'), expected)
+
+    def test_results_match_blocking_service(self):
+        blocking = GitHubService()
+        self.assertEqual(self._run('get_user_info'), blocking.get_user_info())
+        self.assertEqual(self._run('list_repositories', 'octo'), blocking.list_repositories('octo'))
+        self.assertEqual(self._run('analyze_issue_dependencies', 'octo', 'hive', 4),
+                         blocking.analyze_issue_dependencies('octo', 'hive', 4))
+
+    def test_missing_repository(self):
+        self.assertIsNone(self._run('get_repository', 'octo', 'missing'))
+        self.assertIsNone(self._run('prioritize_issues', 'octo', 'missing'))
+
+    def test_ollama_checked_once_per_prioritization(self):
+        requests = self.stand_in.requests
+        self._run('prioritize_issues', 'octo', 'hive')
+        # 2 pages of issues, health + tags, then per issue: generate, comments
+        # when there are any (2 issues) and each referenced issue (4 in total)
+        self.assertEqual(self.stand_in.requests - requests, 2 + 2 + 4 + 2 + 4)
+
+class TestAsyncGitHubEndpoints(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        os.environ['FLASK_TESTING'] = 'true'
+        cls.stand_in = StandInServer(issues=3, repos=5).start()
+        cls.patches = [patch.object(Config, 'GITHUB_API_URL', cls.stand_in.url),
+                       patch.object(Config, 'OLLAMA_API_URL', cls.stand_in.url)]
+        for patcher in cls.patches:
+            patcher.start()
+        cls.app = create_app()
+        cls.client = cls.app.test_client()
+        cls.app_context = cls.app.app_context()
+        cls.app_context.push()
+
+    def setUp(self):
+        db.session.remove()
+        db.drop_all()
+        db.create_all()
+
+        role = Role(name='user', description='user role')
+        user = User(username='user_test', email='user@test.com')
+        user.set_password('password1')
+        user.roles.append(role)
+        db.session.add(user)
+        db.session.commit()
+
+        response = self.client.post('/api/v1/auth/login',
+            json={'username': 'user_test', 'password': 'password1'})
+        token = json.loads(response.data.decode())['access_token']
+        self.headers = {'Authorization': f'Bearer {token}'}
+        self.user_id = user.id
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+
+    @classmethod
+    def tearDownClass(cls):
+        db.session.remove()
+        db.engine.dispose()
+        cls.app_context.pop()
+        for patcher in cls.patches:
+            patcher.stop()
+        cls.stand_in.stop()
+        os.environ.pop('FLASK_TESTING', None)
+
+    def test_prioritized_issues(self):
+        response = self.client.get('/api/v1/github/repository/octo/hive/issues/prioritized',
+                                   headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        issues = response.get_json()
+        self.assertEqual(sorted(issue['issue_number'] for issue in issues), [1, 2, 3])
+        self.assertEqual(issues[0]['ai_insights']['priority_level'], 'high')
+        self.assertEqual(issues[0]['created_at'], '2024-01-02T03:04:05+00:00')
+
+    def test_missing_repository_is_404(self):
+        response = self.client.get('/api/v1/github/repository/octo/missing', headers=self.headers)
+        self.assertEqual(response.status_code, 404)
+
+    def test_requires_token(self):
+        response = self.client.get('/api/v1/github/repositories')
+        self.assertEqual(response.status_code, 401)
+        # As in production, where flask-restx handles the error instead of propagating it
+        with patch.dict(self.app.config, PROPAGATE_EXCEPTIONS=False):
+            response = self.client.get('/api/v1/github/repositories',
+                                       headers={'Authorization': 'Bearer not-a-token'})
+            self.assertEqual(response.status_code, 422)
+            response = self.client.get('/api/v1/github/repositories')
+            self.assertEqual(response.status_code, 401)
+            self.assertIn('msg', response.get_json())
+            expired = create_access_token(identity=self.user_id, expires_delta=timedelta(seconds=-1))
+            response = self.client.get('/api/v1/github/repositories',
+                                       headers={'Authorization': f'Bearer {expired}'})
+            self.assertEqual(response.status_code, 401)
+            self.assertEqual(response.get_json()['error'], 'token_expired')
+
+    def test_jwt_error_statuses(self):
+        self.assertEqual(jwt_error_response(NoAuthorizationError('Missing'))[1], 401)
+        self.assertEqual(jwt_error_response(WrongTokenError('Only access tokens'))[1], 422)
+        self.assertEqual(jwt_error_response(DecodeError('Not enough segments'))[1], 422)
+        self.assertEqual(jwt_error_response(UserClaimsVerificationError('Failed', {}, {}))[1], 400)
+        # Errors without a status of their own are 401s, never a 500
+        self.assertEqual(jwt_error_response(JWTExtendedException('Unknown')), ({'msg': 'Unknown'}, 401))
+
+    def test_repositories_one_page_per_request(self):
+        names, cursor, requests = [], None, self.stand_in.requests
+        while True:
+            query = {'per_page': 2, **({'cursor': cursor} if cursor else {})}
+            response = self.client.get('/api/v1/github/repositories', query_string=query, headers=self.headers)
+            self.assertEqual(response.status_code, 200)
+            names.append([repo['name'] for repo in response.get_json()])
+            cursor = response.headers.get('X-Next-Cursor')
+            if not cursor:
+                break
+            self.assertIn('rel="next"', response.headers['Link'])
+        self.assertEqual(names, [['hive', 'comb'], ['repo-3', 'repo-4'], ['repo-5']])
+        self.assertEqual(self.stand_in.requests - requests, 3)
+
+    def test_cursor_belongs_to_its_listing(self):
+        response = self.client.get('/api/v1/github/repositories/octo?per_page=2', headers=self.headers)
+        cursor = response.headers['X-Next-Cursor']
+        # per_page comes with the cursor
+        response = self.client.get(f'/api/v1/github/repositories/octo?cursor={cursor}', headers=self.headers)
+        self.assertEqual([repo['name'] for repo in response.get_json()], ['repo-3', 'repo-4'])
+        for path in (f'/api/v1/github/repositories/octo?cursor={cursor}&per_page=3',
+                     f'/api/v1/github/repositories/comb?cursor={cursor}',
+                     f'/api/v1/github/repositories?cursor={cursor}'):
+            self.assertEqual(self.client.get(path, headers=self.headers).status_code, 400, path)
+
+    def test_repositories_page_parameters(self):
+        response = self.client.get('/api/v1/github/repositories/octo?page=2&per_page=3', headers=self.headers)
+        self.assertEqual([repo['name'] for repo in response.get_json()], ['repo-4', 'repo-5'])
+        self.assertNotIn('X-Next-Cursor', response.headers)
+        for query in ('cursor=bogus', 'per_page=101', 'page=0'):
+            response = self.client.get(f'/api/v1/github/repositories?{query}', headers=self.headers)
+            self.assertEqual(response.status_code, 400, query)
+        response = self.client.get('/api/v1/github/repositories/ghost', headers=self.headers)
+        self.assertEqual(response.status_code, 404)
+
+    def test_repositories_stream(self):
+        requests = self.stand_in.requests
+        response = self.client.get('/api/v1/github/repositories/octo?per_page=2&stream=true',
+                                   headers=self.headers, buffered=False)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        chunks = response.iter_encoded()
+        first = next(chunks)
+        # The first page goes out before the second one is requested
+        self.assertEqual(self.stand_in.requests - requests, 1)
+        lines = (first + b''.join(chunks)).decode().splitlines()
+        response.close()
+        self.assertEqual([json.loads(line)['name'] for line in lines],
+                         ['hive', 'comb', 'repo-3', 'repo-4', 'repo-5'])
+        self.assertEqual(self.stand_in.requests - requests, 3)
+
+    def test_stream_ends_with_error_record(self):
+        list_page = AsyncGitHubService.list_repositories_page
+        async def failing_after_first(github, username=None, page=1, per_page=30):
+            if page > 1:
+                raise GitHubRateLimited(42)
+            return await list_page(github, username, page, per_page)
+        with patch.object(AsyncGitHubService, 'list_repositories_page', failing_after_first):
+            response = self.client.get('/api/v1/github/repositories/octo?per_page=2&stream=true',
+                                       headers=self.headers)
+            self.assertEqual(response.status_code, 200)
+            lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        self.assertEqual([line.get('name') for line in lines[:2]], ['hive', 'comb'])
+        self.assertEqual(lines[2]['retry_after'], 42)
+        self.assertIn('rate limited', lines[2]['error'])
+
+    def test_rate_limited_is_503(self):
+        pool = TokenPool(['exhausted'], rate=10, burst=10, timeout=1)
+        pool.record(pool._tokens[0], 429, {'retry-after': '42'})
+        with patch('services.github_tokens._pool', pool):
+            response = self.client.get('/api/v1/github/repository/octo/hive/issues/prioritized',
+                                       headers=self.headers)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers['Retry-After'], '42')
+        self.assertEqual(self.stand_in.token_requests['exhausted'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,181 @@
+import unittest
+import asyncio
+import time
+from unittest.mock import patch
+from core.config import Config
+from services import github_tokens
+from services.github import GitHubService
+from services.github_async import AsyncGitHubService
+from services.github_tokens import GitHubRateLimited, TokenPool
+from stand_ins import StandInServer
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class TestTokenPool(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def pool(self, tokens, rate=10, burst=2, timeout=5):
+        return TokenPool(tokens, rate, burst, timeout, clock=self.clock)
+
+    def test_bucket_paces_each_token(self):
+        pool = self.pool(['a'])
+        self.assertEqual(pool._reserve()[0].value, 'a')
+        self.assertEqual(pool._reserve()[0].value, 'a')
+        token, wait = pool._reserve()
+        self.assertIsNone(token)
+        self.assertAlmostEqual(wait, 0.1)
+        self.clock.now += 0.1
+        self.assertEqual(pool._reserve()[0].value, 'a')
+
+    def test_prefers_token_with_most_requests_left(self):
+        pool = self.pool(['a', 'b'], burst=10)
+        a, b = pool._tokens
+        pool.record(a, 200, {'x-ratelimit-remaining': '10', 'x-ratelimit-reset': '2000'})
+        pool.record(b, 200, {'x-ratelimit-remaining': '400', 'x-ratelimit-reset': '2000'})
+        self.assertEqual([pool._reserve()[0].value for _ in range(3)], ['b', 'b', 'b'])
+
+    def test_exhausted_token_rests_until_reset(self):
+        pool = self.pool(['a', 'b'])
+        a, b = pool._tokens
+        self.assertTrue(pool.record(a, 403, {'x-ratelimit-remaining': '0', 'x-ratelimit-reset': '1030'}))
+        self.assertEqual({pool._reserve()[0].value for _ in range(2)}, {'b'})
+        self.assertFalse(pool.record(b, 200, {'x-ratelimit-remaining': '0', 'x-ratelimit-reset': '1010'}))
+
+        token, wait = pool._reserve()
+        self.assertIsNone(token)
+        self.assertAlmostEqual(wait, 10)
+        with self.assertRaises(GitHubRateLimited) as raised:
+            pool.acquire()
+        self.assertAlmostEqual(raised.exception.retry_after, 10)
+
+        self.clock.now = 1010
+        self.assertEqual(pool._reserve()[0].value, 'b')
+        self.assertEqual(pool.status()[0]['ready_in'], 20)
+
+    def test_secondary_limit_honours_retry_after(self):
+        pool = self.pool(['a'], timeout=120)
+        token = pool._tokens[0]
+        self.assertTrue(pool.record(token, 429, {'retry-after': '45'}))
+        self.assertAlmostEqual(pool._reserve()[1], 45)
+        # A plain 403 (no access to a repository) is not a rate limit
+        self.assertFalse(pool.record(token, 403, {'x-ratelimit-remaining': '12'}))
+
+    def test_primary_token_for_account_requests(self):
+        pool = self.pool(['a', 'b'], burst=10)
+        a, b = pool._tokens
+        pool.record(a, 200, {'x-ratelimit-remaining': '10', 'x-ratelimit-reset': '2000'})
+        pool.record(b, 200, {'x-ratelimit-remaining': '400', 'x-ratelimit-reset': '2000'})
+        self.assertEqual([pool._reserve(primary=True)[0].value for _ in range(3)], ['a', 'a', 'a'])
+        self.assertEqual(pool._reserve()[0].value, 'b')
+
+    def test_account_scoped_paths(self):
+        with patch.object(Config, 'GITHUB_API_URL', 'https://github.example.com/api/v3'):
+            self.assertTrue(github_tokens.account_scoped('/api/v3/user'))
+            self.assertTrue(github_tokens.account_scoped('/api/v3/user/repos'))
+            self.assertFalse(github_tokens.account_scoped('/api/v3/users/octo/repos'))
+            self.assertFalse(github_tokens.account_scoped('/api/v3/repos/octo/hive'))
+
+    def test_queued_request_waits_for_a_token(self):
+        pool = TokenPool(['a'], rate=50, burst=1, timeout=1)
+        pool.acquire()
+        async def acquire():
+            return await pool.acquire_async()
+        self.assertEqual(asyncio.run(acquire()).value, 'a')
+
+class TestTokenRotation(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # 4 issues over 2 pages, 2 comment listings and 4 referenced issues: 8 GitHub requests
+        cls.stand_in = StandInServer(issues=4, page_size=3, rate_limit=5).start()
+        cls.patches = [patch.object(Config, 'GITHUB_API_URL', cls.stand_in.url),
+                       patch.object(Config, 'OLLAMA_API_URL', cls.stand_in.url),
+                       patch.object(Config, 'GITHUB_QUEUE_TIMEOUT', 1)]
+        for patcher in cls.patches:
+            patcher.start()
+
+    def setUp(self):
+        self.stand_in._windows.clear()
+        self.stand_in.token_requests.clear()
+        GitHubService.clear_caches()
+
+    def tearDown(self):
+        github_tokens.reset_token_pool()
+
+    @classmethod
+    def tearDownClass(cls):
+        for patcher in cls.patches:
+            patcher.stop()
+        cls.stand_in.stop()
+
+    def prioritize(self, tokens):
+        github_tokens.reset_token_pool()
+        async def call():
+            with patch.object(Config, 'GITHUB_TOKENS', tokens):
+                async with AsyncGitHubService() as github:
+                    return await github.prioritize_issues('octo', 'hive')
+        return asyncio.run(call())
+
+    def test_requests_spread_over_tokens(self):
+        issues = self.prioritize(['one', 'two'])
+        self.assertEqual(len(issues), 4)
+        self.assertEqual(set(self.stand_in.token_requests), {'one', 'two'})
+        # Remaining counts steer requests to the other token before either is rejected
+        self.assertEqual(sum(self.stand_in.token_requests.values()), 8)
+        self.assertTrue(all(status['ready_in'] < 1 for status in github_tokens.token_pool().status()))
+
+    def test_one_token_runs_out(self):
+        with self.assertRaises(GitHubRateLimited):
+            self.prioritize(['one'])
+        self.assertEqual(github_tokens.token_pool().status()[0]['remaining'], 0)
+
+    def test_account_requests_keep_to_the_primary_token(self):
+        github_tokens.reset_token_pool()
+        async def call():
+            with patch.object(Config, 'GITHUB_TOKENS', ['one', 'two']):
+                async with AsyncGitHubService() as github:
+                    await github.get_user_info()
+                    return await github.list_repositories_page(None)
+        for _ in range(2):
+            repos, has_next = asyncio.run(call())
+        self.assertEqual(len(repos), 2)
+        self.assertEqual(set(self.stand_in.token_requests), {'one'})
+
+    def sync_service(self, tokens):
+        github_tokens.reset_token_pool()
+        with patch.object(Config, 'GITHUB_TOKENS', tokens):
+            return GitHubService()
+
+    def exhaust(self, token):
+        self.stand_in._windows[token] = (time.time() + 60, self.stand_in.rate_limit)
+
+    def test_sync_rate_limited_request_moves_to_next_token(self):
+        github = self.sync_service(['one', 'two'])
+        self.exhaust('one')
+        self.assertEqual(len(github.list_repositories('octo')), 2)
+        self.assertEqual(self.stand_in.token_requests['one'], 1)
+        self.assertEqual(self.stand_in.token_requests['two'], 2)
+        one, two = github_tokens.token_pool().status()
+        self.assertEqual(one['remaining'], 0)
+        self.assertGreater(one['ready_in'], 1)
+        self.assertEqual(two['remaining'], 3)
+
+    def test_sync_account_requests_keep_to_the_primary_token(self):
+        github = self.sync_service(['one', 'two'])
+        self.assertEqual(github.get_user_info()['login'], 'octo')
+        self.assertEqual(len(github.list_repositories()), 2)
+        self.assertEqual(set(self.stand_in.token_requests), {'one'})
+
+        GitHubService.clear_caches()
+        self.exhaust('one')
+        with self.assertRaises(GitHubRateLimited):
+            github.get_user_info()
+        self.assertEqual(set(self.stand_in.token_requests), {'one'})
+
+if __name__ == '__main__':
+    unittest.main()
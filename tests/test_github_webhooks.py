@@ -0,0 +1,221 @@
+import unittest
+import os
+import hashlib
+import hmac
+import json
+from unittest.mock import patch
+from app import create_app
+from core.config import Config
+from core.database import db
+from models.github_issue import StoredIssue, TrackedRepository
+from models.user import User
+from models.role import Role
+from services.github_webhooks import IssueUpdate, issue_updates
+from stand_ins import CREATED, StandInServer, _issue
+
+SECRET = 'webhook-secret'
+PRIORITIZED = '/api/v1/github/repository/octo/hive/issues/prioritized'
+
+class RecordingStandIn(StandInServer):
+    """StandInServer that keeps the path of every request"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.paths = []
+
+    def route(self, method, path, query, body):
+        self.paths.append(path)
+        return super().route(method, path, query, body)
+
+class TestGitHubWebhooks(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        os.environ['FLASK_TESTING'] = 'true'
+        cls.stand_in = RecordingStandIn(issues=3).start()
+        cls.patches = [patch.object(Config, 'GITHUB_API_URL', cls.stand_in.url),
+                       patch.object(Config, 'OLLAMA_API_URL', cls.stand_in.url),
+                       patch.object(Config, 'GITHUB_WEBHOOK_SECRET', SECRET)]
+        for patcher in cls.patches:
+            patcher.start()
+        cls.app = create_app()
+        cls.client = cls.app.test_client()
+        cls.app_context = cls.app.app_context()
+        cls.app_context.push()
+
+    def setUp(self):
+        db.session.remove()
+        db.drop_all()
+        db.create_all()
+
+        role = Role(name='user', description='user role')
+        user = User(username='user_test', email='user@test.com')
+        user.set_password('password1')
+        user.roles.append(role)
+        db.session.add(user)
+        db.session.commit()
+
+        response = self.client.post('/api/v1/auth/login',
+            json={'username': 'user_test', 'password': 'password1'})
+        token = json.loads(response.data.decode())['access_token']
+        self.headers = {'Authorization': f'Bearer {token}'}
+        self.stand_in.paths.clear()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+
+    @classmethod
+    def tearDownClass(cls):
+        db.session.remove()
+        db.engine.dispose()
+        cls.app_context.pop()
+        for patcher in cls.patches:
+            patcher.stop()
+        cls.stand_in.stop()
+        os.environ.pop('FLASK_TESTING', None)
+
+    def deliver(self, event, payload, secret=SECRET):
+        body = json.dumps(payload).encode()
+        signature = 'sha256=' + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+        return self.client.post('/api/v1/github/webhook', data=body, content_type='application/json',
+                                headers={'X-GitHub-Event': event, 'X-Hub-Signature-256': signature})
+
+    def issue_event(self, action, number, repo='hive', **changes):
+        issue = {**_issue(self.stand_in.url, number), 'updated_at': '2024-02-01T00:00:00Z', **changes}
+        return {'action': action, 'issue': issue,
+                'repository': {'name': repo, 'owner': {'login': 'octo'}}}
+
+    def prioritized(self):
+        response = self.client.get(PRIORITIZED, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        return {issue['issue_number']: issue for issue in response.get_json()}
+
+    def apply(self, event, payload):
+        response = self.deliver(event, payload)
+        self.assertEqual(response.status_code, 202)
+        self.assertTrue(issue_updates.join(timeout=10))
+        db.session.remove()
+
+    def test_signature_is_checked(self):
+        self.assertEqual(self.deliver('ping', {'zen': 'Keep it logically awesome.'}).status_code, 200)
+        self.assertEqual(self.deliver('ping', {}, secret='wrong').status_code, 401)
+        response = self.client.post('/api/v1/github/webhook', json={},
+                                    headers={'X-GitHub-Event': 'ping'})
+        self.assertEqual(response.status_code, 401)
+
+    def test_disabled_without_secret(self):
+        with patch.dict(self.app.config, GITHUB_WEBHOOK_SECRET=None):
+            self.assertEqual(self.deliver('ping', {}).status_code, 404)
+
+    def test_missing_repository_is_404_with_or_without_webhooks(self):
+        for secret in (SECRET, None):
+            with patch.dict(self.app.config, GITHUB_WEBHOOK_SECRET=secret):
+                response = self.client.get('/api/v1/github/repository/octo/missing/issues/prioritized',
+                                           headers=self.headers)
+                self.assertEqual(response.status_code, 404)
+                self.assertIn('octo/missing', response.get_json()['message'])
+
+    def test_irrelevant_events_are_ignored(self):
+        self.assertEqual(self.deliver('issues', self.issue_event('labeled', 1)).status_code, 200)
+        self.assertEqual(self.deliver('push', {'ref': 'refs/heads/main'}).status_code, 200)
+        self.assertEqual(self.deliver('issues', {'action': 'edited'}).status_code, 400)
+
+    def test_prioritization_is_stored(self):
+        first = self.prioritized()
+        self.assertEqual(sorted(first), [1, 2, 3])
+        self.assertTrue(self.stand_in.paths)
+        self.stand_in.paths.clear()
+        self.assertEqual(self.prioritized(), first)
+        self.assertEqual(self.stand_in.paths, [])
+        self.assertEqual(db.session.query(StoredIssue).count(), 3)
+
+    def test_edit_reanalyzes_only_that_issue(self):
+        before = self.prioritized()
+        self.stand_in.paths.clear()
+        self.apply('issues', self.issue_event('edited', 3, body='Security vulnerability in the login API'))
+
+        # One generation and the connection check for #3; nothing is listed again
+        self.assertEqual(self.stand_in.paths.count('/api/generate'), 1)
+        self.assertNotIn('/repos/octo/hive/issues', self.stand_in.paths)
+        after = self.prioritized()
+        self.assertEqual(after[3]['dependencies'], [])
+        self.assertGreater(after[3]['security_impact'], before[3]['security_impact'])
+        self.assertEqual(after[3]['updated_at'], '2024-02-01T00:00:00+00:00')
+        self.assertEqual(after[1], before[1])
+
+    def test_comment_refreshes_dependencies_without_analysis(self):
+        self.prioritized()
+        self.stand_in.paths.clear()
+        self.apply('issue_comment', {**self.issue_event('created', 2), 'comment': {'body': 'Blocked on #1'}})
+        self.assertNotIn('/api/generate', self.stand_in.paths)
+        self.assertIn('/repos/octo/hive/issues/2/comments', self.stand_in.paths)
+        self.assertEqual([dependency['issue_number'] for dependency in self.prioritized()[2]['dependencies']], [1])
+
+    def test_close_removes_issue_and_updates_references(self):
+        self.prioritized()
+        self.stand_in.paths.clear()
+        self.apply('issues', self.issue_event('closed', 1, state='closed'))
+        self.assertEqual(self.stand_in.paths, [])
+        issues = self.prioritized()
+        self.assertEqual(sorted(issues), [2, 3])
+        self.assertEqual(issues[2]['dependencies'][0]['state'], 'closed')
+
+        self.apply('issues', self.issue_event('deleted', 2))
+        issues = self.prioritized()
+        self.assertEqual(sorted(issues), [3])
+        self.assertEqual(issues[3]['dependencies'], [])
+
+    def test_reopened_issue_is_analyzed(self):
+        self.prioritized()
+        self.apply('issues', self.issue_event('closed', 1, state='closed'))
+        self.apply('issues', self.issue_event('reopened', 1, updated_at='2024-03-01T00:00:00Z'))
+        issues = self.prioritized()
+        self.assertEqual(sorted(issues), [1, 2, 3])
+        self.assertEqual(issues[2]['dependencies'][0]['state'], 'open')
+
+    def test_stale_delivery_is_skipped(self):
+        self.prioritized()
+        self.apply('issues', self.issue_event('edited', 3, body='Security vulnerability'))
+        self.stand_in.paths.clear()
+        self.apply('issues', self.issue_event('edited', 3, body='Old text', updated_at=CREATED))
+        self.assertEqual(self.stand_in.paths, [])
+        self.assertEqual(self.prioritized()[3]['updated_at'], '2024-02-01T00:00:00+00:00')
+
+    def test_untracked_repository_is_left_alone(self):
+        self.apply('issues', self.issue_event('edited', 1, repo='comb'))
+        self.assertEqual(self.stand_in.paths, [])
+        self.assertEqual(db.session.query(TrackedRepository).count(), 0)
+
+    def test_expired_results_are_listed_again(self):
+        self.prioritized()
+        synced_at = db.session.query(TrackedRepository).one().synced_at
+        db.session.remove()
+        self.stand_in.paths.clear()
+        with patch.dict(self.app.config, GITHUB_RESYNC_INTERVAL=0):
+            self.prioritized()
+        self.assertIn('/repos/octo/hive/issues', self.stand_in.paths)
+        self.assertEqual(db.session.query(StoredIssue).count(), 3)
+        self.assertGreater(db.session.query(TrackedRepository).one().synced_at, synced_at)
+
+    def test_unknown_repository_is_not_found(self):
+        response = self.client.get('/api/v1/github/repository/octo/missing/issues/prioritized',
+                                   headers=self.headers)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(db.session.query(TrackedRepository).count(), 0)
+
+class TestIssueUpdate(unittest.TestCase):
+    def update(self, event, action):
+        return IssueUpdate.from_event(event, {'action': action, 'issue': {'number': 7},
+                                              'repository': {'name': 'Hive', 'owner': {'login': 'Octo'}}})
+
+    def test_queued_updates_merge(self):
+        edited, comment = self.update('issues', 'edited'), self.update('issue_comment', 'created')
+        self.assertEqual(edited.key, ('octo', 'hive', 7))
+        self.assertTrue(edited.merge(comment).analyze)
+        self.assertFalse(comment.merge(comment).analyze)
+        closed = edited.merge(self.update('issues', 'closed'))
+        self.assertEqual((closed.action, closed.analyze), ('close', False))
+        self.assertIsNone(self.update('issues', 'assigned'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+import os
+import json
+from app import create_app
+from core.database import db
+from models.user import User
+from models.role import Role
+from query_counter import query_budget
+
+class TestQueryInstrumentation(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        os.environ['FLASK_TESTING'] = 'true'
+        cls.app = create_app()
+        cls.client = cls.app.test_client()
+        cls.app_context = cls.app.app_context()
+        cls.app_context.push()
+
+    def setUp(self):
+        db.session.remove()
+        db.drop_all()
+        db.create_all()
+
+        admin_role = Role(name='admin', description='Administrator role')
+        user_role = Role(name='user', description='Regular user role')
+        db.session.add_all([admin_role, user_role])
+
+        admin = User(username='admin_test', email='admin@test.com')
+        admin.set_password('admin123')
+        admin.roles.append(admin_role)
+        db.session.add(admin)
+        db.session.commit()
+
+        response = self.client.post('/api/v1/auth/login',
+            json={'username': 'admin_test', 'password': 'admin123'})
+        token = json.loads(response.data.decode())['access_token']
+        self.headers = {'Authorization': f'Bearer {token}'}
+        db.session.remove()
+
+    def tearDown(self):
+        self.app.config['SQL_SERVER_TIMING'] = False
+        self.app.config['SQL_SLOW_QUERY_MS'] = 500
+        db.session.remove()
+        db.drop_all()
+
+    @classmethod
+    def tearDownClass(cls):
+        db.session.remove()
+        db.engine.dispose()
+        cls.app_context.pop()
+        os.environ.pop('FLASK_TESTING', None)
+
+    def test_server_timing_header(self):
+        """Blocklist check and user lookup show up as two queries"""
+        response = self.client.get('/api/v1/api/profile', headers=self.headers)
+        self.assertNotIn('Server-Timing', response.headers)
+
+        self.app.config['SQL_SERVER_TIMING'] = True
+        response = self.client.get('/api/v1/api/profile', headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        timing = response.headers['Server-Timing']
+        self.assertTrue(timing.startswith('db;dur='))
+        self.assertIn('desc="2 queries"', timing)
+
+    def test_slow_query_log_names_endpoint(self):
+        self.app.config['SQL_SLOW_QUERY_MS'] = 0.000001
+        with self.assertLogs(self.app.logger, 'WARNING') as logs:
+            self.client.get('/api/v1/api/profile', headers=self.headers)
+        self.assertTrue(logs.output)
+        self.assertTrue(all('api_user_profile' in line for line in logs.output), logs.output)
+
+    def test_user_list_budget_does_not_grow_with_rows(self):
+        """Roles are batch-loaded, so 50 users cost the same as one"""
+        user_role = Role.query.filter_by(name='user').one()
+        for i in range(50):
+            user = User(username=f'user_{i}', email=f'user_{i}@test.com', password_hash='x')
+            user.roles.append(user_role)
+            db.session.add(user)
+        db.session.commit()
+        db.session.remove()
+
+        # Warm up: role membership changes bump role versions and reload the role registry
+        self.client.get('/api/v1/api/v2/users', headers=self.headers)
+        with query_budget(4):
+            response = self.client.get('/api/v1/api/v2/users', headers=self.headers)
+        self.assertEqual(len(json.loads(response.data.decode())), 51)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+import os
+import shutil
+import tempfile
+import time
+import jwt
+from jwt.exceptions import InvalidTokenError
+from core.keys import KeyRing
+from scripts.generate_jwt_key import generate_key, retire_key
+
+class TestKeyRing(unittest.TestCase):
+    def setUp(self):
+        self.keys_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.keys_dir)
+
+    def _key_ring(self, algorithm='RS256', active_kid=None):
+        key_ring = KeyRing(self.keys_dir, algorithm, active_kid)
+        key_ring.load()
+        return key_ring
+
+    def test_sign_and_verify_with_jwks(self):
+        """Tokens signed with the active key verify against the published JWKS"""
+        for algorithm in ('RS256', 'EdDSA'):
+            shutil.rmtree(self.keys_dir)
+            generate_key(self.keys_dir, algorithm, kid='current')
+            key_ring = self._key_ring(algorithm)
+
+            kid, private_key = key_ring.signing_key()
+            token = jwt.encode({'sub': '1'}, private_key, algorithm=algorithm, headers={'kid': kid})
+
+            jwks = key_ring.jwks()
+            self.assertEqual([key['kid'] for key in jwks['keys']], ['current'])
+            public_key = jwt.PyJWK(jwks['keys'][0]).key
+            self.assertEqual(jwt.decode(token, public_key, algorithms=[algorithm])['sub'], '1')
+
+    def test_rotation_keeps_retired_keys_for_verification(self):
+        """A retired key still verifies while the newest private key signs"""
+        generate_key(self.keys_dir, 'RS256', kid='old')
+        old_ring = self._key_ring()
+        old_token = jwt.encode({'sub': '1'}, old_ring.signing_key()[1], algorithm='RS256',
+                               headers={'kid': 'old'})
+
+        time.sleep(0.01)
+        generate_key(self.keys_dir, 'RS256', kid='new')
+        retire_key(self.keys_dir, 'old')
+        key_ring = self._key_ring(active_kid='new')
+
+        self.assertEqual(key_ring.signing_key()[0], 'new')
+        self.assertEqual({key['kid'] for key in key_ring.jwks()['keys']}, {'old', 'new'})
+        decoded = jwt.decode(old_token, key_ring.verification_key('old'), algorithms=['RS256'])
+        self.assertEqual(decoded['sub'], '1')
+
+    def test_unknown_kid_is_rejected(self):
+        """Tokens with an unknown kid fail verification"""
+        generate_key(self.keys_dir, 'RS256', kid='current')
+        key_ring = self._key_ring()
+        with self.assertRaises(InvalidTokenError):
+            key_ring.verification_key('missing')
+
+    def test_parsed_keys_are_cached(self):
+        """Rescanning an unchanged directory reuses the parsed key objects"""
+        generate_key(self.keys_dir, 'EdDSA', kid='current')
+        key_ring = self._key_ring('EdDSA')
+        first = key_ring.signing_key()[1]
+        key_ring.load()
+        self.assertIs(key_ring.signing_key()[1], first)
+
+    def test_symmetric_algorithm_publishes_no_keys(self):
+        """HS256 tokens have no public verification keys"""
+        key_ring = KeyRing(algorithm='HS256')
+        self.assertFalse(key_ring.enabled)
+        self.assertEqual(key_ring.jwks(), {'keys': []})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+import os
+import runpy
+from sqlalchemy import text
+from app import create_app
+from core.database import db
+from core.lifecycle import reset_after_fork
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class TestForkLifecycle(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        os.environ['FLASK_TESTING'] = 'true'
+        cls.app = create_app()
+        cls.app_context = cls.app.app_context()
+        cls.app_context.push()
+
+    @classmethod
+    def tearDownClass(cls):
+        db.session.remove()
+        db.engine.dispose()
+        cls.app_context.pop()
+        os.environ.pop('FLASK_TESTING', None)
+
+    def test_reset_after_fork_replaces_pool(self):
+        db.session.execute(text('SELECT 1'))
+        db.session.remove()
+        pool = db.engine.pool
+        reset_after_fork(self.app)
+        self.assertIsNot(db.engine.pool, pool)
+        self.assertEqual(db.session.execute(text('SELECT 1')).scalar(), 1)
+        db.session.remove()
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'requires os.fork')
+    def test_forked_worker_queries_with_own_connections(self):
+        db.session.execute(text('SELECT 1'))
+        db.session.remove()
+        pid = os.fork()
+        if pid == 0:
+            status = 1
+            try:
+                reset_after_fork(self.app)
+                if db.session.execute(text('SELECT 1')).scalar() == 1:
+                    status = 0
+            finally:
+                os._exit(status)
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+        # The parent's pooled connection is still usable
+        self.assertEqual(db.session.execute(text('SELECT 1')).scalar(), 1)
+        db.session.remove()
+
+class TestGunicornConfig(unittest.TestCase):
+    def test_defaults_preload_with_hooks(self):
+        settings = runpy.run_path(os.path.join(ROOT, 'gunicorn.conf.py'))
+        self.assertEqual(settings['wsgi_app'], 'wsgi:app')
+        self.assertTrue(settings['preload_app'])
+        for hook in ('on_starting', 'when_ready', 'post_fork', 'child_exit'):
+            self.assertTrue(callable(settings[hook]))
+
+if __name__ == '__main__':
+    unittest.main()
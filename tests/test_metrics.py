@@ -0,0 +1,129 @@
+import unittest
+import os
+import json
+import subprocess
+import sys
+import tempfile
+from functools import lru_cache
+from unittest.mock import patch
+from prometheus_client import REGISTRY
+from app import create_app
+from core.database import db
+from core.metrics import Metrics, cache_metrics, external_call
+from models.user import User
+from models.role import Role
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+class TestMetricsEndpoint(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        os.environ['FLASK_TESTING'] = 'true'
+        cls.app = create_app()
+        cls.client = cls.app.test_client()
+        cls.app_context = cls.app.app_context()
+        cls.app_context.push()
+
+    def setUp(self):
+        db.session.remove()
+        db.drop_all()
+        db.create_all()
+
+        for name in ('admin', 'user'):
+            role = Role(name=name, description=f'{name} role')
+            user = User(username=f'{name}_test', email=f'{name}@test.com')
+            user.set_password('password1')
+            user.roles.append(role)
+            db.session.add(user)
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+
+    @classmethod
+    def tearDownClass(cls):
+        db.session.remove()
+        db.engine.dispose()
+        cls.app_context.pop()
+        os.environ.pop('FLASK_TESTING', None)
+
+    def _headers(self, username):
+        response = self.client.post('/api/v1/auth/login',
+            json={'username': username, 'password': 'password1'})
+        token = json.loads(response.data.decode())['access_token']
+        return {'Authorization': f'Bearer {token}'}
+
+    def test_requests_counted_per_route_and_status(self):
+        labels = {'method': 'GET', 'route': '/api/v1/api/profile', 'status': '200'}
+        before = sample('hive_http_requests_total', **labels)
+        headers = self._headers('user_test')
+        self.client.get('/api/v1/api/profile', headers=headers)
+        self.client.get('/api/v1/api/profile/12345', headers=headers)
+
+        self.assertEqual(sample('hive_http_requests_total', **labels), before + 1)
+        self.assertEqual(sample('hive_http_request_duration_seconds_count', **labels), before + 1)
+        self.assertGreater(sample('hive_http_requests_total', method='GET', route='<unmatched>', status='404'), 0)
+        self.assertEqual(sample('hive_http_requests_in_flight', method='GET', route='/api/v1/api/profile'), 0)
+
+    def test_admin_gets_text_exposition(self):
+        response = self.client.get('/api/v1/admin/metrics', headers=self._headers('admin_test'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain'))
+        body = response.data.decode()
+        self.assertIn('# TYPE hive_http_request_duration_seconds histogram', body)
+        self.assertIn('hive_http_requests_total{method="POST",route="/api/v1/auth/login",status="200"}', body)
+
+    def test_metrics_require_admin(self):
+        response = self.client.get('/api/v1/admin/metrics', headers=self._headers('user_test'))
+        self.assertEqual(response.status_code, 403)
+
+class TestServiceMetrics(unittest.TestCase):
+    def test_external_call_outcomes(self):
+        @external_call('test', 'lookup')
+        def lookup(value):
+            if value == 'boom':
+                raise RuntimeError(value)
+            return value
+
+        before = {outcome: sample('hive_external_calls_total', service='test', operation='lookup', outcome=outcome)
+                  for outcome in ('ok', 'empty', 'error')}
+        lookup('found')
+        lookup(None)
+        with self.assertRaises(RuntimeError):
+            lookup('boom')
+        for outcome in ('ok', 'empty', 'error'):
+            self.assertEqual(sample('hive_external_calls_total', service='test',
+                                    operation='lookup', outcome=outcome), before[outcome] + 1)
+        self.assertEqual(sample('hive_external_call_duration_seconds_count', service='test', operation='lookup'),
+                         sum(before.values()) + 3)
+
+    def test_cache_hits_and_misses(self):
+        @cache_metrics('test.square')
+        @lru_cache(maxsize=10)
+        def square(value):
+            return value * value
+
+        square(2)
+        square(2)
+        square(3)
+        self.assertEqual(sample('hive_cache_requests_total', cache='test.square', result='miss'), 2)
+        self.assertEqual(sample('hive_cache_requests_total', cache='test.square', result='hit'), 1)
+        self.assertEqual(square.cache_info().hits, 1)
+
+    def test_exposition_aggregates_worker_processes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            env = {**os.environ, 'PROMETHEUS_MULTIPROC_DIR': directory}
+            for _ in range(2):
+                subprocess.run([sys.executable, '-c',
+                    "from core.metrics import REQUESTS; REQUESTS.labels('GET', '/worker', '200').inc(3)"],
+                    cwd=ROOT, env=env, check=True)
+            with patch.dict(os.environ, {'PROMETHEUS_MULTIPROC_DIR': directory}):
+                body, _ = Metrics().exposition()
+        self.assertIn(b'hive_http_requests_total{method="GET",route="/worker",status="200"} 6.0', body)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+import gzip
+import json
+import os
+import tempfile
+from app import create_app
+from core.assets import brotli
+from core.openapi import openapi_spec
+
+class TestOpenAPISpec(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        os.environ['FLASK_TESTING'] = 'true'
+        cls.app = create_app()
+        cls.client = cls.app.test_client()
+
+    @classmethod
+    def tearDownClass(cls):
+        os.environ.pop('FLASK_TESTING', None)
+
+    def get(self, encoding=None, **headers):
+        if encoding:
+            headers['Accept-Encoding'] = encoding
+        return self.client.get('/api/v1/swagger.json', headers=headers)
+
+    def test_spec_matches_restx_schema(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/json')
+        self.assertEqual(response.headers['Cache-Control'], 'public, no-cache')
+        with self.app.test_request_context():
+            schema = openapi_spec._api.__schema__
+        self.assertEqual(response.get_json(), json.loads(json.dumps(schema)))
+        self.assertIn('/github/repository/{owner}/{repo_name}/issues/prioritized', schema['paths'])
+
+    def test_spec_is_encoded_once(self):
+        first = self.get()
+        self.assertIs(openapi_spec.generate(), openapi_spec.generate())
+        self.assertEqual(self.get().headers['ETag'], first.headers['ETag'])
+
+    def test_not_modified(self):
+        etag = self.get().headers['ETag']
+        response = self.get(**{'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b'')
+
+    def test_compressed_variants(self):
+        plain = self.get()
+        response = self.get('gzip')
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        self.assertEqual(gzip.decompress(response.data), plain.data)
+        self.assertNotEqual(response.headers['ETag'], plain.headers['ETag'])
+        if brotli is not None:
+            response = self.get('br, gzip')
+            self.assertEqual(response.headers['Content-Encoding'], 'br')
+            self.assertEqual(brotli.decompress(response.data), plain.data)
+
+    def test_export_command(self):
+        runner = self.app.test_cli_runner()
+        result = runner.invoke(args=['export-openapi'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(result.stdout_bytes, self.get().data)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'openapi.json')
+            result = runner.invoke(args=['export-openapi', '--output', path])
+            self.assertEqual(result.exit_code, 0, result.output)
+            with open(path, 'rb') as handle:
+                self.assertEqual(handle.read(), self.get().data)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+import os
+import json
+import tempfile
+from sqlalchemy import create_engine, exc
+from sqlalchemy.pool import StaticPool
+from app import create_app
+from core.database import db
+from core.pool import InstrumentedQueuePool, PoolMonitor, engine_options
+from models.user import User
+from models.role import Role
+
+class TestPoolProfiles(unittest.TestCase):
+    def test_profile_chosen_from_url(self):
+        self.assertEqual(engine_options('sqlite:////tmp/app.db')['max_overflow'], 0)
+        direct = engine_options('postgresql://db/app')
+        self.assertFalse(direct['pool_pre_ping'])
+        self.assertIs(direct['poolclass'], InstrumentedQueuePool)
+        self.assertIs(engine_options('sqlite://')['poolclass'], StaticPool)
+
+    def test_named_profile_and_overrides(self):
+        options = engine_options('postgresql://pgbouncer/app', 'pgbouncer', {'pool_size': 4})
+        self.assertEqual(options['pool_size'], 4)
+        self.assertEqual(options['pool_recycle'], 300)
+        with self.assertRaises(ValueError):
+            engine_options('postgresql://db/app', 'unknown')
+
+    def test_checkout_wait_and_timeouts_are_counted(self):
+        with tempfile.TemporaryDirectory() as directory:
+            url = f'sqlite:///{directory}/pool.db'
+            engine = create_engine(url, **engine_options(url, overrides={'pool_size': 1, 'pool_timeout': 0.05}))
+            monitor = PoolMonitor()
+            monitor.engines = {'primary': engine}
+            monitor.watch(engine)
+
+            with engine.connect():
+                with self.assertRaises(exc.TimeoutError):
+                    engine.connect()
+                pool = monitor.snapshot()['pools']['primary']
+                self.assertEqual(pool['checked_out'], 1)
+                self.assertEqual(pool['connects'], 1)
+                self.assertEqual(pool['timeouts'], 1)
+                self.assertGreaterEqual(pool['wait_ms_max'], 50)
+            engine.dispose()
+
+class TestPoolEndpoint(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        os.environ['FLASK_TESTING'] = 'true'
+        cls.app = create_app()
+        cls.client = cls.app.test_client()
+        cls.app_context = cls.app.app_context()
+        cls.app_context.push()
+
+    def setUp(self):
+        db.session.remove()
+        db.drop_all()
+        db.create_all()
+
+        for name in ('admin', 'user'):
+            role = Role(name=name, description=f'{name} role')
+            user = User(username=f'{name}_test', email=f'{name}@test.com')
+            user.set_password('password1')
+            user.roles.append(role)
+            db.session.add(user)
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+
+    @classmethod
+    def tearDownClass(cls):
+        db.session.remove()
+        db.engine.dispose()
+        cls.app_context.pop()
+        os.environ.pop('FLASK_TESTING', None)
+
+    def _headers(self, username):
+        response = self.client.post('/api/v1/auth/login',
+            json={'username': username, 'password': 'password1'})
+        token = json.loads(response.data.decode())['access_token']
+        return {'Authorization': f'Bearer {token}'}
+
+    def test_admin_sees_pool_stats(self):
+        response = self.client.get('/api/v1/admin/pool', headers=self._headers('admin_test'))
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data.decode())
+        self.assertEqual(data['pid'], os.getpid())
+        primary = data['pools']['primary']
+        self.assertEqual(primary['pool_class'], type(db.engine.pool).__name__)
+        self.assertGreater(primary['checkouts'], 0)
+        for key in ('connects', 'invalidations', 'pre_ping_failures', 'wait_ms_avg'):
+            self.assertIn(key, primary)
+
+    def test_pool_stats_require_admin(self):
+        response = self.client.get('/api/v1/admin/pool', headers=self._headers('user_test'))
+        self.assertEqual(response.status_code, 403)
+
+if __name__ == '__main__':
+    unittest.main()
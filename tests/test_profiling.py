@@ -0,0 +1,156 @@
+import unittest
+import os
+import cProfile
+import json
+import pstats
+import shutil
+import tempfile
+from unittest.mock import patch
+from flask import Flask
+from app import create_app
+from core.config import Config
+from core.database import db
+from core.profiling import RequestProfiler
+from models.user import User
+from models.role import Role
+from stand_ins import StandInServer
+
+class TestRequestProfiling(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        os.environ['FLASK_TESTING'] = 'true'
+        cls.app = create_app()
+        cls.client = cls.app.test_client()
+        cls.app_context = cls.app.app_context()
+        cls.app_context.push()
+
+    def setUp(self):
+        db.session.remove()
+        db.drop_all()
+        db.create_all()
+
+        for name in ('admin', 'user'):
+            role = Role(name=name, description=f'{name} role')
+            user = User(username=f'{name}_test', email=f'{name}@test.com')
+            user.set_password('password1')
+            user.roles.append(role)
+            db.session.add(user)
+        db.session.commit()
+
+        self.profile_dir = tempfile.mkdtemp()
+        self.app.config['PROFILE_DIR'] = self.profile_dir
+        self.app.config['PROFILE_RATE_LIMIT'] = '1000/hour'
+
+    def tearDown(self):
+        shutil.rmtree(self.profile_dir)
+        db.session.remove()
+        db.drop_all()
+
+    @classmethod
+    def tearDownClass(cls):
+        db.session.remove()
+        db.engine.dispose()
+        cls.app_context.pop()
+        os.environ.pop('FLASK_TESTING', None)
+
+    def _headers(self, username, **extra):
+        response = self.client.post('/api/v1/auth/login',
+            json={'username': username, 'password': 'password1'})
+        token = json.loads(response.data.decode())['access_token']
+        return {'Authorization': f'Bearer {token}', **extra}
+
+    def test_admin_request_profiled_with_cprofile(self):
+        response = self.client.get('/api/v1/api/users',
+            headers=self._headers('admin_test', **{'X-Profile': '1', 'X-Request-ID': 'slow-users-1'}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['X-Request-ID'], 'slow-users-1')
+        self.assertTrue(response.headers['X-Profile'].startswith('cprofile; dur='))
+        self.assertEqual(response.headers['Link'], '</api/v1/admin/profiles/slow-users-1>; rel="profile"')
+
+        path = os.path.join(self.profile_dir, 'slow-users-1.pstats')
+        stats = pstats.Stats(path)
+        self.assertTrue(any(name == 'get' for _, _, name in stats.stats))
+
+        headers = self._headers('admin_test')
+        listing = json.loads(self.client.get('/api/v1/admin/profiles', headers=headers).data.decode())
+        self.assertEqual([profile['request_id'] for profile in listing], ['slow-users-1'])
+        download = self.client.get('/api/v1/admin/profiles/slow-users-1', headers=headers)
+        self.assertEqual(download.status_code, 200)
+        with open(path, 'rb') as artifact:
+            self.assertEqual(download.data, artifact.read())
+        download.close()
+
+    def test_async_view_profiled_on_its_loop_thread(self):
+        stand_in = StandInServer(repos=3).start()
+        try:
+            with patch.object(Config, 'GITHUB_API_URL', stand_in.url):
+                response = self.client.get('/api/v1/github/repositories',
+                    headers=self._headers('admin_test', **{'X-Profile': '1', 'X-Request-ID': 'async-1'}))
+        finally:
+            stand_in.stop()
+        self.assertEqual(response.status_code, 200)
+        stats = pstats.Stats(os.path.join(self.profile_dir, 'async-1.pstats'))
+        names = {name for _, _, name in stats.stats}
+        self.assertIn('repository_page', names)
+        self.assertIn('list_repositories_page', names)
+
+    def test_async_view_with_a_single_profiler(self):
+        """Where cProfile covers every thread, async views add no second profiler"""
+        stand_in = StandInServer(repos=3).start()
+        try:
+            with patch.object(Config, 'GITHUB_API_URL', stand_in.url), \
+                    patch('core.profiling.PROFILER_COVERS_THREADS', True), \
+                    patch('core.profiling.cProfile.Profile', wraps=cProfile.Profile) as profile:
+                response = self.client.get('/api/v1/github/repositories',
+                    headers=self._headers('admin_test', **{'X-Profile': '1', 'X-Request-ID': 'async-2'}))
+        finally:
+            stand_in.stop()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(profile.call_count, 1)
+        self.assertTrue(os.path.exists(os.path.join(self.profile_dir, 'async-2.pstats')))
+
+    def test_profiles_kept_in_a_private_instance_folder(self):
+        app = Flask(__name__, instance_path=self.profile_dir)
+        app.config.update(PROFILE_ENABLED=False, PROFILE_DIR=None)
+        RequestProfiler().init_app(app)
+        self.assertEqual(app.config['PROFILE_DIR'], os.path.join(self.profile_dir, 'profiles'))
+
+        self.app.config['PROFILE_DIR'] = directory = os.path.join(self.profile_dir, 'profiles')
+        response = self.client.get('/api/v1/api/users',
+            headers=self._headers('admin_test', **{'X-Profile': '1', 'X-Request-ID': 'private-1'}))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(os.path.exists(os.path.join(directory, 'private-1.pstats')))
+        self.assertEqual(os.stat(directory).st_mode & 0o777, 0o700)
+
+    def test_sampling_profile_from_query_flag(self):
+        self.app.config['PROFILE_SAMPLE_INTERVAL'] = 0.0005
+        response = self.client.get('/api/v1/api/users?profile=sampling', headers=self._headers('admin_test'))
+        self.assertTrue(response.headers['X-Profile'].startswith('sampling'))
+        request_id = response.headers['X-Request-ID']
+        with open(os.path.join(self.profile_dir, f'{request_id}.collapsed')) as artifact:
+            for line in artifact:
+                stack, count = line.rsplit(' ', 1)
+                self.assertGreater(int(count), 0)
+
+    def test_non_admin_requests_are_not_profiled(self):
+        response = self.client.get('/api/v1/api/profile', headers=self._headers('user_test', **{'X-Profile': '1'}))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Link', response.headers)
+        self.assertEqual(os.listdir(self.profile_dir), [])
+
+    def test_rate_limit_and_missing_profiles(self):
+        self.app.config['PROFILE_RATE_LIMIT'] = '1/hour'
+        try:
+            headers = self._headers('admin_test', **{'X-Profile': '1'})
+            self.assertIn('Link', self.client.get('/api/v1/api/users', headers=headers).headers)
+            response = self.client.get('/api/v1/api/users', headers=headers)
+            self.assertEqual(response.headers['X-Profile'], 'skipped; reason="rate limited"')
+            self.assertNotIn('Link', response.headers)
+        finally:
+            self.app.config['PROFILE_RATE_LIMIT'] = '1000/hour'
+
+        response = self.client.get('/api/v1/admin/profiles/..', headers=self._headers('admin_test'))
+        self.assertEqual(response.status_code, 404)
+
+if __name__ == '__main__':
+    unittest.main()
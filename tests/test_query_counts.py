@@ -0,0 +1,101 @@
+import unittest
+import os
+import json
+from app import create_app
+from core.database import db
+from models.user import User
+from models.role import Role
+from query_counter import count_queries
+
+class TestQueryCounts(unittest.TestCase):
+    """Exact SQL statement counts per endpoint, so N+1 regressions fail loudly"""
+
+    @classmethod
+    def setUpClass(cls):
+        os.environ['FLASK_TESTING'] = 'true'
+        cls.app = create_app()
+        cls.client = cls.app.test_client()
+        cls.app_context = cls.app.app_context()
+        cls.app_context.push()
+
+    def setUp(self):
+        db.session.remove()
+        db.drop_all()
+        db.create_all()
+
+        admin_role = Role(name='admin', description='Administrator role')
+        moderator_role = Role(name='moderator', description='Moderator role')
+        user_role = Role(name='user', description='Regular user role')
+        db.session.add_all([admin_role, moderator_role, user_role])
+
+        self.admin = User(username='admin_test', email='admin@test.com')
+        self.admin.set_password('admin123')
+        self.admin.roles.append(admin_role)
+        db.session.add(self.admin)
+
+        for i in range(5):
+            user = User(username=f'user_{i}', email=f'user_{i}@test.com', password_hash='x')
+            user.roles.append(user_role)
+            db.session.add(user)
+        db.session.commit()
+
+        response = self.client.post('/api/v1/auth/login',
+            json={'username': 'admin_test', 'password': 'admin123'})
+        self.tokens = json.loads(response.data.decode())
+        self.headers = {'Authorization': f"Bearer {self.tokens['access_token']}"}
+        db.session.remove()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+
+    @classmethod
+    def tearDownClass(cls):
+        db.session.remove()
+        db.engine.dispose()
+        cls.app_context.pop()
+        os.environ.pop('FLASK_TESTING', None)
+
+    def assertQueryCount(self, expected, method, path, **kwargs):
+        with count_queries() as counter:
+            response = getattr(self.client, method)(path, **kwargs)
+        db.session.remove()
+        self.assertLess(response.status_code, 300, response.data)
+        self.assertEqual(counter.count, expected, f'\n{counter}')
+        return response
+
+    def test_login(self):
+        """User and its roles (for token claims)"""
+        self.assertQueryCount(2, 'post', '/api/v1/auth/login',
+            json={'username': 'admin_test', 'password': 'admin123'})
+
+    def test_refresh(self):
+        """Blocklist check, user lookup, roles for the new claims"""
+        self.assertQueryCount(3, 'post', '/api/v1/auth/refresh',
+            headers={'Authorization': f"Bearer {self.tokens['refresh_token']}"})
+
+    def test_profile(self):
+        """Blocklist check and user lookup; roles are never loaded"""
+        self.assertQueryCount(2, 'get', '/api/v1/api/profile', headers=self.headers)
+
+    def test_user_list_v1(self):
+        """Blocklist check, user lookup, the user's roles, one page query; no listed roles"""
+        self.assertQueryCount(4, 'get', '/api/v1/api/users', headers=self.headers)
+
+    def test_user_list_v2(self):
+        """Blocklist check, user lookup, the user's roles, page query, one batched roles query"""
+        response = self.assertQueryCount(5, 'get', '/api/v1/api/v2/users', headers=self.headers)
+        data = json.loads(response.data.decode())
+        self.assertEqual(len(data), 6)
+        self.assertEqual(data[0]['roles'], ['admin'])
+
+    def test_user_detail(self):
+        """Blocklist check, user lookup, the user's roles, requested user"""
+        self.assertQueryCount(4, 'get', '/api/v1/api/users/2', headers=self.headers)
+
+    def test_role_list(self):
+        """Blocklist check, user lookup, the user's roles, roles"""
+        self.assertQueryCount(4, 'get', '/api/v1/api/roles', headers=self.headers)
+
+if __name__ == '__main__':
+    unittest.main()
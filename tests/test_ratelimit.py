@@ -0,0 +1,127 @@
+import unittest
+import os
+import multiprocessing
+import shutil
+import tempfile
+from unittest.mock import patch
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import SlidingWindowCounterRateLimiter
+from app import create_app
+from core.database import db
+from core.ratelimit import SQLiteStorage
+
+def _hit_from_worker(uri, attempts, results):
+    limiter = SlidingWindowCounterRateLimiter(storage_from_string(uri))
+    results.put(sum(limiter.hit(parse('20/minute'), 'shared') for _ in range(attempts)))
+
+class TestSQLiteStorage(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.uri = f"sqlite:///{os.path.join(self.directory, 'ratelimit.db')}"
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_registered_for_sqlite_uris(self):
+        storage = storage_from_string(self.uri, flush_interval=0.5)
+        self.assertIsInstance(storage, SQLiteStorage)
+        self.assertEqual(storage.flush_interval, 0.5)
+        self.assertTrue(storage.check())
+
+    def test_counters(self):
+        storage = SQLiteStorage(self.uri)
+        self.assertEqual(storage.incr('key', 60), 1)
+        self.assertEqual(storage.incr('key', 60, amount=2), 3)
+        self.assertEqual(storage.get('key'), 3)
+        self.assertGreater(storage.get_expiry('key'), 0)
+
+        storage.clear('key')
+        self.assertEqual(storage.get('key'), 0)
+
+        self.assertEqual(storage.incr('expired', -1), 1)
+        self.assertEqual(storage.get('expired'), 0)
+        self.assertEqual(storage.incr('expired', 60), 1)
+        self.assertEqual(storage.reset(), 1)
+
+    def test_sliding_window_shared_between_workers(self):
+        item = parse('3/minute')
+        first = SlidingWindowCounterRateLimiter(SQLiteStorage(self.uri))
+        second = SlidingWindowCounterRateLimiter(SQLiteStorage(self.uri))
+
+        self.assertTrue(first.hit(item, 'client'))
+        self.assertTrue(second.hit(item, 'client'))
+        self.assertTrue(first.hit(item, 'client'))
+        self.assertFalse(second.hit(item, 'client'))
+        self.assertEqual(first.get_window_stats(item, 'client').remaining, 0)
+
+        first.clear(item, 'client')
+        self.assertTrue(second.hit(item, 'client'))
+
+    def test_batched_updates(self):
+        item = parse('3/minute')
+        batched = SQLiteStorage(self.uri, flush_interval=60)
+        other = SQLiteStorage(self.uri)
+        limiter = SlidingWindowCounterRateLimiter(batched)
+
+        self.assertTrue(limiter.hit(item, 'client'))
+        self.assertTrue(limiter.hit(item, 'client'))
+        self.assertEqual(SlidingWindowCounterRateLimiter(other).get_window_stats(item, 'client').remaining, 3)
+
+        batched.flush()
+        self.assertEqual(SlidingWindowCounterRateLimiter(other).get_window_stats(item, 'client').remaining, 1)
+        self.assertTrue(limiter.hit(item, 'client'))
+        self.assertFalse(limiter.hit(item, 'client'))
+
+    def test_limit_holds_across_processes(self):
+        context = multiprocessing.get_context('fork')
+        results = context.Queue()
+        workers = [context.Process(target=_hit_from_worker, args=(self.uri, 10, results))
+                   for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(sum(results.get() for _ in workers), 20)
+
+class TestRateLimitedApp(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        os.environ['FLASK_TESTING'] = 'true'
+        cls.directory = tempfile.mkdtemp()
+        uri = f"sqlite:///{os.path.join(cls.directory, 'ratelimit.db')}"
+        with patch('app.Config.RATELIMIT_ENABLED', True), \
+                patch('app.Config.RATELIMIT_STORAGE_URI', uri), \
+                patch('app.Config.RATELIMIT_STORAGE_OPTIONS', {'flush_interval': 0}):
+            cls.app = create_app()
+        cls.client = cls.app.test_client()
+        cls.app_context = cls.app.app_context()
+        cls.app_context.push()
+
+    def setUp(self):
+        db.drop_all()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+
+    @classmethod
+    def tearDownClass(cls):
+        db.session.remove()
+        db.engine.dispose()
+        cls.app_context.pop()
+        shutil.rmtree(cls.directory)
+        os.environ.pop('FLASK_TESTING', None)
+
+    def test_login_limit_uses_shared_storage(self):
+        for _ in range(10):
+            response = self.client.post('/api/v1/auth/login',
+                json={'username': 'nobody', 'password': 'wrong'})
+            self.assertEqual(response.status_code, 401)
+        response = self.client.post('/api/v1/auth/login',
+            json={'username': 'nobody', 'password': 'wrong'})
+        self.assertEqual(response.status_code, 429)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+import unittest
+import os
+import json
+from unittest.mock import patch
+from flask_jwt_extended import decode_token
+from app import create_app
+from core.database import db
+from core.rbac import role_registry
+from models.user import User
+from models.role import Role
+
+class TestRoleBitmasks(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        os.environ['FLASK_TESTING'] = 'true'
+        cls.app = create_app()
+        cls.client = cls.app.test_client()
+        cls.app_context = cls.app.app_context()
+        cls.app_context.push()
+
+    def setUp(self):
+        db.session.remove()
+        db.drop_all()
+        db.create_all()
+
+        self.roles = {
+            name: Role(name=name, description=f'{name} role')
+            for name in ('admin', 'moderator', 'user')
+        }
+        db.session.add_all(self.roles.values())
+        db.session.commit()
+
+        self.users = {}
+        for name, role in self.roles.items():
+            user = User(username=f'{name}_test', email=f'{name}@test.com')
+            user.set_password('password1')
+            user.roles.append(role)
+            db.session.add(user)
+            self.users[name] = user
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+
+    @classmethod
+    def tearDownClass(cls):
+        db.session.remove()
+        db.engine.dispose()
+        cls.app_context.pop()
+        os.environ.pop('FLASK_TESTING', None)
+
+    def _access_token(self, username):
+        response = self.client.post('/api/v1/auth/login',
+            json={'username': username, 'password': 'password1'})
+        return json.loads(response.data.decode())['access_token']
+
+    def test_hierarchy_closure(self):
+        """Admin implies moderator and user; user implies nothing else"""
+        admin = self.users['admin']
+        self.assertTrue(admin.has_role('admin'))
+        self.assertTrue(admin.has_role('moderator'))
+        self.assertTrue(admin.has_any_role(['user']))
+
+        user = self.users['user']
+        self.assertTrue(user.has_role('user'))
+        self.assertFalse(user.has_any_role(['admin', 'moderator']))
+
+    def test_role_mask_in_token_claims(self):
+        """Access tokens embed the precomputed role mask"""
+        token = self._access_token('moderator_test')
+        claims = decode_token(token)
+        self.assertEqual(claims['role_mask'], self.users['moderator'].role_mask)
+        self.assertTrue(claims['role_mask'] & role_registry.required_mask(['user']))
+        self.assertFalse(claims['role_mask'] & role_registry.required_mask(['admin']))
+
+    def test_role_required_uses_hierarchy(self):
+        """Moderators reach moderator endpoints but not admin-only ones"""
+        headers = {'Authorization': f"Bearer {self._access_token('moderator_test')}"}
+        user_id = self.users['user'].id
+
+        response = self.client.get(f'/api/v1/api/users/{user_id}', headers=headers)
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get('/api/v1/api/roles', headers=headers)
+        self.assertEqual(response.status_code, 403)
+
+    def test_role_mask_resets_when_roles_change(self):
+        """Assigning a role recomputes the cached mask"""
+        user = self.users['user']
+        self.assertFalse(user.has_role('admin'))
+        user.roles.append(self.roles['admin'])
+        self.assertTrue(user.has_role('admin'))
+
+    def test_bits_are_dense(self):
+        """Role bits follow role order, not ids"""
+        extra = Role(id=1000, name='auditor', description='auditor role')
+        db.session.add(extra)
+        db.session.commit()
+        self.assertEqual(role_registry.required_mask(['auditor']), 1 << 3)
+
+    def test_demotion_applies_to_issued_tokens(self):
+        """Roles are read from the user, not the token, unless RBAC_TOKEN_CLAIMS is set"""
+        headers = {'Authorization': f"Bearer {self._access_token('admin_test')}"}
+        self.assertEqual(self.client.get('/api/v1/api/roles', headers=headers).status_code, 200)
+        self.users['admin'].roles = [self.roles['user']]
+        db.session.commit()
+        self.assertEqual(self.client.get('/api/v1/api/roles', headers=headers).status_code, 403)
+
+        with patch.dict(self.app.config, RBAC_TOKEN_CLAIMS=True):
+            # The claim is trusted until the token expires...
+            self.assertEqual(self.client.get('/api/v1/api/roles', headers=headers).status_code, 200)
+            # ...unless the roles changed since it was issued
+            db.session.delete(self.roles['moderator'])
+            db.session.commit()
+            self.assertEqual(self.client.get('/api/v1/api/roles', headers=headers).status_code, 403)
+
+    def test_new_role_loads_once_for_both_masks(self):
+        """A role added since the last load is resolved by a single reload"""
+        stale = role_registry.generation()
+        reviewer = Role(name='reviewer', description='reviewer role')
+        self.users['user'].roles.append(reviewer)
+        db.session.commit()
+        # As if another worker had added the role: this registry has not seen it
+        role_registry._generation = stale
+        with patch.object(role_registry, 'load', wraps=role_registry.load) as load:
+            self.assertTrue(self.users['user'].has_role('reviewer'))
+            self.assertFalse(self.users['user'].has_role('admin'))
+        self.assertEqual(load.call_count, 1)
+
+    def test_roles_changing_mid_check_fail_closed(self):
+        """A check whose masks predate a role change is denied"""
+        headers = {'Authorization': f"Bearer {self._access_token('admin_test')}"}
+        role_masks = User.role_masks
+
+        def change_roles(user, role_names=()):
+            masks = role_masks(user, role_names)
+            role_registry.invalidate()
+            self.app.config['ROLE_HIERARCHY'] = {}
+            return masks
+
+        hierarchy = self.app.config['ROLE_HIERARCHY']
+        try:
+            with patch.object(User, 'role_masks', change_roles):
+                self.assertEqual(self.client.get('/api/v1/api/roles', headers=headers).status_code, 403)
+        finally:
+            self.app.config['ROLE_HIERARCHY'] = hierarchy
+            role_registry.invalidate()
+        self.assertEqual(self.client.get('/api/v1/api/roles', headers=headers).status_code, 200)
+
+if __name__ == '__main__':
+    unittest.main()
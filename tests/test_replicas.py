@@ -0,0 +1,161 @@
+import unittest
+import os
+import json
+import shutil
+import tempfile
+from unittest.mock import patch
+from app import create_app
+from core.database import db
+from core.replicas import replica_router
+from models.user import User
+from models.role import Role
+
+class ReplicaTestCase(unittest.TestCase):
+    """App with SQLite file replicas that are filled by copying the primary"""
+
+    replica_names = ('replica_a.db', 'replica_b.db')
+
+    @classmethod
+    def setUpClass(cls):
+        os.environ['FLASK_TESTING'] = 'true'
+        cls.replica_dir = tempfile.mkdtemp()
+        urls = [f"sqlite:///{os.path.join(cls.replica_dir, name)}" for name in cls.replica_names]
+        with patch('app.Config.DATABASE_REPLICA_URLS', urls):
+            cls.app = create_app()
+        cls.client = cls.app.test_client()
+        cls.app_context = cls.app.app_context()
+        cls.app_context.push()
+
+    def setUp(self):
+        db.session.remove()
+        db.drop_all()
+        db.create_all()
+
+        admin_role = Role(name='admin', description='Administrator role')
+        db.session.add(admin_role)
+        admin = User(username='admin_test', email='admin@test.com')
+        admin.set_password('admin123')
+        admin.roles.append(admin_role)
+        db.session.add(admin)
+        db.session.commit()
+        db.session.remove()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+
+    @classmethod
+    def tearDownClass(cls):
+        db.session.remove()
+        for engine in replica_router.engines.values():
+            engine.dispose()
+        db.engine.dispose()
+        cls.app_context.pop()
+        shutil.rmtree(cls.replica_dir)
+        os.environ.pop('FLASK_TESTING', None)
+
+    def replicate(self):
+        """Copy every table from the primary to each replica"""
+        for engine in replica_router.engines.values():
+            db.metadata.drop_all(engine)
+            db.metadata.create_all(engine)
+            with db.engine.connect() as source, engine.begin() as target:
+                for table in db.metadata.sorted_tables:
+                    rows = [dict(row._mapping) for row in source.execute(table.select())]
+                    if rows:
+                        target.execute(table.insert(), rows)
+
+    def add_replica_only_role(self, name):
+        """A row only the replicas have, to tell where a read was served from"""
+        for engine in replica_router.engines.values():
+            with engine.begin() as connection:
+                connection.execute(Role.__table__.insert(), {'name': name, 'version': 1})
+
+    def login(self):
+        response = self.client.post('/api/v1/auth/login',
+            json={'username': 'admin_test', 'password': 'admin123'})
+        token = json.loads(response.data.decode())['access_token']
+        return {'Authorization': f'Bearer {token}'}
+
+    def role_names(self, headers):
+        db.session.remove()  # a new session per request, as outside of tests
+        response = self.client.get('/api/v1/api/roles', headers=headers)
+        self.assertEqual(response.status_code, 200, response.data)
+        return {role['name'] for role in json.loads(response.data.decode())}
+
+class TestReplicaRouting(ReplicaTestCase):
+    def test_read_only_endpoints_use_replicas(self):
+        self.replicate()
+        self.add_replica_only_role('replica_marker')
+        headers = self.login()
+        self.assertIn('replica_marker', self.role_names(headers))
+
+    def test_writes_and_other_endpoints_use_primary(self):
+        self.replicate()
+        self.add_replica_only_role('replica_marker')
+        headers = self.login()
+        response = self.client.post('/api/v1/api/roles', headers=headers,
+            json={'name': 'replica_marker', 'description': 'exists only on replicas'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Role.query.filter_by(name='replica_marker').count(), 1)
+
+    def test_read_your_writes_window(self):
+        self.replicate()
+        headers = self.login()
+        self.client.post('/api/v1/api/roles', headers=headers, json={'name': 'fresh'})
+        self.assertIn('fresh', self.role_names(headers))
+
+        self.app.config['REPLICA_READ_AFTER_WRITE_SECONDS'] = 0
+        try:
+            self.assertNotIn('fresh', self.role_names(headers))
+        finally:
+            self.app.config['REPLICA_READ_AFTER_WRITE_SECONDS'] = 5
+
+    def test_write_time_travels_with_the_client(self):
+        self.replicate()
+        headers = self.login()
+        response = self.client.post('/api/v1/api/roles', headers=headers, json={'name': 'fresh'})
+        last_write = response.headers['X-Last-Write']
+        self.assertIn(f'last_write={last_write}', response.headers['Set-Cookie'])
+
+        # Another client, as if served by another worker or host, without the cookie
+        other = self.app.test_client()
+        self.client = other
+        self.assertNotIn('fresh', self.role_names(headers))
+        self.assertIn('fresh', self.role_names({**headers, 'X-Last-Write': last_write}))
+        self.assertNotIn('fresh', self.role_names({**headers, 'X-Last-Write': '9999999999'}))
+
+    def test_revoked_token_checked_on_primary(self):
+        self.replicate()
+        headers = self.login()
+        self.client.post('/api/v1/auth/logout', headers=headers)
+        response = self.client.get('/api/v1/api/profile', headers=headers)
+        self.assertEqual(response.status_code, 401)
+
+    def test_round_robin_and_least_connections(self):
+        first, second = replica_router.engines.values()
+        with self.app.test_request_context():
+            chosen = [replica_router.choose() for _ in range(4)]
+            self.assertEqual(chosen.count(first), 2)
+            self.assertEqual(chosen.count(second), 2)
+
+            self.app.config['REPLICA_SELECTION'] = 'least_connections'
+            try:
+                with first.connect():
+                    self.assertIs(replica_router.choose(), second)
+            finally:
+                self.app.config['REPLICA_SELECTION'] = 'round_robin'
+
+class TestReplicaFailover(ReplicaTestCase):
+    replica_names = ('missing-directory/replica.db',)
+
+    def test_unreachable_replica_falls_back_to_primary(self):
+        headers = self.login()
+        with self.assertLogs(self.app.logger, 'WARNING'):
+            self.assertEqual(self.role_names(headers), {'admin'})
+        with self.app.test_request_context():
+            self.assertEqual(replica_router.healthy_keys(), [])
+        self.assertEqual(self.role_names(headers), {'admin'})
+
+if __name__ == '__main__':
+    unittest.main()
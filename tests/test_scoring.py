@@ -0,0 +1,38 @@
+import unittest
+from services.scoring import IssueScoring, issue_references
+
+class TestIssueOrdering(unittest.TestCase):
+    def setUp(self):
+        self.scoring = IssueScoring()
+
+    def _analyses(self, bodies):
+        return {number: self.scoring._build_analysis(number, f'Issue {number}', body, 'open', None, None)
+                for number, body in bodies.items()}
+
+    def _order(self, analyses, edges):
+        dependency_map = {number: [{'issue_number': dep} for dep in deps] for number, deps in edges.items()}
+        return [issue['issue_number'] for issue in self.scoring._order_issues(analyses, dependency_map)]
+
+    def test_dependencies_come_first(self):
+        analyses = self._analyses({1: 'security exploit xss', 2: 'typo', 3: 'slow memory latency'})
+        self.assertEqual(self._order(analyses, {}), [1, 3, 2])
+        self.assertEqual(self._order(analyses, {1: [2]}), [2, 1, 3])
+
+    def test_reference_cycle(self):
+        analyses = self._analyses({1: 'security', 2: 'typo', 3: 'docs'})
+        order = self._order(analyses, {1: [2], 2: [3], 3: [1]})
+        self.assertEqual(sorted(order), [1, 2, 3])
+        self.assertEqual(order[-1], 1)
+
+    def test_long_dependency_chain(self):
+        count = 5000
+        analyses = self._analyses({number: 'bug' for number in range(1, count + 1)})
+        order = self._order(analyses, {number: [number - 1] for number in range(2, count + 1)})
+        self.assertEqual(order, list(range(1, count + 1)))
+
+    def test_issue_references(self):
+        self.assertEqual(issue_references('Fixes #12, see #3 and #12'), {3, 12})
+        self.assertEqual(issue_references(None), set())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+import unittest
+import os
+import json
+from datetime import datetime, date
+from flask_restx import Namespace, fields, marshal
+from app import create_app
+from core.database import db
+from core.serialization import compile_model, dumps
+from api.github import (user_info_model, repo_details_model, issue_analysis_model,
+                        issue_dependencies_model, prioritized_issue_model)
+from api.resources import user_model_v1, user_model_v2
+
+CREATED = datetime(2024, 5, 1, 12, 30, 15, 250000)
+
+def insights(**overrides):
+    data = {
+        'technical_complexity': 0.7,
+        'impact_assessment': {'security': 0.9, 'performance': 1, 'ux': None},
+        'implementation_effort': 'medium',
+        'priority_level': 'high',
+        'required_expertise': ['python', 'sql'],
+        'potential_risks': [],
+        'suggestions': ['add tests', None]
+    }
+    data.update(overrides)
+    return data
+
+def prioritized_issue(number, **overrides):
+    data = {
+        'issue_number': number,
+        'title': f'Issue {number}',
+        'complexity': 3,
+        'security_impact': 0.5,
+        'performance_impact': '0.25',
+        'ux_impact': 0.0,
+        'implementation_time': 4.0,
+        'score': 12.345,
+        'state': 'open',
+        'created_at': CREATED,
+        'updated_at': '2024-05-02T08:00:00',
+        'dependencies': [{'issue_number': 1, 'title': 'Base', 'state': 'closed',
+                          'created_at': date(2024, 1, 1)}],
+        'ai_insights': insights(),
+        'unrelated': 'dropped'
+    }
+    data.update(overrides)
+    return data
+
+class TestCompiledEncoders(unittest.TestCase):
+    """Compiled encoders must produce exactly what flask_restx.marshal produces"""
+
+    def assertEquivalent(self, data, model):
+        expected = json.loads(json.dumps(marshal(data, model)))
+        self.assertEqual(json.loads(dumps(compile_model(model)(data))), expected)
+
+    def test_prioritized_issues(self):
+        issues = [
+            prioritized_issue(1),
+            prioritized_issue(2, ai_insights=None, dependencies=None),
+            prioritized_issue(3, ai_insights=insights(impact_assessment=None,
+                                                      required_expertise=('a', 'b'))),
+            prioritized_issue(4, dependencies=[None, {'issue_number': '5'}], state=None),
+            {'issue_number': 5}
+        ]
+        self.assertEquivalent(issues, prioritized_issue_model)
+
+    def test_issue_models(self):
+        self.assertEquivalent(prioritized_issue(7), issue_analysis_model)
+        self.assertEquivalent({'issue_number': 7, 'dependencies': prioritized_issue(7)['dependencies'],
+                               'dependency_count': 1}, issue_dependencies_model)
+        self.assertEquivalent({'issue_number': 7, 'dependencies': {'issue_number': 8}},
+                              issue_dependencies_model)
+
+    def test_github_models(self):
+        self.assertEquivalent({'login': 'octocat', 'name': None, 'public_repos': 8,
+                               'followers': True}, user_info_model)
+        self.assertEquivalent({'name': 'hive', 'stars': 10, 'forks': 2, 'issues_count': 0,
+                               'created_at': CREATED, 'updated_at': None}, repo_details_model)
+
+    def test_user_models(self):
+        users = [{'id': 1, 'username': 'admin', 'email': 'admin@test.com', 'is_active': True,
+                  'created_at': CREATED, 'roles': ['admin', 'user']},
+                 {'id': 2, 'username': 'user', 'email': 'user@test.com', 'is_active': 0,
+                  'created_at': None, 'roles': []}]
+        self.assertEquivalent(users, user_model_v1)
+        self.assertEquivalent(users, user_model_v2)
+
+    def test_objects_and_unusual_fields(self):
+        """Attribute access, defaults and unsupported fields defer to flask-restx"""
+        ns = Namespace('test')
+        model = ns.model('Unusual', {
+            'name': fields.String(attribute='label', default='unnamed'),
+            'count': fields.Integer(default=3),
+            'flag': fields.Boolean(default=lambda: True),
+            'when': fields.DateTime(dt_format='rfc822'),
+            'tags': fields.List(fields.Integer),
+            'extra': fields.Raw
+        })
+
+        class Record:
+            label = 'record'
+            count = None
+            when = CREATED
+            tags = {1}
+
+        self.assertEquivalent(Record(), model)
+        self.assertEquivalent({'label': None, 'when': CREATED, 'tags': ('1', 2),
+                               'extra': [1]}, model)
+        self.assertEquivalent(None, model)
+
+class TestFastMarshalResponses(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        os.environ['FLASK_TESTING'] = 'true'
+        cls.app = create_app()
+        cls.client = cls.app.test_client()
+        with cls.app.app_context():
+            db.create_all()
+
+    @classmethod
+    def tearDownClass(cls):
+        with cls.app.app_context():
+            db.session.remove()
+            db.drop_all()
+        os.environ.pop('FLASK_TESTING', None)
+
+    def test_swagger_documents_response_models(self):
+        spec = self.client.get('/api/v1/swagger.json').get_json()
+        prioritized = spec['paths']['/github/repository/{owner}/{repo_name}/issues/prioritized']
+        self.assertEqual(prioritized['get']['responses']['200']['schema'],
+                         {'type': 'array', 'items': {'$ref': '#/definitions/PrioritizedIssue'}})
+        self.assertIn('X-Fields', [param['name'] for param in prioritized['get']['parameters']])
+
+    def test_restx_json_responses_use_fast_backend(self):
+        response = self.client.post('/api/v1/auth/login',
+            json={'username': 'nobody', 'password': 'wrong'})
+        self.assertEqual(response.content_type, 'application/json')
+        self.assertTrue(response.data.endswith(b'\n'))
+        self.assertIn('message', json.loads(response.data))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+import os
+import json
+import subprocess
+import sys
+import tempfile
+from app import create_app
+from core.database import db
+from models.role import Role
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class TestStartup(unittest.TestCase):
+    def test_create_app_has_no_side_effects(self):
+        probe = ("import json, sys, sqlalchemy\n"
+                 "from app import create_app\n"
+                 "from core.database import db\n"
+                 "app = create_app()\n"
+                 "with app.app_context():\n"
+                 "    tables = sqlalchemy.inspect(db.engine).get_table_names()\n"
+                 "print(json.dumps({'tables': tables,\n"
+                 "                  'heavy': [m for m in ('github', 'numpy', 'requests') if m in sys.modules]}))\n")
+        with tempfile.TemporaryDirectory() as directory:
+            env = {**os.environ, 'FLASK_TESTING': 'true',
+                   'DATABASE_URL': f"sqlite:///{os.path.join(directory, 'startup.db')}"}
+            output = subprocess.run([sys.executable, '-c', probe], cwd=ROOT, env=env,
+                                    check=True, capture_output=True, text=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        self.assertEqual(result['tables'], [])
+        self.assertEqual(result['heavy'], [])
+
+class TestInitDbCommand(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        os.environ['FLASK_TESTING'] = 'true'
+        cls.app = create_app()
+        cls.app_context = cls.app.app_context()
+        cls.app_context.push()
+
+    def setUp(self):
+        db.session.remove()
+        db.drop_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+
+    @classmethod
+    def tearDownClass(cls):
+        db.session.remove()
+        db.engine.dispose()
+        cls.app_context.pop()
+        os.environ.pop('FLASK_TESTING', None)
+
+    def test_init_db_creates_tables_and_roles_once(self):
+        runner = self.app.test_cli_runner()
+        for _ in range(2):
+            result = runner.invoke(args=['init-db'])
+            self.assertEqual(result.exit_code, 0, result.output)
+        names = sorted(role.name for role in Role.query.all())
+        self.assertEqual(names, ['admin', 'moderator', 'user'])
+
+if __name__ == '__main__':
+    unittest.main()
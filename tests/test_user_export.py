@@ -0,0 +1,85 @@
+import unittest
+import os
+import csv
+import io
+import json
+from app import create_app
+from core.database import db
+from models.user import User
+from models.role import Role
+from query_counter import count_queries
+
+class TestUserExport(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        os.environ['FLASK_TESTING'] = 'true'
+        cls.app = create_app()
+        cls.client = cls.app.test_client()
+        cls.app_context = cls.app.app_context()
+        cls.app_context.push()
+
+    def setUp(self):
+        db.session.remove()
+        db.drop_all()
+        db.create_all()
+
+        admin_role = Role(name='admin', description='Administrator role')
+        user_role = Role(name='user', description='Regular user role')
+        db.session.add_all([admin_role, user_role])
+
+        admin = User(username='admin_test', email='admin@test.com')
+        admin.set_password('admin123')
+        admin.roles.extend([admin_role, user_role])
+        db.session.add(admin)
+        for i in range(4):
+            user = User(username=f'user_{i}', email=f'user_{i}@test.com', password_hash='x')
+            user.roles.append(user_role)
+            db.session.add(user)
+        db.session.commit()
+
+        response = self.client.post('/api/v1/auth/login',
+            json={'username': 'admin_test', 'password': 'admin123'})
+        token = json.loads(response.data.decode())['access_token']
+        self.headers = {'Authorization': f'Bearer {token}'}
+        self.app.config['USER_EXPORT_BATCH_SIZE'] = 2
+
+    def tearDown(self):
+        self.app.config['USER_EXPORT_BATCH_SIZE'] = 1000
+        db.session.remove()
+        db.drop_all()
+
+    @classmethod
+    def tearDownClass(cls):
+        db.session.remove()
+        db.engine.dispose()
+        cls.app_context.pop()
+        os.environ.pop('FLASK_TESTING', None)
+
+    def test_ndjson_export(self):
+        """Every user is streamed as one JSON line with roles, one roles query per batch"""
+        with count_queries() as counter:
+            response = self.client.get('/api/v1/api/users/export', headers=self.headers)
+            self.assertTrue(response.is_streamed)
+            lines = response.get_data(as_text=True).splitlines()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        users = [json.loads(line) for line in lines]
+        self.assertEqual([user['username'] for user in users],
+                         ['admin_test', 'user_0', 'user_1', 'user_2', 'user_3'])
+        self.assertEqual(users[0]['roles'], ['admin', 'user'])
+        # Blocklist check, user lookup, the user's roles, the cursor, and 3 batches of roles
+        self.assertEqual(counter.count, 7, f'\n{counter}')
+
+    def test_csv_export(self):
+        """CSV export has a header row and ';'-joined roles"""
+        response = self.client.get('/api/v1/api/users/export?format=csv', headers=self.headers)
+
+        self.assertEqual(response.status_code, 200)
+        rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]['roles'], 'admin;user')
+        self.assertIn('attachment', response.headers['Content-Disposition'])
+
+if __name__ == '__main__':
+    unittest.main()
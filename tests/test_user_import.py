@@ -0,0 +1,116 @@
+import unittest
+import os
+import io
+import json
+from app import create_app
+from core.database import db
+from models.user import User
+from models.role import Role
+
+class TestUserImport(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        os.environ['FLASK_TESTING'] = 'true'
+        cls.app = create_app()
+        cls.client = cls.app.test_client()
+        cls.app_context = cls.app.app_context()
+        cls.app_context.push()
+
+    def setUp(self):
+        db.session.remove()
+        db.drop_all()
+        db.create_all()
+
+        self.admin_role = Role(name='admin', description='Administrator role')
+        self.user_role = Role(name='user', description='Regular user role')
+        db.session.add_all([self.admin_role, self.user_role])
+
+        admin = User(username='admin_test', email='admin@test.com')
+        admin.set_password('admin123')
+        admin.roles.append(self.admin_role)
+        db.session.add(admin)
+        db.session.commit()
+
+        response = self.client.post('/api/v1/auth/login',
+            json={'username': 'admin_test', 'password': 'admin123'})
+        token = json.loads(response.data.decode())['access_token']
+        self.headers = {'Authorization': f'Bearer {token}'}
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+
+    @classmethod
+    def tearDownClass(cls):
+        db.session.remove()
+        db.engine.dispose()
+        cls.app_context.pop()
+        os.environ.pop('FLASK_TESTING', None)
+
+    def test_import_json_reports_per_row_results(self):
+        """Valid rows are created with the user role; bad rows are reported"""
+        rows = [
+            {'username': 'alice', 'email': 'alice@example.com', 'password': 'password1'},
+            {'username': 'bob', 'email': 'not-an-email', 'password': 'password1'},
+            {'username': 'alice', 'email': 'alice2@example.com', 'password': 'password1'},
+            {'username': 'admin_test', 'email': 'other@example.com', 'password': 'password1'},
+            {'username': 'carol', 'email': 'carol@example.com', 'password': 'password1'},
+        ]
+        response = self.client.post('/api/v1/api/users/import', headers=self.headers, json=rows)
+
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data.decode())
+        self.assertEqual(data['created'], 2)
+        self.assertEqual(data['failed'], 3)
+        self.assertEqual([result['status'] for result in data['results']],
+                         ['created', 'invalid', 'duplicate', 'conflict', 'created'])
+
+        alice = User.query.filter_by(username='alice').one()
+        self.assertTrue(alice.check_password('password1'))
+        self.assertEqual([role.name for role in alice.roles], ['user'])
+
+    def test_import_csv_upload(self):
+        """CSV files are accepted as a multipart upload"""
+        csv_data = 'username,email,password\ndave,dave@example.com,password1\n'
+        response = self.client.post('/api/v1/api/users/import', headers=self.headers,
+            data={'file': (io.BytesIO(csv_data.encode()), 'users.csv')},
+            content_type='multipart/form-data')
+
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data.decode())
+        self.assertEqual(data['created'], 1)
+        self.assertIsNotNone(User.query.filter_by(username='dave').first())
+
+    def test_import_rejects_non_utf8_upload(self):
+        """A CSV file in another encoding is rejected, not a server error"""
+        csv_data = 'username,email,password\nrené,rene@example.com,password1\n'
+        response = self.client.post('/api/v1/api/users/import', headers=self.headers,
+            data={'file': (io.BytesIO(csv_data.encode('latin-1')), 'users.csv')},
+            content_type='multipart/form-data')
+        self.assertEqual(response.status_code, 400)
+        self.assertIsNone(User.query.filter_by(email='rene@example.com').first())
+
+        # Nor are its bytes replaced when sent as a text/csv body
+        response = self.client.post('/api/v1/api/users/import', headers=self.headers,
+            data=csv_data.encode('latin-1'), content_type='text/csv')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(json.loads(response.data.decode())['message'], 'CSV upload must be UTF-8 encoded')
+        self.assertIsNone(User.query.filter_by(email='rene@example.com').first())
+
+    def test_import_csv_body_with_bom(self):
+        """A text/csv body may start with a UTF-8 byte order mark"""
+        csv_data = '\ufeffusername,email,password\nrené,rene@example.com,password1\n'
+        response = self.client.post('/api/v1/api/users/import', headers=self.headers,
+            data=csv_data.encode('utf-8'), content_type='text/csv')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.data.decode())['created'], 1)
+        self.assertIsNotNone(User.query.filter_by(username='rené').first())
+
+    def test_import_rejects_non_array_payload(self):
+        """A JSON object instead of an array is rejected"""
+        response = self.client.post('/api/v1/api/users/import', headers=self.headers,
+            json={'username': 'eve'})
+        self.assertEqual(response.status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+import os
+import json
+from datetime import datetime, timedelta
+from app import create_app
+from core.database import db
+from core.pagination import encode_cursor
+from models.user import User
+from models.role import Role
+
+class TestUserPagination(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        os.environ['FLASK_TESTING'] = 'true'
+        cls.app = create_app()
+        cls.client = cls.app.test_client()
+        cls.app_context = cls.app.app_context()
+        cls.app_context.push()
+
+    def setUp(self):
+        db.session.remove()
+        db.drop_all()
+        db.create_all()
+
+        admin_role = Role(name='admin', description='Administrator role')
+        user_role = Role(name='user', description='Regular user role')
+        db.session.add_all([admin_role, user_role])
+
+        admin = User(username='admin_test', email='admin@test.com')
+        admin.set_password('admin123')
+        admin.roles.append(admin_role)
+        db.session.add(admin)
+
+        start = datetime(2024, 1, 1)
+        for i in range(5):
+            user = User(username=f'user_{i}', email=f'user_{i}@test.com',
+                        password_hash='x', is_active=i % 2 == 0,
+                        created_at=start + timedelta(days=i))
+            user.roles.append(user_role)
+            db.session.add(user)
+        db.session.commit()
+
+        response = self.client.post('/api/v1/auth/login',
+            json={'username': 'admin_test', 'password': 'admin123'})
+        token = json.loads(response.data.decode())['access_token']
+        self.headers = {'Authorization': f'Bearer {token}'}
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+
+    @classmethod
+    def tearDownClass(cls):
+        db.session.remove()
+        db.engine.dispose()
+        cls.app_context.pop()
+        os.environ.pop('FLASK_TESTING', None)
+
+    def _get(self, query):
+        return self.client.get(f'/api/v1/api/users?{query}', headers=self.headers)
+
+    def test_cursor_walks_all_pages(self):
+        """Following X-Next-Cursor returns every user exactly once"""
+        usernames, cursor = [], None
+        while True:
+            response = self._get(f'limit=2&cursor={cursor}' if cursor else 'limit=2')
+            self.assertEqual(response.status_code, 200)
+            page = json.loads(response.data.decode())
+            self.assertLessEqual(len(page), 2)
+            usernames.extend(user['username'] for user in page)
+            cursor = response.headers.get('X-Next-Cursor')
+            if not cursor:
+                break
+            self.assertIn('rel="next"', response.headers['Link'])
+
+        self.assertEqual(usernames, ['admin_test'] + [f'user_{i}' for i in range(5)])
+
+    def test_filters(self):
+        """is_active, role and created_at filters narrow the page"""
+        page = json.loads(self._get('is_active=false').data.decode())
+        self.assertEqual([user['username'] for user in page], ['user_1', 'user_3'])
+
+        page = json.loads(self._get('role=admin').data.decode())
+        self.assertEqual([user['username'] for user in page], ['admin_test'])
+
+        page = json.loads(self._get(
+            'created_after=2024-01-02T00:00:00&created_before=2024-01-04T00:00:00').data.decode())
+        self.assertEqual([user['username'] for user in page], ['user_1', 'user_2'])
+
+    def test_invalid_cursor(self):
+        """Tampered cursors are rejected"""
+        response = self._get('cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 400)
+        # Well-formed, but out of range for an integer key
+        for key in (2 ** 64, '1e400', 1e308):
+            response = self._get(f"cursor={encode_cursor({'k': key})}")
+            self.assertEqual(response.status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()